@@ -1,9 +1,10 @@
-from functools import partial
 import argparse
 import asyncio
 import logging
 
-from dsmr_parser.clients import create_dsmr_reader, create_tcp_dsmr_reader
+from dsmr_parser.clients.hub import DSMRHub
+from dsmr_parser.clients.metrics import MetricsServer
+from dsmr_parser.clients.registry import AUTO_DETECT, dsmr_versions
 
 
 def console():
@@ -16,50 +17,56 @@ def console():
                         help='alternatively connect using TCP host.')
     parser.add_argument('--port', default=None,
                         help='TCP port to use for connection')
-    parser.add_argument('--version', default='2.2', choices=['2.2', '4', '5', '5B', '5L', '5S', 'Q3D'],
-                        help='DSMR version (2.2, 4, 5, 5B, 5L, 5S, Q3D)')
+    versions = dsmr_versions() + [AUTO_DETECT]
+    parser.add_argument('--version', default='2.2', choices=versions,
+                        help='DSMR version ({}), {} detects it (TCP only)'.format(', '.join(versions), AUTO_DETECT))
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='serve Prometheus metrics over HTTP on this port')
     parser.add_argument('--verbose', '-v', action='count')
 
     args = parser.parse_args()
 
+    if args.version == AUTO_DETECT and not (args.host and args.port):
+        parser.error('--version {} requires --host and --port, serial devices need a version'.format(AUTO_DETECT))
+
     if args.verbose:
         level = logging.DEBUG
     else:
         level = logging.ERROR
     logging.basicConfig(level=level)
 
-    loop = asyncio.get_event_loop()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
 
-    def print_callback(telegram):
+    def print_callback(source_id, telegram):
         """Callback that prints telegram values."""
         for obiref, obj in telegram.items():
             if obj:
                 print(obj.value, obj.unit)
         print()
 
+    # wait 5 seconds before attempting reconnect
+    hub = DSMRHub(telegram_callback=print_callback, loop=loop, min_backoff=5, max_backoff=5)
+
     # create tcp or serial connection depending on args
     if args.host and args.port:
-        create_connection = partial(create_tcp_dsmr_reader,
-                                    args.host, args.port, args.version,
-                                    print_callback, loop=loop)
+        hub.add_tcp_source('meter', args.host, args.port, args.version)
     else:
-        create_connection = partial(create_dsmr_reader,
-                                    args.device, args.version,
-                                    print_callback, loop=loop)
+        hub.add_serial_source('meter', args.device, args.version)
+
+    metrics_server = MetricsServer(args.metrics_port) if args.metrics_port is not None else None
 
     try:
+        if metrics_server:
+            loop.run_until_complete(metrics_server.start())
         # connect and keep connected until interrupted by ctrl-c
-        while True:
-            # create serial or tcp connection
-            conn = create_connection()
-            transport, protocol = loop.run_until_complete(conn)
-            # wait until connection it closed
-            loop.run_until_complete(protocol.wait_closed())
-            # wait 5 seconds before attempting reconnect
-            loop.run_until_complete(asyncio.sleep(5))
+        hub.start()
+        loop.run_until_complete(hub.wait_stopped())
     except KeyboardInterrupt:
         # cleanup connection after user initiated shutdown
-        transport.close()
+        loop.run_until_complete(hub.stop())
         loop.run_until_complete(asyncio.sleep(0))
     finally:
+        if metrics_server:
+            loop.run_until_complete(metrics_server.stop())
         loop.close()
@@ -0,0 +1,240 @@
+"""
+Downsampling of telegram streams into fixed time windows, like the 1 minute
+or 15 minute rollups kept in storage instead of the telegrams of every second.
+
+    aggregator = WindowAggregator(window=60)
+
+    async for telegram in protocol:
+        for window in aggregator.add(telegram):
+            await store(window.to_dict())
+
+Instantaneous values (GAUGE fields) are summarized by min, max, mean and last,
+cumulative meter readings (COUNTER fields) by first, last and delta. Only the
+running summary is kept, so the memory of a window does not grow with the
+number of telegrams in it.
+"""
+
+from datetime import datetime, timezone, timedelta
+import json
+
+GAUGE = 'gauge'
+COUNTER = 'counter'
+
+# The fields aggregated by default, fields missing in a telegram are skipped.
+DEFAULT_FIELDS = dict(
+    [(name, GAUGE) for name in (
+        'CURRENT_ELECTRICITY_USAGE',
+        'CURRENT_ELECTRICITY_DELIVERY',
+        'INSTANTANEOUS_VOLTAGE_L1',
+        'INSTANTANEOUS_VOLTAGE_L2',
+        'INSTANTANEOUS_VOLTAGE_L3',
+        'INSTANTANEOUS_CURRENT_L1',
+        'INSTANTANEOUS_CURRENT_L2',
+        'INSTANTANEOUS_CURRENT_L3',
+        'INSTANTANEOUS_ACTIVE_POWER_L1_POSITIVE',
+        'INSTANTANEOUS_ACTIVE_POWER_L2_POSITIVE',
+        'INSTANTANEOUS_ACTIVE_POWER_L3_POSITIVE',
+        'INSTANTANEOUS_ACTIVE_POWER_L1_NEGATIVE',
+        'INSTANTANEOUS_ACTIVE_POWER_L2_NEGATIVE',
+        'INSTANTANEOUS_ACTIVE_POWER_L3_NEGATIVE',
+    )] +
+    [(name, COUNTER) for name in (
+        'ELECTRICITY_USED_TARIFF_1',
+        'ELECTRICITY_USED_TARIFF_2',
+        'ELECTRICITY_DELIVERED_TARIFF_1',
+        'ELECTRICITY_DELIVERED_TARIFF_2',
+    )]
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).isoformat()
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return float(value)
+
+
+class GaugeSummary(object):
+    """Min, max, mean and last of an instantaneous value in a window."""
+
+    kind = GAUGE
+
+    def __init__(self, value, unit):
+        self.unit = unit
+        self.count = 1
+        self.sum = self.min = self.max = self.last = value
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count
+
+    def to_dict(self):
+        return {
+            'min': _json_value(self.min),
+            'max': _json_value(self.max),
+            'mean': _json_value(self.mean),
+            'last': _json_value(self.last),
+            'unit': self.unit,
+        }
+
+
+class CounterSummary(object):
+    """
+    First, last and delta of a cumulative meter reading in a window. The
+    delta is taken from the last reading of the previous window when there
+    is one, so the deltas of consecutive windows add up to the total.
+    """
+
+    kind = COUNTER
+
+    def __init__(self, value, unit, previous=None):
+        self.unit = unit
+        self.first = self.last = value
+        self.previous = previous
+
+    def add(self, value):
+        self.last = value
+
+    @property
+    def delta(self):
+        return self.last - (self.first if self.previous is None else self.previous)
+
+    def to_dict(self):
+        return {
+            'first': _json_value(self.first),
+            'last': _json_value(self.last),
+            'delta': _json_value(self.delta),
+            'unit': self.unit,
+        }
+
+
+class Window(object):
+    """The aggregated fields of the telegrams of one source in [start, end)."""
+
+    def __init__(self, source_id, start, end):
+        self.source_id = source_id
+        self.start = start
+        self.end = end
+        self.count = 0
+        self.fields = {}
+
+    def __iter__(self):
+        return iter(self.fields.items())
+
+    def to_dict(self):
+        return {
+            'source_id': self.source_id,
+            'start': _json_value(self.start),
+            'end': _json_value(self.end),
+            'count': self.count,
+            'fields': {name: summary.to_dict() for name, summary in self},
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+class WindowAggregator(object):
+    """
+    Aggregates the telegrams of any number of sources into windows of a fixed
+    length, aligned to whole multiples of the length since the epoch (so 900
+    seconds gives quarter hours). A window is closed and returned by add()
+    when the first telegram of a later window arrives.
+
+    Telegrams are placed in time by their P1_MESSAGE_TIMESTAMP, telegrams
+    without a valid one (like DSMR v2.2) by the time they are added. Telegrams older
+    than the open window are counted in late_telegrams and skipped.
+    """
+
+    def __init__(self, window=60, fields=None):
+        """
+        :param float window: length of the windows in seconds
+        :param dict fields: GAUGE or COUNTER by the obis_name of the values to
+            aggregate, DEFAULT_FIELDS by default
+        """
+        self.window = timedelta(seconds=window)
+        self.fields = dict(DEFAULT_FIELDS if fields is None else fields)
+        self.late_telegrams = 0
+        # the open window by source
+        self._windows = {}
+        # the last counter readings of the last closed window, by source
+        self._counters = {}
+
+    def _window_start(self, timestamp):
+        return timestamp - (timestamp - EPOCH) % self.window
+
+    def add(self, telegram, source_id=None, timestamp=None):
+        """
+        :param Telegram telegram:
+        :param source_id: the meter or connection the telegram came from
+        :param datetime timestamp: when the telegram was sent, overrides the
+            timestamp in the telegram
+        :return: the windows closed by this telegram
+        :rtype: list
+        """
+        if timestamp is None:
+            p1_timestamp = getattr(telegram, 'P1_MESSAGE_TIMESTAMP', None)
+            # An invalid timestamp, like 000000000000W, parses to None.
+            timestamp = getattr(p1_timestamp, 'value', None) or datetime.now(timezone.utc)
+
+        closed = []
+        window = self._windows.get(source_id)
+
+        if window is not None and timestamp >= window.end:
+            closed.append(self._close(source_id))
+            window = None
+        elif window is not None and timestamp < window.start:
+            self.late_telegrams += 1
+            return closed
+
+        if window is None:
+            start = self._window_start(timestamp)
+            window = self._windows[source_id] = Window(source_id, start, start + self.window)
+
+        window.count += 1
+
+        for name, kind in self.fields.items():
+            dsmr_object = getattr(telegram, name, None)
+            value = getattr(dsmr_object, 'value', None)
+            if value is None or isinstance(value, (str, datetime, list)):
+                continue
+
+            summary = window.fields.get(name)
+            if summary is not None:
+                summary.add(value)
+            elif kind == COUNTER:
+                previous = self._counters.get(source_id, {}).get(name)
+                window.fields[name] = CounterSummary(value, dsmr_object.unit, previous)
+            else:
+                window.fields[name] = GaugeSummary(value, dsmr_object.unit)
+
+        return closed
+
+    def _close(self, source_id):
+        window = self._windows.pop(source_id)
+        self._counters.setdefault(source_id, {}).update(
+            (name, summary.last) for name, summary in window if summary.kind == COUNTER)
+        return window
+
+    def flush(self, source_id=None):
+        """
+        Close the open window of a source, for example when the connection is
+        closed.
+
+        :rtype: Window or None
+        """
+        if source_id not in self._windows:
+            return None
+        return self._close(source_id)
@@ -0,0 +1,159 @@
+"""
+Tracking of the Belgian capacity tariff, which is billed on the highest
+quarter hour average demand of every month.
+
+BELGIUM_FLUVIUS meters send the running average demand of the current quarter
+hour (BELGIUM_CURRENT_AVERAGE_DEMAND), the peak of the month
+(BELGIUM_MAXIMUM_DEMAND_MONTH) and the peaks of the previous months
+(BELGIUM_MAXIMUM_DEMAND_13_MONTHS). The tracker turns these into the state
+needed to keep the peak down, like the projected average of the current
+quarter hour:
+
+    tracker = CapacityTariffTracker()
+    for telegram in serial_reader.read_as_object():
+        tracker.update(telegram)
+        if tracker.projected_month_peak > tracker.month_peak:
+            reduce_load()
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _value(telegram, obis_name):
+    dsmr_object = getattr(telegram, obis_name, None)
+    return dsmr_object.value if dsmr_object is not None else None
+
+
+class CapacityTariffTracker(object):
+    """
+    The quarter hour and monthly peak state of a BELGIUM_FLUVIUS meter,
+    updated in constant time per telegram.
+
+    The history of monthly peaks only changes once a month. TelegramParser
+    parses its line again only when the line changed (see LINE_CACHE_SIZE),
+    so the tracker only recalculates the history when it gets another object.
+    """
+
+    QUARTER_HOUR = timedelta(minutes=15)
+
+    # Monthly peaks below this are billed as this.
+    MINIMUM_PEAK = Decimal('2.5')
+
+    # The capacity tariff is billed on the average peak of 12 months, the
+    # current month and the 11 months before it.
+    BILLED_MONTHS = 12
+
+    def __init__(self):
+        self.timestamp = None
+        self.quarter_start = None
+        # running average demand of the current quarter hour in kW
+        self.current_average = None
+        # current power in kW
+        self.current_power = None
+        self.month_peak = None
+        self.month_peak_time = None
+        # (start, average demand) of the last completed quarter hour
+        self.last_quarter = None
+        # the monthly peaks of the previous months, most recent first
+        self.history = []
+        self._history_object = None
+        self._history_sum = Decimal(0)
+
+    def update(self, telegram):
+        """
+        :param Telegram telegram: a BELGIUM_FLUVIUS telegram
+        :return: the (start, average demand) of the quarter hour completed
+            by this telegram, if any
+        :rtype: tuple
+        """
+        completed = None
+        timestamp = _value(telegram, 'P1_MESSAGE_TIMESTAMP')
+
+        if timestamp is not None:
+            quarter_start = timestamp - (timestamp - EPOCH) % self.QUARTER_HOUR
+            if self.quarter_start is not None and quarter_start > self.quarter_start and \
+                    self.current_average is not None:
+                completed = self.last_quarter = (self.quarter_start, self.current_average)
+            self.timestamp = timestamp
+            self.quarter_start = quarter_start
+
+        self.current_average = _value(telegram, 'BELGIUM_CURRENT_AVERAGE_DEMAND')
+        self.current_power = _value(telegram, 'CURRENT_ELECTRICITY_USAGE')
+
+        month_peak = getattr(telegram, 'BELGIUM_MAXIMUM_DEMAND_MONTH', None)
+        if month_peak is not None:
+            self.month_peak = month_peak.value
+            self.month_peak_time = month_peak.datetime
+
+        history = getattr(telegram, 'BELGIUM_MAXIMUM_DEMAND_13_MONTHS', None)
+        if history is not None and history is not self._history_object:
+            self._update_history(history)
+
+        return completed
+
+    def _update_history(self, history):
+        self._history_object = history
+        self.history = sorted(history, key=lambda peak: peak.datetime, reverse=True)
+        self._history_sum = sum(
+            (max(peak.value, self.MINIMUM_PEAK) for peak in self.history[:self.BILLED_MONTHS - 1]), Decimal(0))
+
+    @property
+    def projected_average(self):
+        """
+        The average demand the current quarter hour ends with when the
+        current power is drawn for the rest of it.
+
+        :rtype: Decimal
+        """
+        if self.current_average is None or self.current_power is None or self.timestamp is None:
+            return self.current_average
+
+        quarter_seconds = int(self.QUARTER_HOUR.total_seconds())
+        elapsed = int((self.timestamp - self.quarter_start).total_seconds())
+
+        return (self.current_average * elapsed + self.current_power * (quarter_seconds - elapsed)) / quarter_seconds
+
+    @property
+    def projected_month_peak(self):
+        """
+        The peak of the month after the current quarter hour, as projected.
+
+        :rtype: Decimal
+        """
+        projected_average = self.projected_average
+        if projected_average is None:
+            return self.month_peak
+        if self.month_peak is None:
+            return projected_average
+        return max(self.month_peak, projected_average)
+
+    @property
+    def rolling_average(self):
+        """
+        The average of the billed peak of the current month and those of the
+        previous months in the history.
+
+        :rtype: Decimal
+        """
+        if self.month_peak is None:
+            return None
+
+        months = min(len(self.history), self.BILLED_MONTHS - 1) + 1
+        return (self._history_sum + max(self.month_peak, self.MINIMUM_PEAK)) / months
+
+    def to_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'quarter_start': self.quarter_start,
+            'current_average': self.current_average,
+            'current_power': self.current_power,
+            'projected_average': self.projected_average,
+            'month_peak': self.month_peak,
+            'month_peak_time': self.month_peak_time,
+            'projected_month_peak': self.projected_month_peak,
+            'rolling_average': self.rolling_average,
+            'last_quarter': self.last_quarter,
+        }
@@ -0,0 +1,117 @@
+"""
+Decryption of DLMS general_global_cipher frames, as sent by for example the
+SAGEMCOM_T210_D_R meters.
+
+The keys are converted and validated once, instead of for every frame.
+"""
+
+from binascii import unhexlify
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from dlms_cosem.exceptions import DecryptionError
+from dlms_cosem.security import validate_key
+
+# Length of the (truncated) authentication tag at the end of the ciphered text.
+TAG_LENGTH = 12
+
+
+def _to_bytes(value):
+    return unhexlify(value) if isinstance(value, str) else bytes(value)
+
+
+class TelegramCipher(object):
+    """
+    Decrypts the frames of meters sharing one encryption and authentication
+    key, equivalent to GeneralGlobalCipher.to_plain_apdu().
+    """
+
+    def __init__(self, encryption_key, authentication_key):
+        """
+        :param encryption_key: hex string or bytes
+        :param authentication_key: hex string or bytes
+        """
+        self.encryption_key = _to_bytes(encryption_key)
+        self.authentication_key = _to_bytes(authentication_key)
+        self._algorithm = algorithms.AES(self.encryption_key) if self.encryption_key else None
+        self._validated_suites = set()
+
+    def _validate_keys(self, security_suite):
+        if security_suite not in self._validated_suites:
+            validate_key(security_suite, self.encryption_key)
+            validate_key(security_suite, self.authentication_key)
+            self._validated_suites.add(security_suite)
+
+    def decrypt(self, apdu):
+        """
+        :param GeneralGlobalCipher apdu:
+        :return: the plain text
+        :rtype: bytes
+        :raises DecryptionError: when the frame can not be authenticated
+        :raises ValueError: when the keys do not fit the security suite of the frame
+        """
+        security_control = apdu.security_control
+
+        if not security_control.encrypted and not security_control.authenticated:
+            raise NotImplementedError("decrypt() only handles authenticated encryption")
+
+        if len(apdu.system_title) != 8:
+            raise ValueError("System Title must be of length 8, not {}".format(len(apdu.system_title)))
+
+        self._validate_keys(security_control.security_suite)
+
+        # The initialization vector consists of the system title and invocation counter.
+        iv = apdu.system_title + apdu.invocation_counter.to_bytes(4, "big")
+        ciphered_text = apdu.ciphered_text
+        tag = ciphered_text[-TAG_LENGTH:]
+
+        decryptor = Cipher(self._algorithm, modes.GCM(iv, tag, min_tag_length=TAG_LENGTH)).decryptor()
+        decryptor.authenticate_additional_data(security_control.to_bytes() + self.authentication_key)
+
+        try:
+            return decryptor.update(ciphered_text[:-TAG_LENGTH]) + decryptor.finalize()
+        except InvalidTag:
+            raise DecryptionError(
+                "Unable to decrypt ciphertext. Authentication tag is not valid. Ciphered "
+                "text might have been tampered with or key, auth key, security control or "
+                "invocation counter is wrong"
+            )
+
+
+class KeyStore(object):
+    """
+    Keys of many meters, looked up by the system title in their frames.
+
+    Usage:
+        key_store = KeyStore()
+        key_store.add('5341475905A1B2C3', encryption_key, authentication_key)
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R, key_store=key_store)
+    """
+
+    def __init__(self):
+        self._ciphers = {}
+
+    def add(self, system_title, encryption_key, authentication_key):
+        """
+        :param system_title: hex string or bytes
+        :param encryption_key: hex string or bytes
+        :param authentication_key: hex string or bytes
+        """
+        self._ciphers[_to_bytes(system_title)] = TelegramCipher(encryption_key, authentication_key)
+
+    def remove(self, system_title):
+        del self._ciphers[_to_bytes(system_title)]
+
+    def __contains__(self, system_title):
+        return _to_bytes(system_title) in self._ciphers
+
+    def __len__(self):
+        return len(self._ciphers)
+
+    def get_cipher(self, system_title):
+        """
+        :param bytes system_title:
+        :rtype: TelegramCipher
+        :raises KeyError: for meters without keys
+        """
+        return self._ciphers[_to_bytes(system_title)]
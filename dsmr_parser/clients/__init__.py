@@ -3,4 +3,6 @@ from dsmr_parser.clients.settings import SERIAL_SETTINGS_V2_2, \
 from dsmr_parser.clients.serial_ import SerialReader, AsyncSerialReader
 from dsmr_parser.clients.socket_ import SocketReader
 from dsmr_parser.clients.protocol import create_dsmr_protocol, \
-    create_dsmr_reader, create_tcp_dsmr_reader
+    create_dsmr_reader, create_tcp_dsmr_reader, create_file_dsmr_reader
+from dsmr_parser.clients.registry import AUTO_DETECT, register_dsmr_version, \
+    dsmr_versions, detect_dsmr_version
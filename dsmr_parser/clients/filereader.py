@@ -1,13 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import collections
+import gzip
 import logging
-import fileinput
-import tailer
+import lzma
+import os
+import stat
+import sys
 
+try:
+    import zstandard
+except ImportError:  # optional dependency: pip install dsmr-parser[zstd]
+    zstandard = None
+
+from dsmr_parser.clients.filetail import FileTail
 from dsmr_parser.clients.telegram_buffer import TelegramBuffer
 from dsmr_parser.exceptions import ParseError, InvalidChecksumError
-from dsmr_parser.parsers import TelegramParser
+from dsmr_parser.parsers import ParseCache, TelegramParser
 
 logger = logging.getLogger(__name__)
 
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_XZ = 'xz'
+COMPRESSION_ZSTD = 'zstd'
+
+_COMPRESSION_SUFFIXES = {
+    '.gz': COMPRESSION_GZIP,
+    '.xz': COMPRESSION_XZ,
+    '.lzma': COMPRESSION_XZ,
+    '.zst': COMPRESSION_ZSTD,
+}
+
+
+def _detect_compression(file):
+    """
+    Determine the compression of a capture file based on its suffix.
+    :rtype: str|None
+    """
+    for suffix, compression in _COMPRESSION_SUFFIXES.items():
+        if str(file).endswith(suffix):
+            return compression
+
+    return None
+
+
+def _open_capture(file, compression=None):
+    """
+    Open a, possibly compressed, capture file for binary streaming reads.
+
+    :param file: path of the capture file
+    :param str compression: one of the COMPRESSION_* constants or None for a plain file
+    :rtype: file object
+    """
+    if compression is None:
+        return open(file, "rb")
+    elif compression == COMPRESSION_GZIP:
+        return gzip.open(file, "rb")
+    elif compression == COMPRESSION_XZ:
+        return lzma.open(file, "rb")
+    elif compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Reading zstd compressed captures requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(file, "rb"), closefd=True)
+
+    raise ValueError("Unsupported compression: {}".format(compression))
+
+
+def _read_telegrams(file, compression, telegram_buffer, block_size):
+    """
+    Read the complete telegrams from a, possibly compressed, capture file.
+    :rtype: generator
+    """
+    with _open_capture(file, compression) as file_handle:
+        while True:
+            data = file_handle.read(block_size)
+
+            if not data:
+                break
+
+            # latin-1 never fails on a block boundary that splits a character
+            telegram_buffer.append(data.decode("latin1"))
+
+            yield from telegram_buffer.get_all()
+
 
 class FileReader(object):
     """
@@ -29,6 +104,10 @@ class FileReader(object):
             for telegram in file_reader.read_as_object():
                 print(telegram)
 
+     Captures compressed with gzip (.gz), xz (.xz) or zstd (.zst, requires the
+     optional 'zstandard' package) are decompressed while streaming. The
+     compression is derived from the file suffix unless given explicitly.
+
      The file can be created like:
         from dsmr_parser import telegram_specifications
         from dsmr_parser.clients import SerialReader, SERIAL_SETTINGS_V5
@@ -49,8 +128,12 @@ class FileReader(object):
                 f.close()
      """
 
-    def __init__(self, file, telegram_specification):
+    # Telegrams are located per block of (decompressed) data instead of per line.
+    BLOCK_SIZE = 256 * 1024
+
+    def __init__(self, file, telegram_specification, compression=None):
         self._file = file
+        self._compression = compression or _detect_compression(file)
         self.telegram_parser = TelegramParser(telegram_specification)
         self.telegram_buffer = TelegramBuffer()
         self.telegram_specification = telegram_specification
@@ -60,22 +143,201 @@ class FileReader(object):
         Read complete DSMR telegram's from a file and return a Telegram object.
         :rtype: generator
         """
-        with open(self._file, "rb") as file_handle:
-            while True:
-                data = file_handle.readline()
+        for telegram in _read_telegrams(self._file, self._compression, self.telegram_buffer, self.BLOCK_SIZE):
+            try:
+                yield self.telegram_parser.parse(telegram, source=self._file)
+            except InvalidChecksumError as e:
+                logger.info(str(e))
+            except ParseError as e:
+                logger.error('Failed to parse telegram: %s', e)
 
-                if not data:
-                    break
 
-                self.telegram_buffer.append(data.decode())
+def _parse_batch(telegram_parser, telegrams, source, cache):
+    """
+    Parse a batch of telegrams of a capture file. Module level so it can be
+    scheduled on a process pool as well.
+    :rtype: list
+    """
+    parsed = []
+
+    for telegram in telegrams:
+        try:
+            parsed.append(telegram_parser.parse(telegram, source=source, cache=cache))
+        except InvalidChecksumError as e:
+            logger.info(str(e))
+        except ParseError as e:
+            logger.error('Failed to parse telegram: %s', e)
+
+    return parsed
 
-                for telegram in self.telegram_buffer.get_all():
-                    try:
-                        yield self.telegram_parser.parse(telegram)
-                    except InvalidChecksumError as e:
-                        logger.info(str(e))
-                    except ParseError as e:
-                        logger.error('Failed to parse telegram: %s', e)
+
+class DirectoryReader(object):
+    """
+     Reads and parses all capture files found in a directory tree, spread over
+     a pool of workers. Yields (source, telegram) tuples where source is the
+     path of the file the telegram was read from.
+     Usage:
+        from concurrent.futures import ProcessPoolExecutor
+        from dsmr_parser import telegram_specifications
+        from dsmr_parser.clients.filereader import DirectoryReader
+
+        def select_specification(path):
+            if 'fluvius' in path.name:
+                return telegram_specifications.BELGIUM_FLUVIUS
+
+        if __name__== "__main__":
+
+            with ProcessPoolExecutor() as executor:
+                directory_reader = DirectoryReader(
+                    directory='/data/smartmeter/',
+                    telegram_specification=telegram_specifications.V5,
+                    pattern='**/*.txt.gz',
+                    specification_selector=select_specification,
+                    executor=executor
+                )
+
+                for source, telegram in directory_reader.read_as_object():
+                    print(source, telegram)
+
+     The files are read one after the other, their telegrams are parsed by the
+     workers in batches of batch_size. Without an executor a thread pool is
+     used. At most max_in_flight batches are scheduled at the same time, so at
+     most max_in_flight * batch_size telegrams are held in memory, however
+     large the files. With ordered=True telegrams are yielded in path order,
+     otherwise batches of different files in the order they complete.
+     Telegrams of a single file are always yielded in the order they were read.
+     """
+
+    # Telegrams are located per block of (decompressed) data instead of per line.
+    BLOCK_SIZE = 256 * 1024
+
+    def __init__(self, directory, telegram_specification, pattern='**/*', specification_selector=None,
+                 executor=None, max_in_flight=8, ordered=False, batch_size=1000):
+        """
+        :param directory: root of the directory tree to read
+        :param dict telegram_specification: specification used when the selector has no opinion
+        :param str pattern: glob pattern, relative to the directory, of the files to read
+        :param specification_selector: optional callable returning the specification for a
+            given pathlib.Path, or None to use telegram_specification
+        :param executor: concurrent.futures executor to read the files with
+        :param int max_in_flight: maximum number of batches scheduled at the same time
+        :param bool ordered: yield files in path order instead of in completion order
+        :param int batch_size: number of telegrams parsed per batch
+        """
+        self._directory = Path(directory)
+        self._pattern = pattern
+        self._specification_selector = specification_selector
+        self._executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+        self.ordered = ordered
+        self.batch_size = max(1, batch_size)
+        self.telegram_specification = telegram_specification
+
+    def _find_files(self):
+        return sorted(path for path in self._directory.glob(self._pattern) if path.is_file())
+
+    def _select_specification(self, path):
+        specification = None
+
+        if self._specification_selector:
+            specification = self._specification_selector(path)
+
+        return specification or self.telegram_specification
+
+    def _wait_completed(self, in_flight):
+        """
+        Wait until at least one scheduled batch is parsed.
+        :return: the parsed batches that can be yielded, those scheduled
+            first of their file
+        :rtype: list
+        """
+        if self.ordered:
+            return [in_flight.popleft()]
+
+        wait(in_flight, return_when=FIRST_COMPLETED)
+        completed = []
+        waiting_files = set()
+
+        for future in list(in_flight):
+            if future.done() and future.source not in waiting_files:
+                in_flight.remove(future)
+                completed.append(future)
+            else:
+                waiting_files.add(future.source)
+
+        return completed
+
+    def _batches(self, path, compression=None):
+        """
+        Read the telegrams of a capture file in batches of batch_size.
+        :rtype: generator
+        """
+        batch = []
+
+        for telegram in _read_telegrams(path, compression or _detect_compression(path), TelegramBuffer(),
+                                        self.BLOCK_SIZE):
+            batch.append(telegram)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def _results(self, futures):
+        for future in futures:
+            try:
+                telegrams = future.result()
+            except Exception as e:
+                logger.error('Failed to parse telegrams of %s: %s', future.source, e)
+                continue
+
+            for telegram in telegrams:
+                yield str(future.source), telegram
+
+    def read_as_object(self):
+        """
+        Read all capture files and return (source, Telegram object) tuples.
+        :rtype: generator
+        """
+        executor = self._executor or ThreadPoolExecutor()
+        in_flight = collections.deque()
+        # one parser per specification, the caches are kept per file
+        telegram_parsers = {}
+
+        try:
+            for path in self._find_files():
+                specification = self._select_specification(path)
+
+                if specification is None:
+                    logger.warning('No telegram specification for %s, skipping', path)
+                    continue
+
+                if id(specification) not in telegram_parsers:
+                    telegram_parsers[id(specification)] = TelegramParser(specification)
+                telegram_parser = telegram_parsers[id(specification)]
+                cache = ParseCache(str(path))
+
+                try:
+                    for batch in self._batches(path):
+                        future = executor.submit(_parse_batch, telegram_parser, batch, str(path), cache)
+                        future.source = path
+                        in_flight.append(future)
+
+                        while len(in_flight) >= self.max_in_flight:
+                            yield from self._results(self._wait_completed(in_flight))
+                except Exception as e:
+                    # Like a truncated or corrupt compressed file, the telegrams read before are still parsed.
+                    logger.error('Failed to read %s: %s', path, e)
+
+            while in_flight:
+                yield from self._results(self._wait_completed(in_flight))
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+            if executor is not self._executor:
+                executor.shutdown()
 
 
 class FileInputReader(object):
@@ -88,8 +350,7 @@ class FileInputReader(object):
 
         if __name__== "__main__":
 
-            fileinput_reader = FileReader(
-                file = infile,
+            fileinput_reader = FileInputReader(
                 telegram_specification = telegram_specifications.V4
                 )
 
@@ -99,28 +360,71 @@ class FileInputReader(object):
     Command line:
         tail -f /data/smartmeter/readings.txt | python3 syphon_smartmeter_readings_stdin.py
 
+     Like the fileinput module the files default to the command line arguments,
+     or stdin ('-') when there are none. Reading ends once all inputs are
+     exhausted. Stdin is read with blocking reads that return as soon as data
+     arrives, so a pipe is followed until its writer closes it. With
+     follow=True the last input is tailed (see FileTail) when it is an
+     uncompressed regular file, including stdin redirected from a file.
      """
 
-    def __init__(self, telegram_specification):
+    # Telegrams are located per block of data instead of per line.
+    BLOCK_SIZE = 256 * 1024
+    STDIN = '-'
+
+    def __init__(self, telegram_specification, files=None, follow=False):
+        self._files = files
+        self._follow = follow
         self.telegram_parser = TelegramParser(telegram_specification)
         self.telegram_buffer = TelegramBuffer()
         self.telegram_specification = telegram_specification
 
+    def _read_blocks(self, file, follow):
+        """
+        Read a single input in blocks until it is exhausted, optionally continuing to follow it.
+        :rtype: generator
+        """
+        if file == self.STDIN:
+            file_handle = sys.stdin.buffer
+            compression = None
+        else:
+            compression = _detect_compression(file)
+            file_handle = _open_capture(file, compression)
+
+        try:
+            # read1() returns whatever is available instead of waiting for a full block on pipes.
+            read = getattr(file_handle, 'read1', file_handle.read)
+
+            while True:
+                data = read(self.BLOCK_SIZE)
+
+                if not data:
+                    break
+
+                yield data
+
+            if follow and compression is None and stat.S_ISREG(os.fstat(file_handle.fileno()).st_mode):
+                path = os.path.realpath('/dev/fd/{}'.format(file_handle.fileno())) if file == self.STDIN else file
+                yield from FileTail(path, position=file_handle.tell()).follow()
+        finally:
+            if file_handle is not sys.stdin.buffer:
+                file_handle.close()
+
     def read_as_object(self):
         """
         Read complete DSMR telegram's from stdin of filearguments specified on teh command line
         and return a Telegram object.
         :rtype: generator
         """
-        with fileinput.input(mode='rb') as file_handle:
-            while True:
-                data = file_handle.readline()
-                str = data.decode()
-                self.telegram_buffer.append(str)
+        files = self._files if self._files is not None else (sys.argv[1:] or [self.STDIN])
+
+        for index, file in enumerate(files):
+            for data in self._read_blocks(file, self._follow and index == len(files) - 1):
+                self.telegram_buffer.append(data.decode("latin1"))
 
                 for telegram in self.telegram_buffer.get_all():
                     try:
-                        yield self.telegram_parser.parse(telegram)
+                        yield self.telegram_parser.parse(telegram, source=file)
                     except InvalidChecksumError as e:
                         logger.warning(str(e))
                     except ParseError as e:
@@ -146,10 +450,14 @@ class FileTailReader(object):
 
             for telegram in filetail_reader.read_as_object():
                 print(telegram)
+
+      New data is picked up through inotify on Linux, with a polling fallback
+      on other platforms. Rotation and truncation of the file are followed.
       """
 
-    def __init__(self, file, telegram_specification):
+    def __init__(self, file, telegram_specification, poll_interval=1.0):
         self._file = file
+        self._poll_interval = poll_interval
         self.telegram_parser = TelegramParser(telegram_specification)
         self.telegram_buffer = TelegramBuffer()
         self.telegram_specification = telegram_specification
@@ -159,15 +467,13 @@ class FileTailReader(object):
         Read complete DSMR telegram's from a files tail and return a Telegram object.
         :rtype: generator
         """
-        with open(self._file, "rb") as file_handle:
-            for data in tailer.follow(file_handle):
-                str = data.decode()
-                self.telegram_buffer.append(str)
-
-                for telegram in self.telegram_buffer.get_all():
-                    try:
-                        yield self.telegram_parser.parse(telegram)
-                    except InvalidChecksumError as e:
-                        logger.warning(str(e))
-                    except ParseError as e:
-                        logger.error('Failed to parse telegram: %s', e)
+        for data in FileTail(self._file, poll_interval=self._poll_interval).follow():
+            self.telegram_buffer.append(data.decode("latin1"))
+
+            for telegram in self.telegram_buffer.get_all():
+                try:
+                    yield self.telegram_parser.parse(telegram, source=self._file)
+                except InvalidChecksumError as e:
+                    logger.warning(str(e))
+                except ParseError as e:
+                    logger.error('Failed to parse telegram: %s', e)
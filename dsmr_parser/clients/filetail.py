@@ -0,0 +1,348 @@
+"""Follow files that are being appended to, waking up on inotify events where available."""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# See inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify(object):
+    """
+    Minimal ctypes binding to inotify, watching a single directory. The
+    directory is watched instead of the file itself so log rotation (the file
+    being moved away and recreated) is noticed as well.
+    """
+
+    def __init__(self, libc, directory):
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, 'inotify_add_watch failed for {}'.format(directory))
+
+    def read_names(self):
+        """
+        Consume all pending events.
+        :return: names of the directory entries the events were about
+        :rtype: set
+        """
+        names = set()
+
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                names.add(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _create_inotify(directory):
+    """
+    :return: an inotify watch on the directory or None when inotify is not available
+    :rtype: _Inotify|None
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        return _Inotify(libc, directory)
+    except (OSError, AttributeError) as e:
+        logger.info('inotify not available, falling back to polling: %s', e)
+        return None
+
+
+class FileTail(object):
+    """
+    Follows a file like 'tail -F' does, yielding all newly appended bytes in
+    one chunk each time the file changes. Rotation (the file being replaced)
+    and truncation are detected and reading continues at the start of the new
+    content.
+
+    On Linux changes are noticed through inotify, elsewhere (or when inotify
+    cannot be used) the file is polled every poll_interval seconds. With
+    inotify the poll_interval is only used as a safety net, for example for
+    network file systems that do not report changes.
+
+    Usage:
+        for data in FileTail('/data/smartmeter/readings.txt').follow():
+            print(data)
+
+        async for data in FileTail('/data/smartmeter/readings.txt').follow_async():
+            print(data)
+    """
+
+    def __init__(self, file, position=None, poll_interval=1.0):
+        """
+        :param file: path of the file to follow
+        :param int position: offset to start reading at, None starts at the current end of the file
+        :param float poll_interval: seconds between checks when no change is reported
+        """
+        self._file = os.path.abspath(file)
+        self._name = os.fsencode(os.path.basename(self._file))
+        self._position = position
+        self._handle = None
+        self._identity = None
+        self.poll_interval = poll_interval
+
+    def _open(self, position):
+        try:
+            handle = open(self._file, "rb")
+        except FileNotFoundError:
+            return False
+
+        status = os.fstat(handle.fileno())
+        self._handle = handle
+        self._identity = (status.st_dev, status.st_ino)
+
+        if position is None:
+            handle.seek(0, os.SEEK_END)
+        else:
+            handle.seek(position)
+
+        return True
+
+    def read_available(self):
+        """
+        Read everything that was appended since the previous call.
+        :rtype: bytes
+        """
+        if self._handle is None and not self._open(self._position):
+            return b''
+
+        data = self._handle.read()
+
+        try:
+            status = os.stat(self._file)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet, keep the old file open until it is.
+            return data
+
+        if (status.st_dev, status.st_ino) != self._identity:
+            logger.info('%s was replaced, continuing with the new file', self._file)
+            self._handle.close()
+            self._handle = None
+            if self._open(0):
+                data += self._handle.read()
+        elif status.st_size < self._handle.tell():
+            logger.info('%s was truncated, continuing at the start', self._file)
+            self._handle.seek(0)
+            data += self._handle.read()
+
+        return data
+
+    def close(self):
+        if self._handle is not None:
+            self._position = self._handle.tell()
+            self._handle.close()
+            self._handle = None
+
+    def _is_relevant(self, names):
+        return self._name in names
+
+    def follow(self):
+        """
+        Block until new data is available and yield it.
+        :rtype: generator
+        """
+        inotify = _create_inotify(os.path.dirname(self._file))
+
+        try:
+            while True:
+                data = self.read_available()
+
+                if data:
+                    yield data
+                elif inotify is None:
+                    time.sleep(self.poll_interval)
+                else:
+                    deadline = time.monotonic() + self.poll_interval
+                    timeout = self.poll_interval
+                    while timeout > 0:
+                        ready, _, _ = select.select([inotify.fd], [], [], timeout)
+                        if ready and self._is_relevant(inotify.read_names()):
+                            break
+                        timeout = deadline - time.monotonic()
+        finally:
+            if inotify is not None:
+                inotify.close()
+            self.close()
+
+    async def follow_async(self):
+        """
+        Asynchronously wait until new data is available and yield it. Many
+        files can be followed from a single event loop this way.
+        :rtype: async generator
+        """
+        loop = asyncio.get_running_loop()
+        inotify = _create_inotify(os.path.dirname(self._file))
+        changed = asyncio.Event()
+
+        if inotify is not None:
+            loop.add_reader(inotify.fd, changed.set)
+
+        try:
+            while True:
+                data = self.read_available()
+
+                if data:
+                    yield data
+                elif inotify is None:
+                    await asyncio.sleep(self.poll_interval)
+                else:
+                    deadline = loop.time() + self.poll_interval
+                    while loop.time() < deadline:
+                        try:
+                            await asyncio.wait_for(changed.wait(), deadline - loop.time())
+                        except asyncio.TimeoutError:
+                            break
+                        changed.clear()
+                        if self._is_relevant(inotify.read_names()):
+                            break
+        finally:
+            if inotify is not None:
+                loop.remove_reader(inotify.fd)
+                inotify.close()
+            self.close()
+
+
+class _FileTailTransport(asyncio.ReadTransport):
+    """
+    Read transport feeding the data of a (followed) regular file to a
+    protocol, for files that cannot be used with loop.connect_read_pipe().
+    """
+
+    def __init__(self, loop, file_tail, protocol, follow):
+        super().__init__(extra={'filename': file_tail._file})
+        self._loop = loop
+        self._tail = file_tail
+        self._protocol = protocol
+        self._follow = follow
+        self._reading = asyncio.Event()
+        self._reading.set()
+        self._task = None
+        self._closing = False
+
+    def _start(self):
+        self._protocol.connection_made(self)
+        self._task = self._loop.create_task(self._read())
+
+    async def _chunks(self):
+        if self._follow:
+            async for data in self._tail.follow_async():
+                yield data
+        else:
+            data = self._tail.read_available()
+            if data:
+                yield data
+
+    async def _read(self):
+        exc = None
+
+        try:
+            async for data in self._chunks():
+                await self._reading.wait()
+                self._protocol.data_received(data)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            exc = e
+        finally:
+            self._closing = True
+            self._tail.close()
+            self._protocol.connection_lost(exc)
+
+    def is_reading(self):
+        return self._reading.is_set()
+
+    def pause_reading(self):
+        self._reading.clear()
+
+    def resume_reading(self):
+        self._reading.set()
+
+    def is_closing(self):
+        return self._closing
+
+    def close(self):
+        if not self._closing:
+            self._closing = True
+            self._task.cancel()
+
+
+async def create_file_connection(loop, protocol_factory, file, follow=True, position=None, poll_interval=1.0):
+    """
+    Connect a protocol to a file, FIFO or pipe, the way loop.create_connection()
+    does for sockets.
+
+    Pipes, FIFOs and character devices (including stdin when it is not
+    redirected from a file) are read through loop.connect_read_pipe() and
+    close the connection when the writer goes away. Regular files are read
+    with FileTail: when following, new data is passed on as it is appended,
+    otherwise the file is read once and the connection is closed.
+
+    :param file: path of the file or a binary file object like sys.stdin.buffer
+    :param bool follow: keep passing on data appended to a regular file
+    :param int position: offset to start reading a regular file at, None starts at the
+        end when following and at the start otherwise
+    :param float poll_interval: see FileTail
+    :return: (transport, protocol)
+    """
+    if hasattr(file, 'fileno'):
+        fd = file.fileno()
+        # Resolves to the file stdin (or the given file object) is redirected from.
+        path = os.path.realpath('/dev/fd/{}'.format(fd))
+    else:
+        path = file
+        fd = os.open(file, os.O_RDONLY | os.O_NONBLOCK)
+
+    if not stat.S_ISREG(os.fstat(fd).st_mode):
+        pipe = file if hasattr(file, 'fileno') else os.fdopen(fd, 'rb', buffering=0)
+        return await loop.connect_read_pipe(protocol_factory, pipe)
+
+    if not hasattr(file, 'fileno'):
+        os.close(fd)
+
+    if position is None and not follow:
+        position = 0
+
+    protocol = protocol_factory()
+    transport = _FileTailTransport(loop, FileTail(path, position, poll_interval), protocol, follow)
+    transport._start()
+
+    return transport, protocol
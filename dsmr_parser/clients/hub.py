@@ -0,0 +1,218 @@
+"""Asyncio hub managing many DSMR serial and TCP connections on a single event loop."""
+
+from functools import partial
+from operator import itemgetter
+import asyncio
+import logging
+import random
+
+from serial_asyncio_fast import create_serial_connection
+
+from dsmr_parser.clients.protocol import DSMRProtocol
+from dsmr_parser.clients.stats import ConnectionStats
+from dsmr_parser.clients.registry import get_dsmr_version_settings, get_telegram_parser
+from dsmr_parser.clients.telegram_queue import TelegramQueue, OVERFLOW_DROP_NEWEST
+
+logger = logging.getLogger(__name__)
+
+
+class _Source(object):
+    """Connection state of a single meter managed by the hub."""
+
+    def __init__(self, source_id, dsmr_version, connect, stats):
+        self.source_id = source_id
+        self.dsmr_version = dsmr_version
+        self.connect = connect
+        # shared by the successive connections of the source
+        self.stats = stats
+        self.task = None
+        self.transport = None
+        self.protocol = None
+        self.connects = 0
+
+
+class DSMRHub(object):
+    """
+    Manages the connections to many meters on one event loop. Every source
+    is (re)connected independently with an exponential, jittered backoff
+    and telegrams are delivered tagged with the id of the source they came
+    from. Telegram parsers are shared between all sources of the same DSMR
+    version. TCP sources can use the 'auto' version to detect the version
+    from their first telegram.
+
+    Telegrams are passed to telegram_callback(source_id, telegram) when
+    given, otherwise (source_id, telegram) tuples are put on the bounded
+    hub.queue. What happens when the queue is full is determined by the
+    overflow policy (see TelegramQueue): with the block policy the sources
+    stop reading until there is room, the other policies drop telegrams and
+    count them in hub.dropped.
+
+    Usage:
+        async def main():
+            hub = DSMRHub(queue_size=1000)
+            hub.add_tcp_source('meter-1', '192.168.1.10', 2001, '5')
+            hub.add_serial_source('meter-2', '/dev/ttyUSB0', '4')
+
+            async with hub:
+                while True:
+                    source_id, telegram = await hub.queue.get()
+                    print(source_id, telegram)
+    """
+
+    def __init__(self, telegram_callback=None, queue_size=1000, overflow=OVERFLOW_DROP_NEWEST, loop=None,
+                 min_backoff=1.0, max_backoff=60.0, connect_timeout=10.0, parse_executor=None):
+        """
+        :param telegram_callback: called with (source_id, telegram) for each telegram
+        :param int queue_size: maximum size of hub.queue, used when no callback is given
+        :param str overflow: overflow policy of hub.queue, one of the telegram_queue.OVERFLOW_* constants
+        :param float min_backoff: seconds to wait before the first reconnect attempt
+        :param float max_backoff: maximum seconds to wait between reconnect attempts
+        :param float connect_timeout: seconds after which a connection attempt is given up
+        :param parse_executor: concurrent.futures executor to parse telegrams in, see DSMRProtocol
+        """
+        self.loop = loop
+        self.telegram_callback = telegram_callback
+        self.queue = None if telegram_callback else TelegramQueue(queue_size, overflow, key=itemgetter(0))
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.parse_executor = parse_executor
+        self._sources = {}
+        self._running = False
+        self._stopped = asyncio.Event()
+
+    @property
+    def dropped(self):
+        return self.queue.dropped if self.queue is not None else 0
+
+    @property
+    def sources(self):
+        return list(self._sources)
+
+    def is_connected(self, source_id):
+        source = self._sources[source_id]
+        return source.transport is not None and not source.transport.is_closing()
+
+    def get_stats(self, source_id):
+        """
+        :return: the statistics of all connections of a source so far
+        :rtype: ConnectionStats
+        """
+        return self._sources[source_id].stats
+
+    def _create_protocol_factory(self, source_id, dsmr_version, stats, protocol=DSMRProtocol, **kwargs):
+        telegram_parser = get_telegram_parser(dsmr_version)
+        telegram_callback = partial(self.telegram_callback, source_id) if self.telegram_callback else None
+
+        def protocol_factory():
+            return protocol(self.loop, telegram_parser, telegram_callback=telegram_callback,
+                            telegram_queue=self.queue, source_id=source_id,
+                            parse_executor=self.parse_executor, stats=stats, **kwargs)
+
+        return protocol_factory
+
+    def _add_source(self, source_id, dsmr_version, connect, stats):
+        if source_id in self._sources:
+            raise ValueError("Source already added: {}".format(source_id))
+
+        source = _Source(source_id, dsmr_version, connect, stats)
+        self._sources[source_id] = source
+
+        if self._running:
+            self._start_source(source)
+
+    def add_tcp_source(self, source_id, host, port, dsmr_version, keep_alive_interval=None):
+        """Add a meter reachable over TCP, for example through ser2net."""
+        stats = ConnectionStats(source_id)
+        protocol_factory = self._create_protocol_factory(source_id, dsmr_version, stats,
+                                                         keep_alive_interval=keep_alive_interval)
+
+        def connect():
+            return self.loop.create_connection(protocol_factory, host, port)
+
+        self._add_source(source_id, dsmr_version, connect, stats)
+
+    def add_serial_source(self, source_id, port, dsmr_version):
+        """Add a meter connected to a serial port."""
+        _, serial_settings = get_dsmr_version_settings(dsmr_version)
+        if serial_settings is None:
+            raise ValueError("The DSMR version of a serial port can not be detected")
+        serial_settings['url'] = port
+        stats = ConnectionStats(source_id)
+        protocol_factory = self._create_protocol_factory(source_id, dsmr_version, stats)
+
+        def connect():
+            return create_serial_connection(self.loop, protocol_factory, **serial_settings)
+
+        self._add_source(source_id, dsmr_version, connect, stats)
+
+    async def remove_source(self, source_id):
+        """Disconnect a source and stop reconnecting it."""
+        source = self._sources.pop(source_id)
+        await self._stop_source(source)
+
+    def _next_backoff(self, backoff):
+        return min(backoff * 2, self.max_backoff)
+
+    async def _run_source(self, source):
+        backoff = self.min_backoff
+
+        while True:
+            try:
+                source.transport, source.protocol = await asyncio.wait_for(source.connect(), self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                logger.warning('%s: connection failed: %s', source.source_id, e)
+            else:
+                source.connects += 1
+                logger.info('%s: connected', source.source_id)
+                backoff = self.min_backoff
+                await source.protocol.wait_closed()
+                source.transport = None
+                logger.info('%s: disconnected', source.source_id)
+
+            # Jitter avoids all sources of a failed bridge reconnecting at the same moment.
+            await asyncio.sleep(backoff * random.uniform(0.5, 1.0))
+            backoff = self._next_backoff(backoff)
+
+    def _start_source(self, source):
+        source.task = self.loop.create_task(self._run_source(source))
+
+    async def _stop_source(self, source):
+        if source.task is not None:
+            source.task.cancel()
+            try:
+                await source.task
+            except asyncio.CancelledError:
+                pass
+            source.task = None
+
+        if source.transport is not None:
+            source.transport.close()
+            source.transport = None
+
+    def start(self):
+        """Connect all sources. Sources added afterwards are connected right away."""
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+
+        self._running = True
+        self._stopped.clear()
+        for source in self._sources.values():
+            self._start_source(source)
+
+    async def stop(self):
+        """Disconnect all sources."""
+        self._running = False
+        await asyncio.gather(*(self._stop_source(source) for source in self._sources.values()))
+        self._stopped.set()
+
+    async def wait_stopped(self):
+        """Wait until the hub is stopped."""
+        await self._stopped.wait()
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
@@ -0,0 +1,171 @@
+"""
+Connection statistics and parse timings in the Prometheus text exposition
+format, served by a small asyncio HTTP endpoint.
+
+The metrics are rendered from the counters kept by ConnectionStats (and
+optionally an InstrumentationCollector) at scrape time, so reading meters is
+not slowed down by them.
+
+    server = MetricsServer(9100)
+    await server.start()
+    # curl http://localhost:9100/metrics
+"""
+
+import asyncio
+import logging
+
+from dsmr_parser.clients import stats as connection_stats
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (metric name, ConnectionStats attribute, help)
+_COUNTERS = (
+    ('dsmr_bytes_received_total', 'bytes_received', 'Bytes received.'),
+    ('dsmr_bytes_discarded_total', 'bytes_discarded', 'Received bytes that were not part of a telegram.'),
+    ('dsmr_telegrams_framed_total', 'telegrams_framed', 'Telegrams framed from the received data.'),
+    ('dsmr_telegrams_parsed_total', 'telegrams_parsed', 'Telegrams parsed successfully.'),
+    ('dsmr_checksum_failures_total', 'checksum_failures', 'Telegrams with an invalid checksum.'),
+    ('dsmr_parse_failures_total', 'parse_failures', 'Telegrams that could not be parsed.'),
+    ('dsmr_loop_seconds_total', 'loop_time', 'Seconds spent handling received data on the event loop.'),
+)
+
+_HISTOGRAMS = (
+    ('dsmr_parse_latency_seconds', 'parse_latency', 'Seconds spent parsing a telegram.'),
+    ('dsmr_callback_latency_seconds', 'callback_latency', 'Seconds spent in the telegram callback.'),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    return ','.join('{}="{}"'.format(name, _escape(value)) for name, value in labels)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, labels, buckets, total, count):
+    """
+    :param buckets: (upper bound, count) pairs, the last one being the overflow bucket
+    """
+    lines = []
+    cumulative = 0
+
+    for bound, bucket_count in buckets:
+        cumulative += bucket_count
+        bucket_labels = _format_labels(labels + (('le', _format_value(bound)),))
+        lines.append('{}_bucket{{{}}} {}'.format(name, bucket_labels, cumulative))
+
+    label_text = '{{{}}}'.format(_format_labels(labels)) if labels else ''
+    lines.append('{}_sum{} {}'.format(name, label_text, _format_value(total)))
+    lines.append('{}_count{} {}'.format(name, label_text, count))
+
+    return lines
+
+
+def render_metrics(registry=None, instrumentation=None):
+    """
+    :param StatsRegistry registry: connections to render, by default all connections
+    :param InstrumentationCollector instrumentation: parse timings to render as well
+    :return: the metrics in Prometheus text format
+    :rtype: str
+    """
+    if registry is None:
+        registry = connection_stats.registry
+
+    connections = registry.named()
+    lines = []
+
+    for name, attribute, description in _COUNTERS:
+        lines.append('# HELP {} {}'.format(name, description))
+        lines.append('# TYPE {} counter'.format(name))
+        for label, stats in connections:
+            lines.append('{}{{connection="{}"}} {}'.format(
+                name, _escape(label), _format_value(getattr(stats, attribute))))
+
+    for name, attribute, description in _HISTOGRAMS:
+        lines.append('# HELP {} {}'.format(name, description))
+        lines.append('# TYPE {} histogram'.format(name))
+        for label, stats in connections:
+            histogram = getattr(stats, attribute)
+            buckets = zip(histogram.buckets + (float('inf'),), histogram.counts)
+            lines.extend(_histogram_lines(name, (('connection', label),), buckets, histogram.sum,
+                                          histogram.count))
+
+    if instrumentation is not None:
+        lines.append('# HELP dsmr_parse_stage_seconds Seconds spent per stage of parsing a telegram.')
+        lines.append('# TYPE dsmr_parse_stage_seconds histogram')
+        # The report is a consistent copy, the parsers may be running in other threads.
+        for stage, histogram in sorted(instrumentation.report()['stages'].items()):
+            lines.extend(_histogram_lines('dsmr_parse_stage_seconds', (('stage', stage),),
+                                          histogram['buckets'].items(), histogram['sum'], histogram['count']))
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer(object):
+    """
+    Serves the metrics at /metrics over HTTP on the running event loop.
+    Only plain GET requests are supported, which is all Prometheus needs.
+    """
+
+    def __init__(self, port, host='0.0.0.0', registry=None, instrumentation=None):
+        """
+        :param int port: port to listen on, 0 picks a free port
+        :param str host: address to listen on
+        :param StatsRegistry registry: see render_metrics()
+        :param InstrumentationCollector instrumentation: see render_metrics()
+        """
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.instrumentation = instrumentation
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info('serving metrics on port %s', self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Skip the headers, up to the empty line.
+            while (await reader.readline()).strip():
+                pass
+
+            parts = request_line.decode('latin1').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                status, body = '405 Method Not Allowed', b''
+            elif parts[1].split('?')[0] != '/metrics':
+                status, body = '404 Not Found', b''
+            else:
+                status, body = '200 OK', render_metrics(self.registry, self.instrumentation).encode('utf-8')
+
+            writer.write('HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n'.format(
+                status, CONTENT_TYPE, len(body)).encode('latin1') + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.debug('metrics request failed: %s', e)
+        finally:
+            writer.close()
@@ -2,16 +2,21 @@
 
 from functools import partial
 import asyncio
+import collections
+import itertools
 import logging
+import time
 
 from serial_asyncio_fast import create_serial_connection
 
-from dsmr_parser import telegram_specifications
+from dsmr_parser import error_reporting
+from dsmr_parser.clients.filetail import create_file_connection
+from dsmr_parser.clients.stats import ConnectionStats
+from dsmr_parser.clients.registry import get_dsmr_version_settings, get_telegram_parser, detect_dsmr_version
 from dsmr_parser.clients.telegram_buffer import TelegramBuffer
+from dsmr_parser.clients.telegram_queue import TelegramQueue
 from dsmr_parser.exceptions import ParseError, InvalidChecksumError
-from dsmr_parser.parsers import TelegramParser
-from dsmr_parser.clients.settings import SERIAL_SETTINGS_V2_2, \
-    SERIAL_SETTINGS_V4, SERIAL_SETTINGS_V5
+from dsmr_parser.parsers import ParseCache
 
 
 def create_dsmr_protocol(dsmr_version, telegram_callback, loop=None, **kwargs):
@@ -21,46 +26,11 @@ def create_dsmr_protocol(dsmr_version, telegram_callback, loop=None, **kwargs):
     return protocol
 
 
-# pylama noqa - because of "complex" (too long) if-elif-else.
-# Match - case might be a solution but it is not available in <3.10
-def _create_dsmr_protocol(dsmr_version, telegram_callback, protocol, loop=None, **kwargs):  # noqa
+def _create_dsmr_protocol(dsmr_version, telegram_callback, protocol, loop=None, **kwargs):
     """Creates a DSMR asyncio protocol."""
+    _, serial_settings = get_dsmr_version_settings(dsmr_version)
 
-    if dsmr_version == '2.2':
-        specification = telegram_specifications.V2_2
-        serial_settings = SERIAL_SETTINGS_V2_2
-    elif dsmr_version == '4':
-        specification = telegram_specifications.V4
-        serial_settings = SERIAL_SETTINGS_V4
-    elif dsmr_version == '4+':
-        specification = telegram_specifications.V5
-        serial_settings = SERIAL_SETTINGS_V4
-    elif dsmr_version == '5':
-        specification = telegram_specifications.V5
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == '5B':
-        specification = telegram_specifications.BELGIUM_FLUVIUS
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == "5L":
-        specification = telegram_specifications.LUXEMBOURG_SMARTY
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == "5S":
-        specification = telegram_specifications.SWEDEN
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == "Q3D":
-        specification = telegram_specifications.Q3D
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == 'ISKRA_IE':
-        specification = telegram_specifications.ISKRA_IE
-        serial_settings = SERIAL_SETTINGS_V5
-    elif dsmr_version == '5EONHU':
-        specification = telegram_specifications.EON_HUNGARY
-        serial_settings = SERIAL_SETTINGS_V5
-    else:
-        raise NotImplementedError("No telegram parser found for version: %s",
-                                  dsmr_version)
-
-    protocol = partial(protocol, loop, TelegramParser(specification),
+    protocol = partial(protocol, loop, get_telegram_parser(dsmr_version),
                        telegram_callback=telegram_callback, **kwargs)
 
     return protocol, serial_settings
@@ -70,6 +40,8 @@ def create_dsmr_reader(port, dsmr_version, telegram_callback, loop=None):
     """Creates a DSMR asyncio protocol coroutine using serial port."""
     protocol, serial_settings = create_dsmr_protocol(
         dsmr_version, telegram_callback, loop=None)
+    if serial_settings is None:
+        raise ValueError("The DSMR version of a serial port can not be detected")
     serial_settings['url'] = port
 
     conn = create_serial_connection(loop, protocol, **serial_settings)
@@ -89,20 +61,128 @@ def create_tcp_dsmr_reader(host, port, dsmr_version,
     return conn
 
 
+def create_file_dsmr_reader(file, dsmr_version, telegram_callback, loop=None,
+                            follow=True, position=None):
+    """
+    Creates a DSMR asyncio protocol coroutine reading a file, FIFO or pipe
+    (like sys.stdin.buffer). See create_file_connection() for the options.
+    """
+    if not loop:
+        loop = asyncio.get_event_loop()
+    protocol, _ = create_dsmr_protocol(
+        dsmr_version, telegram_callback, loop=loop)
+    conn = create_file_connection(loop, protocol, file,
+                                  follow=follow, position=position)
+    return conn
+
+
+# numbers connections that have nothing else to name them by
+_connection_ids = itertools.count(1)
+
+
+def _connection_name(transport):
+    """
+    Name the connection of a transport for its stats: the address of the
+    peer, the serial port or file read, or a unique number otherwise.
+
+    :rtype: str
+    """
+    peername = transport.get_extra_info('peername')
+    if isinstance(peername, tuple) and len(peername) >= 2:
+        host, port = peername[:2]
+        return '[{}]:{}'.format(host, port) if ':' in str(host) else '{}:{}'.format(host, port)
+    if peername:
+        return str(peername)
+
+    serial = transport.get_extra_info('serial')
+    if getattr(serial, 'port', None):
+        return serial.port
+
+    filename = transport.get_extra_info('filename')
+    if filename:
+        return str(filename)
+
+    return 'connection-{}'.format(next(_connection_ids))
+
+
+def _timed_parse(telegram_parser, telegram, source, cache):
+    """Parse a telegram in an executor, returning the parsed telegram and the seconds it took."""
+    start = time.perf_counter()
+    return telegram_parser.parse(telegram, source=source, cache=cache), time.perf_counter() - start
+
+
 class DSMRProtocol(asyncio.Protocol):
-    """Assemble and handle incoming data into complete DSM telegrams."""
+    """
+    Assemble and handle incoming data into complete DSM telegrams.
+
+    Parsed telegrams are passed to telegram_callback and/or put on
+    telegram_queue (see TelegramQueue for the overflow policies). When
+    source_id is given, (source_id, telegram) tuples are queued instead of
+    bare telegrams. When the queue is full and waits for room (the block
+    policy), reading from the transport is paused until the telegrams fit.
+
+    Without a callback or queue a bounded queue is created, so the queued
+    telegrams can be consumed with 'async for' until the connection closes:
+
+        transport, protocol = await create_tcp_dsmr_reader(host, port, '5', None)
+        async for telegram in protocol:
+            await store(telegram)
+
+    With a parse_executor (a concurrent.futures executor) telegrams are
+    parsed off the event loop, so slow parsing (like decrypting) does not
+    delay the I/O of other connections. Telegrams are still delivered in the
+    order they were received. A ThreadPoolExecutor is usually sufficient, a
+    ProcessPoolExecutor avoids the GIL at the cost of pickling the parser
+    with every telegram.
+
+    Counters and latencies of the connection are kept in protocol.stats (see
+    ConnectionStats), which can be shared by the successive connections to
+    the same meter. Telegrams that fail to parse are reported to the
+    error_reporter (see ErrorAggregator) instead of being logged one by one.
+
+    With a differ (a TelegramDiffer) the changes since the previous telegram
+    are delivered as TelegramChanges instead of the telegrams, telegrams
+    without changes are not delivered at all.
+
+    Without telegram_parser (the 'auto' DSMR version) the version is detected
+    from the first telegram and the parser for it is used for the rest of the
+    connection.
+    """
+
+    # Size of the queue created for async iteration.
+    ITERATOR_QUEUE_SIZE = 100
 
     transport = None
     telegram_callback = None
+    telegram_queue = None
 
     def __init__(self, loop, telegram_parser,
-                 telegram_callback=None, keep_alive_interval=None):
+                 telegram_callback=None, keep_alive_interval=None,
+                 telegram_queue=None, source_id=None, parse_executor=None, stats=None, error_reporter=None,
+                 differ=None):
         """Initialize class."""
         self.loop = loop
         self.log = logging.getLogger(__name__)
         self.telegram_parser = telegram_parser
+        # layouts and lines of this meter, the parser may be shared with other connections
+        self.parse_cache = ParseCache()
         # callback to call on complete telegram
         self.telegram_callback = telegram_callback
+        # queue to put complete telegrams on
+        if telegram_callback is None and telegram_queue is None:
+            telegram_queue = TelegramQueue(self.ITERATOR_QUEUE_SIZE)
+        self.telegram_queue = telegram_queue
+        self.source_id = source_id
+        # telegrams waiting for room in the queue while reading is paused
+        self._backlog = collections.deque()
+        # parse futures in the order the telegrams were received
+        self.parse_executor = parse_executor
+        self._parsing = collections.deque()
+        self._connection_lost = False
+        self.stats = stats if stats is not None else ConnectionStats(source_id)
+        self.error_reporter = error_reporter if error_reporter is not None else error_reporting.aggregator
+        # delivers the changes since the previous telegram instead, see TelegramDiffer
+        self.differ = differ
         # buffer to keep incomplete incoming data
         self.telegram_buffer = TelegramBuffer()
         # keep a lock until the connection is closed
@@ -114,26 +194,34 @@ class DSMRProtocol(asyncio.Protocol):
         """Just logging for now."""
         self.transport = transport
         self.log.debug('connected')
+        if self.stats.name is None:
+            self.stats.name = _connection_name(transport)
         self._active = False
         if self.loop and self._keep_alive_interval:
             self.loop.call_later(self._keep_alive_interval, self.keep_alive)
 
     def data_received(self, data):
         """Add incoming data to buffer."""
+        start = time.perf_counter()
+        self._active = True
+        self.stats.bytes_received += len(data)
+        self._handle_data(data)
+        self.stats.loop_time += time.perf_counter() - start
 
+    def _handle_data(self, data):
+        """Frame the received data into telegrams and handle them."""
         # accept latin-1 (8-bit) on the line, to allow for non-ascii transport or padding
         data = data.decode("latin1")
-        self._active = True
         self.log.debug('received data: %s', data)
-        self.telegram_buffer.append(data)
 
-        for telegram in self.telegram_buffer.get_all():
+        for telegram in self.stats.frame(data, self.telegram_buffer):
             # ensure actual telegram is ascii (7-bit) only (ISO 646:1991 IRV required in section 5.5 of IEC 62056-21)
             telegram = telegram.encode("latin1").decode("ascii")
             self.handle_telegram(telegram)
 
     def keep_alive(self):
-        if self._active:
+        # Reading is paused on purpose while waiting for room in the queue.
+        if self._active or self._backlog:
             self.log.debug('keep-alive checked')
             self._active = False
             if self.loop:
@@ -149,21 +237,124 @@ class DSMRProtocol(asyncio.Protocol):
             self.log.exception('disconnected due to exception', exc_info=exc)
         else:
             self.log.info('disconnected because of close/abort.')
-        self._closed.set()
+        self._connection_lost = True
+        # Telegrams still being parsed are delivered before closing.
+        if not self._parsing:
+            self._closed.set()
 
     def handle_telegram(self, telegram):
         """Send off parsed telegram to handling callback."""
         self.log.debug('got telegram: %s', telegram)
 
+        if self.telegram_parser is None:
+            dsmr_version = detect_dsmr_version(telegram)
+            self.log.info('detected DSMR version %s', dsmr_version)
+            self.telegram_parser = get_telegram_parser(dsmr_version)
+
+        if self.parse_executor is not None:
+            loop = self.loop or asyncio.get_event_loop()
+            future = loop.run_in_executor(
+                self.parse_executor, _timed_parse, self.telegram_parser, telegram, self.stats.name, self.parse_cache)
+            future.add_done_callback(self._parsed)
+            self._parsing.append(future)
+            return
+
         try:
-            parsed_telegram = self.telegram_parser.parse(telegram)
-        except InvalidChecksumError as e:
-            self.log.info(str(e))
-        except ParseError:
-            self.log.exception("failed to parse telegram")
+            parsed_telegram = self.stats.parse(self.telegram_parser, telegram, self.parse_cache)
+        except ParseError as e:
+            self.error_reporter.report(e, source=self.stats.name)
         else:
-            self.telegram_callback(parsed_telegram)
+            self._deliver(parsed_telegram)
+
+    def _parsed(self, _):
+        """Deliver the telegrams parsed so far, keeping the order in which they were received."""
+        start = time.perf_counter()
+
+        try:
+            while self._parsing and self._parsing[0].done():
+                future = self._parsing.popleft()
+
+                if future.cancelled():
+                    continue
+
+                try:
+                    parsed_telegram, parse_time = future.result()
+                except InvalidChecksumError as e:
+                    self.stats.checksum_failures += 1
+                    self.error_reporter.report(e, source=self.stats.name)
+                except Exception as e:
+                    # Like a DecryptionError, or failing to pickle for a process pool. Raising here would
+                    # leave the telegrams parsed after it undelivered.
+                    self.stats.parse_failures += 1
+                    self.error_reporter.report(e, source=self.stats.name)
+                else:
+                    self.stats.parsed(parse_time)
+                    self._deliver(parsed_telegram)
+        finally:
+            self.stats.loop_time += time.perf_counter() - start
+
+            if self._connection_lost and not self._parsing:
+                self._closed.set()
+
+    def _deliver(self, telegram):
+        if self.differ is not None:
+            telegram = self.differ.diff(telegram, self.stats.name)
+            if not telegram:
+                return
+
+        if self.telegram_callback:
+            start = time.perf_counter()
+            self.telegram_callback(telegram)
+            self.stats.callback_latency.observe(time.perf_counter() - start)
+
+        if self.telegram_queue is None:
+            return
+
+        item = telegram if self.source_id is None else (self.source_id, telegram)
+
+        if self._backlog:
+            self._backlog.append(item)
+            return
+
+        try:
+            self.telegram_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Only raised when the queue waits for room: apply backpressure.
+            self._backlog.append(item)
+            self.transport.pause_reading()
+            asyncio.ensure_future(self._drain_backlog())
+
+    async def _drain_backlog(self):
+        while self._backlog:
+            await self.telegram_queue.put(self._backlog[0])
+            self._backlog.popleft()
+
+        if not self.transport.is_closing():
+            self.transport.resume_reading()
 
     async def wait_closed(self):
         """Wait until connection is closed."""
         await self._closed.wait()
+
+    def __aiter__(self):
+        if self.telegram_queue is None:
+            raise TypeError("Iterating requires a telegram queue")
+        return self
+
+    async def __anext__(self):
+        """Wait for the next queued telegram, stop once the connection is closed and the queue is empty."""
+        get = asyncio.ensure_future(self.telegram_queue.get())
+        closed = asyncio.ensure_future(self._closed.wait())
+
+        try:
+            while not get.done():
+                if closed.done() and not self._backlog:
+                    get.cancel()
+                    raise StopAsyncIteration
+
+                await asyncio.wait([get] if closed.done() else [get, closed],
+                                   return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            closed.cancel()
+
+        return get.result()
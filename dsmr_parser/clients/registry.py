@@ -0,0 +1,140 @@
+"""
+Registry of the DSMR versions the clients can be created for, mapping each
+version name to its telegram specification and serial settings.
+
+Besides the registered versions the name 'auto' can be used for network and
+file connections: the version is then detected from the first telegram of
+each connection.
+"""
+
+import re
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.clients.settings import SERIAL_SETTINGS_V2_2, \
+    SERIAL_SETTINGS_V4, SERIAL_SETTINGS_V5
+from dsmr_parser.parsers import TelegramParser
+
+AUTO_DETECT = 'auto'
+
+_DSMR_VERSIONS = {}
+_TELEGRAM_PARSERS = {}
+
+
+def register_dsmr_version(dsmr_version, specification, serial_settings):
+    """
+    Register (or replace) a DSMR version.
+
+    :param str dsmr_version: name used to select the version, like '5B'
+    :param dict specification: telegram specification, see telegram_specifications
+    :param dict serial_settings: pyserial settings of the P1 port
+    """
+    _DSMR_VERSIONS[dsmr_version] = (specification, serial_settings)
+    _TELEGRAM_PARSERS.pop(dsmr_version, None)
+
+
+def dsmr_versions():
+    """
+    :return: names of the registered DSMR versions, in registration order
+    :rtype: list
+    """
+    return list(_DSMR_VERSIONS)
+
+
+def get_dsmr_version_settings(dsmr_version):
+    """
+    :return: the telegram specification and a copy of the serial settings for
+        a DSMR version. Both are None for auto detection.
+    :rtype: tuple
+    :raises NotImplementedError: for unknown versions
+    """
+    if dsmr_version == AUTO_DETECT:
+        return None, None
+
+    try:
+        specification, serial_settings = _DSMR_VERSIONS[dsmr_version]
+    except KeyError:
+        raise NotImplementedError("No telegram parser found for version: {}".format(dsmr_version))
+
+    return specification, dict(serial_settings)
+
+
+def get_telegram_parser(dsmr_version):
+    """
+    Parsers compile their specification's regexes, so one parser is shared
+    by all users of a version. Connections pass their own ParseCache to
+    parse(), so the parser's caches are not shared by all meters.
+
+    :return: the parser for a DSMR version, None for auto detection
+    :rtype: TelegramParser
+    :raises NotImplementedError: for unknown versions
+    """
+    if dsmr_version == AUTO_DETECT:
+        return None
+
+    if dsmr_version not in _TELEGRAM_PARSERS:
+        specification, _ = get_dsmr_version_settings(dsmr_version)
+        _TELEGRAM_PARSERS[dsmr_version] = TelegramParser(specification)
+
+    return _TELEGRAM_PARSERS[dsmr_version]
+
+
+_HEADER_VERSION = re.compile(r'^\d-\d:0\.2\.8\((\d+)\)', re.MULTILINE)
+_BELGIUM_VERSION = re.compile(r'^\d-\d:96\.1\.4\(', re.MULTILINE)
+_EQUIPMENT_NAME = re.compile(r'^\d-\d:42\.0\.0\(', re.MULTILINE)
+_IMPORTED_TOTAL = re.compile(r'^\d-\d:1\.8\.0\(', re.MULTILINE)
+_USED_TARIFF_1 = re.compile(r'^\d-\d:1\.8\.1\(', re.MULTILINE)
+_CHECKSUM = re.compile(r'^![0-9A-Fa-f]{1,4}\s*$', re.MULTILINE)
+
+
+def detect_dsmr_version(telegram):
+    """
+    Detect the DSMR version of a telegram from its identification line, the
+    version information it contains and whether it ends with a CRC.
+
+    Only DSMR v2.2 and v3 telegrams have no CRC, telegrams with a CRC but
+    without version information are of the EON (with a logical device name)
+    or Irish Iskra meters.
+
+    :param str telegram: complete telegram
+    :return: name of the registered version to parse the telegram with
+    :rtype: str
+    """
+    identification = telegram[1:telegram.find('\r\n')]
+
+    if _BELGIUM_VERSION.search(telegram) or identification.startswith('FLU'):
+        return '5B'
+
+    if 'Q3D' in identification:
+        return 'Q3D'
+
+    if not _CHECKSUM.search(telegram):
+        return '2.2'
+
+    # Swedish meters only send totals, not the readings per tariff.
+    swedish = _IMPORTED_TOTAL.search(telegram) and not _USED_TARIFF_1.search(telegram)
+
+    match = _HEADER_VERSION.search(telegram)
+    if match:
+        if int(match.group(1)) < 50:
+            return '4'
+        if _EQUIPMENT_NAME.search(telegram):
+            # Smarty meters add the logical device name to the V5 objects.
+            return '5L'
+        return '5S' if swedish else '5'
+
+    if _EQUIPMENT_NAME.search(telegram):
+        return '5EONHU'
+
+    return '5S' if swedish else 'ISKRA_IE'
+
+
+register_dsmr_version('2.2', telegram_specifications.V2_2, SERIAL_SETTINGS_V2_2)
+register_dsmr_version('4', telegram_specifications.V4, SERIAL_SETTINGS_V4)
+register_dsmr_version('4+', telegram_specifications.V5, SERIAL_SETTINGS_V4)
+register_dsmr_version('5', telegram_specifications.V5, SERIAL_SETTINGS_V5)
+register_dsmr_version('5B', telegram_specifications.BELGIUM_FLUVIUS, SERIAL_SETTINGS_V5)
+register_dsmr_version('5L', telegram_specifications.LUXEMBOURG_SMARTY, SERIAL_SETTINGS_V5)
+register_dsmr_version('5S', telegram_specifications.SWEDEN, SERIAL_SETTINGS_V5)
+register_dsmr_version('Q3D', telegram_specifications.Q3D, SERIAL_SETTINGS_V5)
+register_dsmr_version('ISKRA_IE', telegram_specifications.ISKRA_IE, SERIAL_SETTINGS_V5)
+register_dsmr_version('5EONHU', telegram_specifications.EON_HUNGARY, SERIAL_SETTINGS_V5)
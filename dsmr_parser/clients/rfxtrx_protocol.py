@@ -1,6 +1,8 @@
 """Asyncio protocol implementation for handling telegrams over a RFXtrx connection ."""
 
 import asyncio
+import collections
+import time
 
 from serial_asyncio_fast import create_serial_connection
 from .protocol import DSMRProtocol, _create_dsmr_protocol
@@ -17,6 +19,8 @@ def create_rfxtrx_dsmr_reader(port, dsmr_version, telegram_callback, loop=None):
     """Creates a DSMR asyncio protocol coroutine using a RFXtrx serial port."""
     protocol, serial_settings = create_rfxtrx_dsmr_protocol(
         dsmr_version, telegram_callback, loop=None)
+    if serial_settings is None:
+        raise ValueError("The DSMR version of a serial port can not be detected")
     serial_settings['url'] = port
 
     conn = create_serial_connection(loop, protocol, **serial_settings)
@@ -41,22 +45,56 @@ SUBTYPE_P1 = 0x01
 
 
 class RFXtrxDSMRProtocol(DSMRProtocol):
-
-    remaining_data = b''
+    """
+    Unwraps the DSMR data from the RFXtrx packets. Every packet starts with
+    a length byte (excluding itself), followed by the packet type, subtype
+    and a sequence number. Packets of other types are skipped and counted
+    per (packet type, subtype) in skipped_packets.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # received data not forming a complete packet yet
+        self._packets = bytearray()
+        self.skipped_packets = collections.Counter()
+
+    @property
+    def remaining_data(self):
+        return bytes(self._packets)
 
     def data_received(self, data):
         """Add incoming data to buffer."""
-
-        data = self.remaining_data + data
-
-        packetlength = data[0] + 1 if len(data) > 0 else 1
-        while packetlength <= len(data):
-            packettype = data[1]
-            subtype = data[2]
-            if (packettype == PACKETTYPE_DSMR and subtype == SUBTYPE_P1):
-                dsmr_data = data[4:packetlength]
-                super().data_received(dsmr_data)
-            data = data[packetlength:]
-            packetlength = data[0] + 1 if len(data) > 0 else 1
-
-        self.remaining_data = data
+        start = time.perf_counter()
+        self._active = True
+        self.stats.bytes_received += len(data)
+        packets = self._packets
+        packets += data
+        payloads = []
+        cursor = 0
+
+        with memoryview(packets) as view:
+            while cursor < len(view):
+                packetlength = view[cursor] + 1
+                if cursor + packetlength > len(view):
+                    break
+
+                if packetlength >= 4:
+                    packettype = view[cursor + 1]
+                    subtype = view[cursor + 2]
+                    if packettype == PACKETTYPE_DSMR and subtype == SUBTYPE_P1:
+                        payloads.append(view[cursor + 4:cursor + packetlength])
+                    else:
+                        self.skipped_packets[(packettype, subtype)] += 1
+
+                cursor += packetlength
+
+            # All DSMR data of this chunk is handed over at once.
+            dsmr_data = b''.join(payloads)
+            payloads.clear()
+
+        del packets[:cursor]
+
+        if dsmr_data:
+            self._handle_data(dsmr_data)
+
+        self.stats.loop_time += time.perf_counter() - start
@@ -1,9 +1,14 @@
+import asyncio
 import logging
 
 import serial
 import serial_asyncio_fast
 
+from dsmr_parser import error_reporting
+from dsmr_parser.clients.protocol import _timed_parse
+from dsmr_parser.clients.stats import ConnectionStats
 from dsmr_parser.clients.telegram_buffer import TelegramBuffer
+from dsmr_parser.clients.telegram_queue import TelegramQueue
 from dsmr_parser.exceptions import ParseError, InvalidChecksumError
 from dsmr_parser.parsers import TelegramParser
 
@@ -14,13 +19,71 @@ logger = logging.getLogger(__name__)
 class SerialReader(object):
     PORT_KEY = 'port'
 
-    def __init__(self, device, serial_settings, telegram_specification):
+    # A character takes 10 bits on the line: start bit, 7 data bits + parity or 8 data bits and a stop bit.
+    BITS_PER_CHARACTER = 10
+
+    # Silence on the line after which a read returns, so a read ends with the burst of a
+    # telegram instead of waiting for a full chunk.
+    INTER_BYTE_TIMEOUT = 0.1
+
+    def __init__(self, device, serial_settings, telegram_specification, error_reporter=None):
         self.serial_settings = serial_settings
         self.serial_settings[self.PORT_KEY] = device
 
-        self.telegram_parser = TelegramParser(telegram_specification)
+        # Read at most about a second worth of data at once.
+        self.chunk_size = max(1, self.serial_settings.get('baudrate', 9600) // self.BITS_PER_CHARACTER)
+
+        self.telegram_parser = TelegramParser(telegram_specification, error_reporter=error_reporter)
         self.telegram_buffer = TelegramBuffer()
         self.telegram_specification = telegram_specification
+        self.stats = ConnectionStats(device)
+        # reports the telegrams that fail to parse, see ErrorAggregator
+        self.error_reporter = error_reporter if error_reporter is not None else error_reporting.aggregator
+
+    def _frame(self, data):
+        """
+        Add a chunk of data to the buffer and return the complete telegrams in it.
+
+        :rtype: generator
+        """
+        self.stats.bytes_received += len(data)
+
+        # accept latin-1 (8-bit) on the line, the telegrams are checked to be ascii below
+        for telegram in self.stats.frame(data.decode('latin1'), self.telegram_buffer):
+            try:
+                # ensure actual telegram is ascii (7-bit) only
+                yield telegram.encode('latin1').decode('ascii')
+            except UnicodeDecodeError:
+                self.stats.parse_failures += 1
+                logger.warning('Failed to decode telegram data: %s', telegram)
+
+    def _telegrams(self):
+        """
+        Read chunks from the serial interface and frame them into telegrams.
+
+        :rtype: generator
+        """
+        serial_settings = dict(self.serial_settings)
+        serial_settings.setdefault('inter_byte_timeout', self.INTER_BYTE_TIMEOUT)
+
+        with serial.Serial(**serial_settings) as serial_handle:
+            while True:
+                data = serial_handle.read(self.chunk_size)
+
+                if data:
+                    yield from self._frame(data)
+
+    def _parsed_telegrams(self):
+        """
+        Read and parse the telegrams, reporting the ones that fail to parse.
+
+        :rtype: generator
+        """
+        for telegram in self._telegrams():
+            try:
+                yield self.stats.parse(self.telegram_parser, telegram)
+            except ParseError as e:
+                self.error_reporter.report(e, source=self.stats.name)
 
     def read(self):
         """
@@ -29,23 +92,7 @@ class SerialReader(object):
 
         :rtype: generator
         """
-        with serial.Serial(**self.serial_settings) as serial_handle:
-            while True:
-                data = serial_handle.read(max(1, min(1024, serial_handle.in_waiting)))
-                try:
-                    decoded_data = data.decode('ascii')
-                except Exception:
-                    logger.warning('Failed to decode telegram data: %s', data)
-                else:
-                    self.telegram_buffer.append(decoded_data)
-
-                    for telegram in self.telegram_buffer.get_all():
-                        try:
-                            yield self.telegram_parser.parse(telegram)
-                        except InvalidChecksumError as e:
-                            logger.info(str(e))
-                        except ParseError as e:
-                            logger.error('Failed to parse telegram: %s', e)
+        return self._parsed_telegrams()
 
     def read_as_object(self):
         """
@@ -53,63 +100,95 @@ class SerialReader(object):
 
         :rtype: generator
         """
-        with serial.Serial(**self.serial_settings) as serial_handle:
-            while True:
-                data = serial_handle.readline()
-                try:
-                    decoded_data = data.decode('ascii')
-                except Exception:
-                    logger.warning('Failed to decode telegram data: %s', data)
-                else:
-                    self.telegram_buffer.append(decoded_data)
-
-                    for telegram in self.telegram_buffer.get_all():
-                        try:
-                            yield self.telegram_parser.parse(telegram)
-                        except InvalidChecksumError as e:
-                            logger.warning(str(e))
-                        except ParseError as e:
-                            logger.error('Failed to parse telegram: %s', e)
+        return self._parsed_telegrams()
 
 
 class AsyncSerialReader(SerialReader):
-    """Serial reader using asyncio pyserial."""
+    """
+    Serial reader using asyncio pyserial.
+
+    Telegrams can be consumed with 'async for', reading continues in the
+    background into a bounded queue while the consumer awaits other I/O:
+
+        async for telegram in AsyncSerialReader(device, serial_settings, telegram_specification):
+            await store(telegram)
+
+    With a parse_executor (a concurrent.futures executor) telegrams are
+    parsed off the event loop.
+    """
 
     PORT_KEY = 'url'
 
-    async def read(self, queue):
+    def __init__(self, device, serial_settings, telegram_specification, parse_executor=None, error_reporter=None):
+        super().__init__(device, serial_settings, telegram_specification, error_reporter)
+        self.parse_executor = parse_executor
+
+    async def _parse(self, telegram):
+        if self.parse_executor is None:
+            return self.stats.parse(self.telegram_parser, telegram)
+
+        # Only the parsing runs in the executor, the stats are counted on the event loop.
+        loop = asyncio.get_running_loop()
+        try:
+            parsed_telegram, parse_time = await loop.run_in_executor(
+                self.parse_executor, _timed_parse, self.telegram_parser, telegram, self.stats.name, None)
+        except InvalidChecksumError:
+            self.stats.checksum_failures += 1
+            raise
+        except ParseError:
+            self.stats.parse_failures += 1
+            raise
+
+        self.stats.parsed(parse_time)
+        return parsed_telegram
+
+    async def _telegrams(self):
         """
-        Read complete DSMR telegram's from the serial interface and parse it
-        into CosemObject's and MbusObject's.
-
-        Instead of being a generator, values are pushed to provided queue for
-        asynchronous processing.
+        Read chunks from the serial interface and frame them into telegrams.
 
-        :rtype: None
+        :rtype: async generator
         """
         # create Serial StreamReader
         conn = serial_asyncio_fast.open_serial_connection(**self.serial_settings)
         reader, _ = await conn
 
         while True:
-            # Read line if available or give control back to loop until new
-            # data has arrived.
-            data = await reader.readline()
+            # Read whatever is available or give control back to loop until
+            # new data has arrived.
+            data = await reader.read(self.chunk_size)
+
+            if not data:
+                logger.error('Serial connection closed')
+                break
+
+            for telegram in self._frame(data):
+                yield telegram
+
+    async def _parsed_telegrams(self):
+        """
+        Read and parse the telegrams, reporting the ones that fail to parse.
+
+        :rtype: async generator
+        """
+        async for telegram in self._telegrams():
             try:
-                decoded_data = data.decode('ascii')
-            except Exception:
-                logger.warning('Failed to decode telegram data: %s', data)
-            else:
-                self.telegram_buffer.append(decoded_data)
-
-                for telegram in self.telegram_buffer.get_all():
-                    try:
-                        # Push new parsed telegram onto queue.
-                        queue.put_nowait(
-                            self.telegram_parser.parse(telegram)
-                        )
-                    except ParseError as e:
-                        logger.warning('Failed to parse telegram: %s', e)
+                yield await self._parse(telegram)
+            except ParseError as e:
+                self.error_reporter.report(e, source=self.stats.name)
+
+    async def read(self, queue):
+        """
+        Read complete DSMR telegram's from the serial interface and parse it
+        into CosemObject's and MbusObject's.
+
+        Instead of being a generator, values are pushed to provided queue for
+        asynchronous processing. Reading waits while a bounded queue is full,
+        unless the queue is a TelegramQueue with a dropping overflow policy.
+
+        :rtype: None
+        """
+        async for parsed_telegram in self._parsed_telegrams():
+            await queue.put(parsed_telegram)
 
     async def read_as_object(self, queue):
         """
@@ -117,33 +196,43 @@ class AsyncSerialReader(SerialReader):
         and return a Telegram object.
 
         Instead of being a generator, Telegram objects are pushed
-        to provided queue for asynchronous processing.
+        to provided queue for asynchronous processing. Reading waits while a
+        bounded queue is full, unless the queue is a TelegramQueue with a
+        dropping overflow policy.
 
         :rtype: None
         """
+        async for parsed_telegram in self._parsed_telegrams():
+            await queue.put(parsed_telegram)
 
-        # create Serial StreamReader
-        conn = serial_asyncio_fast.open_serial_connection(**self.serial_settings)
-        reader, _ = await conn
+    async def telegrams(self, queue_size=100):
+        """
+        Read complete DSMR telegram's from the serial interface and yield
+        Telegram objects. Up to queue_size telegrams are buffered while the
+        consumer is busy, after that reading waits for the consumer.
 
-        while True:
+        :rtype: async generator
+        """
+        queue = TelegramQueue(queue_size)
+        reader = asyncio.ensure_future(self.read_as_object(queue))
 
-            # Read line if available or give control back to loop until new
-            # data has arrived.
-            data = await reader.readline()
-            try:
-                decoded_data = data.decode('ascii')
-            except Exception:
-                logger.warning('Failed to decode telegram data: %s', data)
-            else:
-                self.telegram_buffer.append(decoded_data)
-
-                for telegram in self.telegram_buffer.get_all():
-                    try:
-                        queue.put_nowait(
-                            self.telegram_parser.parse(telegram)
-                        )
-                    except InvalidChecksumError as e:
-                        logger.warning(str(e))
-                    except ParseError as e:
-                        logger.error('Failed to parse telegram: %s', e)
+        try:
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait([get, reader], return_when=asyncio.FIRST_COMPLETED)
+
+                if get.done():
+                    yield get.result()
+                    continue
+
+                # Reading ended, raise its exception if any and hand out the remaining telegrams.
+                get.cancel()
+                reader.result()
+                while not queue.empty():
+                    yield queue.get_nowait()
+                return
+        finally:
+            reader.cancel()
+
+    def __aiter__(self):
+        return self.telegrams()
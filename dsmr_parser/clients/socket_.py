@@ -1,8 +1,11 @@
 import logging
 import socket
+import time
 
+from dsmr_parser import error_reporting
+from dsmr_parser.clients.stats import ConnectionStats
 from dsmr_parser.clients.telegram_buffer import TelegramBuffer
-from dsmr_parser.exceptions import ParseError, InvalidChecksumError
+from dsmr_parser.exceptions import ParseError
 from dsmr_parser.parsers import TelegramParser
 
 
@@ -11,88 +14,109 @@ logger = logging.getLogger(__name__)
 
 class SocketReader(object):
 
-    BUFFER_SIZE = 256
+    BUFFER_SIZE = 64 * 1024
 
-    def __init__(self, host, port, telegram_specification):
+    def __init__(self, host, port, telegram_specification, buffer_size=BUFFER_SIZE, timeout=60,
+                 reconnect_interval=None, error_reporter=None):
+        """
+        :param int buffer_size: maximum number of bytes received at once
+        :param float timeout: seconds without data after which the connection is considered lost
+        :param float reconnect_interval: seconds to wait before reconnecting after the connection
+            is lost. When None reading stops instead.
+        :param ErrorAggregator error_reporter: reports the telegrams and lines that fail to parse, the
+            module level aggregator by default
+        """
         self.host = host
         self.port = port
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
 
-        self.telegram_parser = TelegramParser(telegram_specification)
+        self.telegram_parser = TelegramParser(telegram_specification, error_reporter=error_reporter)
         self.telegram_buffer = TelegramBuffer()
         self.telegram_specification = telegram_specification
+        self.stats = ConnectionStats('{}:{}'.format(host, port))
+        self.error_reporter = error_reporter if error_reporter is not None else error_reporting.aggregator
 
-    def read(self):
+    def _receive(self):
         """
-        Read complete DSMR telegram's from remote interface and parse it
-        into CosemObject's and MbusObject's
+        Connect and yield the received data chunk by chunk, until the connection
+        is lost and no reconnect is wanted.
 
         :rtype: generator
         """
-        buffer = b""
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.timeout) as socket_handle:
+                    while True:
+                        size = socket_handle.recv_into(buffer)
+
+                        if not size:
+                            logger.error("Connection closed by remote")
+                            break
+
+                        # accept latin-1 (8-bit) on the line, the telegrams are checked to be ascii later on
+                        yield str(view[:size], 'latin1')
+            except socket.timeout:
+                logger.error("Socket timeout occurred")
+            except OSError as e:
+                if self.reconnect_interval is None:
+                    raise
+                logger.error("Socket error occurred: %s", e)
+
+            if self.reconnect_interval is None:
+                logger.error("Connection lost, exiting")
+                break
+
+            time.sleep(self.reconnect_interval)
+
+    def _telegrams(self):
+        """
+        Frame the received data into telegrams.
 
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as socket_handle:
-            socket_handle.settimeout(60)
-            socket_handle.connect((self.host, self.port))
+        :rtype: generator
+        """
+        for data in self._receive():
+            self.stats.bytes_received += len(data)
 
-            while True:
+            for telegram in self.stats.frame(data, self.telegram_buffer):
                 try:
-                    buffer += socket_handle.recv(self.BUFFER_SIZE)
-                except socket.timeout:
-                    logger.error("Socket timeout occurred, exiting")
-                    break
-
-                lines = buffer.splitlines(keepends=True)
-
-                if len(lines) == 0:
-                    continue
-
-                for data in lines:
-                    try:
-                        self.telegram_buffer.append(data.decode('ascii'))
-                    except UnicodeDecodeError:
-                        # Some garbage came through the channel
-                        # E.g.: Happens at EON_HUNGARY, but only once at the start of the socket.
-                        logger.error('Failed to parse telegram due to unicode decode error')
-
-                for telegram in self.telegram_buffer.get_all():
-                    try:
-                        yield self.telegram_parser.parse(telegram)
-                    except InvalidChecksumError as e:
-                        logger.info(str(e))
-                    except ParseError as e:
-                        logger.error('Failed to parse telegram: %s', e)
-
-                buffer = b""
-
-    def read_as_object(self):
+                    # ensure actual telegram is ascii (7-bit) only
+                    yield telegram.encode('latin1').decode('ascii')
+                except UnicodeDecodeError:
+                    self.stats.parse_failures += 1
+                    # Some garbage came through the channel
+                    # E.g.: Happens at EON_HUNGARY, but only once at the start of the socket.
+                    logger.error('Failed to parse telegram due to unicode decode error')
+
+    def _parsed_telegrams(self):
         """
-        Read complete DSMR telegram's from remote and return a Telegram object.
+        Read and parse the telegrams, reporting the ones that fail to parse.
 
         :rtype: generator
         """
-        buffer = b""
-
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as socket_handle:
-
-            socket_handle.connect((self.host, self.port))
+        for telegram in self._telegrams():
+            try:
+                yield self.stats.parse(self.telegram_parser, telegram)
+            except ParseError as e:
+                self.error_reporter.report(e, source=self.stats.name)
 
-            while True:
-                buffer += socket_handle.recv(self.BUFFER_SIZE)
-
-                lines = buffer.splitlines(keepends=True)
-
-                if len(lines) == 0:
-                    continue
+    def read(self):
+        """
+        Read complete DSMR telegram's from remote interface and parse it
+        into CosemObject's and MbusObject's
 
-                for data in lines:
-                    self.telegram_buffer.append(data.decode('ascii'))
+        :rtype: generator
+        """
+        return self._parsed_telegrams()
 
-                    for telegram in self.telegram_buffer.get_all():
-                        try:
-                            yield self.telegram_parser.parse(telegram)
-                        except InvalidChecksumError as e:
-                            logger.warning(str(e))
-                        except ParseError as e:
-                            logger.error('Failed to parse telegram: %s', e)
+    def read_as_object(self):
+        """
+        Read complete DSMR telegram's from remote and return a Telegram object.
 
-                buffer = b""
+        :rtype: generator
+        """
+        return self._parsed_telegrams()
@@ -0,0 +1,175 @@
+"""
+Runtime statistics of the connections to meters, to find slow or noisy links
+without turning on debug logging.
+
+Every connection keeps a ConnectionStats, which adds itself to a
+StatsRegistry (the module level registry by default). The registry only
+keeps weak references, so stats of closed connections disappear with them.
+
+    for stats in registry:
+        print(stats.name, stats.to_dict())
+"""
+
+import time
+import weakref
+
+from dsmr_parser.exceptions import InvalidChecksumError, ParseError
+from dsmr_parser.instrumentation import DEFAULT_BUCKETS, Histogram
+
+
+def _display_name(name):
+    """A readable name for a connection name, like 'host:port' for an address."""
+    if name is None:
+        return 'unnamed'
+    if isinstance(name, tuple) and len(name) >= 2:
+        return '{}:{}'.format(*name[:2])
+    return str(name)
+
+
+class StatsRegistry(object):
+    """The stats of all connections, collected in one place."""
+
+    def __init__(self):
+        self._stats = weakref.WeakSet()
+
+    def register(self, stats):
+        self._stats.add(stats)
+
+    def unregister(self, stats):
+        self._stats.discard(stats)
+
+    def __iter__(self):
+        return iter(list(self._stats))
+
+    def __len__(self):
+        return len(self._stats)
+
+    def named(self):
+        """
+        Connections may share a name or have none, so they are numbered by
+        the time they started when needed, like 'meter', 'meter#2'.
+
+        :return: (unique name, stats) of every connection, sorted by name
+        :rtype: list
+        """
+        named = []
+        counts = {}
+
+        for stats in sorted(self, key=lambda stats: (_display_name(stats.name), stats.started)):
+            name = _display_name(stats.name)
+            counts[name] = counts.get(name, 0) + 1
+            named.append((name if counts[name] == 1 else '{}#{}'.format(name, counts[name]), stats))
+
+        return named
+
+    def collect(self):
+        """
+        :return: the stats of every connection as dict, by unique name
+        :rtype: dict
+        """
+        return {name: stats.to_dict() for name, stats in self.named()}
+
+
+registry = StatsRegistry()
+
+
+class ConnectionStats(object):
+    """
+    Counters and latency histograms of a single connection. The counters are
+    updated from the thread or event loop reading the connection only, so no
+    locking is needed.
+    """
+
+    def __init__(self, name=None, registry=registry, buckets=DEFAULT_BUCKETS):
+        """
+        :param name: identifies the connection, like the source id, device or address
+        :param StatsRegistry registry: registry to add the stats to, None for none
+        :param tuple buckets: see Histogram
+        """
+        self.name = name
+        self.started = time.monotonic()
+        self.bytes_received = 0
+        self.bytes_discarded = 0
+        self.telegrams_framed = 0
+        self.telegrams_parsed = 0
+        self.checksum_failures = 0
+        self.parse_failures = 0
+        # seconds spent handling received data on the event loop, see DSMRProtocol
+        self.loop_time = 0.0
+        self.parse_latency = Histogram(buckets)
+        self.callback_latency = Histogram(buckets)
+
+        if registry is not None:
+            registry.register(self)
+
+    def frame(self, data, telegram_buffer):
+        """
+        Frame data with the telegram buffer, counting the telegrams and the
+        data that was discarded.
+
+        :param str data: decoded data
+        :param TelegramBuffer telegram_buffer:
+        :return: the framed telegrams
+        :rtype: generator
+        """
+        telegram_buffer.append(data)
+        discarded = telegram_buffer.discarded
+
+        for telegram in telegram_buffer.get_all():
+            self.telegrams_framed += 1
+            yield telegram
+
+        self.bytes_discarded += telegram_buffer.discarded - discarded
+
+    def parse(self, telegram_parser, telegram, cache=None):
+        """
+        Parse a telegram, counting it and recording how long it took. Lines
+        that fail to parse are reported with the name of the connection.
+
+        :param ParseCache cache: the parse cache of the connection, if any
+        :rtype: Telegram
+        :raises ParseError:
+        :raises InvalidChecksumError:
+        """
+        start = time.perf_counter()
+
+        try:
+            parsed_telegram = telegram_parser.parse(telegram, source=self.name, cache=cache)
+        except InvalidChecksumError:
+            self.checksum_failures += 1
+            raise
+        except ParseError:
+            self.parse_failures += 1
+            raise
+
+        self.parsed(time.perf_counter() - start)
+        return parsed_telegram
+
+    def parsed(self, seconds):
+        """Count a telegram that was parsed elsewhere, like in an executor."""
+        self.telegrams_parsed += 1
+        self.parse_latency.observe(seconds)
+
+    @property
+    def uptime(self):
+        return time.monotonic() - self.started
+
+    @property
+    def telegrams_per_second(self):
+        uptime = self.uptime
+        return self.telegrams_parsed / uptime if uptime > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'uptime': self.uptime,
+            'bytes_received': self.bytes_received,
+            'bytes_discarded': self.bytes_discarded,
+            'telegrams_framed': self.telegrams_framed,
+            'telegrams_parsed': self.telegrams_parsed,
+            'telegrams_per_second': self.telegrams_per_second,
+            'checksum_failures': self.checksum_failures,
+            'parse_failures': self.parse_failures,
+            'loop_time': self.loop_time,
+            'parse_latency': self.parse_latency.to_dict(),
+            'callback_latency': self.callback_latency.to_dict(),
+        }
@@ -16,32 +16,36 @@ class TelegramBuffer(object):
     """
 
     def __init__(self):
-        self._buffer = ""
+        self._data = ""
+        # Start of the data that has not been handed out as (or skipped for)
+        # a telegram yet. Keeping an offset instead of slicing the buffer for
+        # every telegram keeps framing linear when large blocks are appended.
+        self._offset = 0
+        # Number of characters skipped because they were not part of a telegram.
+        self.discarded = 0
+
+    @property
+    def _buffer(self):
+        return self._data[self._offset:]
 
     def get_all(self):
         """
         Remove complete telegrams from buffer and yield them.
         :rtype generator:
         """
-        for telegram in _FIND_TELEGRAMS_REGEX.findall(self._buffer):
-            self._remove(telegram)
-            yield telegram
+        if self._offset:
+            self._data = self._data[self._offset:]
+            self._offset = 0
+
+        for match in _FIND_TELEGRAMS_REGEX.finditer(self._data):
+            # Remove data leading up to the telegram and the telegram itself.
+            self.discarded += match.start() - self._offset
+            self._offset = match.end()
+            yield match.group(0)
 
     def append(self, data):
         """
         Add telegram data to buffer.
         :param str data: chars, lines or full telegram strings of telegram data
         """
-        self._buffer += data
-
-    def _remove(self, telegram):
-        """
-        Remove telegram from buffer and incomplete data preceding it. This
-        is easier than validating the data before adding it to the buffer.
-        :param str telegram:
-        :return:
-        """
-        # Remove data leading up to the telegram and the telegram itself.
-        index = self._buffer.index(telegram) + len(telegram)
-
-        self._buffer = self._buffer[index:]
+        self._data += data
@@ -0,0 +1,106 @@
+import asyncio
+import collections
+
+# Wait for room in the queue. Readers stop reading until there is room.
+OVERFLOW_BLOCK = 'block'
+# Make room by dropping the oldest queued telegram.
+OVERFLOW_DROP_OLDEST = 'drop_oldest'
+# Drop the telegram that does not fit.
+OVERFLOW_DROP_NEWEST = 'drop_newest'
+# When the queue is full, replace a still queued telegram of the same meter with
+# the newer one. When it is full with telegrams of other meters the oldest one
+# is dropped.
+OVERFLOW_COALESCE = 'coalesce'
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_COALESCE)
+
+
+def _single_meter(item):
+    return None
+
+
+class TelegramQueue(asyncio.Queue):
+    """
+    Bounded asyncio queue with a policy for what happens when it is full, so
+    a slow consumer does not make memory grow without limit nor crash the
+    reader with QueueFull.
+
+    The number of telegrams dropped and replaced because of the policy are
+    kept in the dropped and coalesced counters.
+
+    For the coalesce policy the meter an item belongs to is determined by the
+    key function. By default all items are considered to be from the same
+    meter, for (source_id, telegram) items use key=operator.itemgetter(0).
+
+    Usage:
+        queue = TelegramQueue(maxsize=100, overflow=OVERFLOW_DROP_OLDEST)
+        asyncio.create_task(serial_reader.read_as_object(queue))
+
+        while True:
+            telegram = await queue.get()
+    """
+
+    def __init__(self, maxsize=0, overflow=OVERFLOW_BLOCK, key=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: {}".format(overflow))
+
+        self.overflow = overflow
+        self.dropped = 0
+        self.coalesced = 0
+        self._key = key or _single_meter
+        super().__init__(maxsize)
+
+    # Items are kept in single item lists ("slots") so a coalesced item can
+    # be replaced without changing its position in the queue.
+
+    def _init(self, maxsize):
+        self._queue = collections.deque()
+        self._slots = {}
+
+    def _put(self, item):
+        slot = [item]
+        self._queue.append(slot)
+
+        if self.overflow == OVERFLOW_COALESCE:
+            self._slots[self._key(item)] = slot
+
+    def _get(self):
+        slot = self._queue.popleft()
+        item = slot[0]
+
+        if self.overflow == OVERFLOW_COALESCE:
+            key = self._key(item)
+            if self._slots.get(key) is slot:
+                del self._slots[key]
+
+        return item
+
+    def put_nowait(self, item):
+        """
+        Put an item on the queue, applying the overflow policy when it is full.
+        :raises asyncio.QueueFull: only for the block policy
+        """
+        if self.overflow == OVERFLOW_COALESCE and self.full():
+            slot = self._slots.get(self._key(item))
+            if slot is not None:
+                slot[0] = item
+                self.coalesced += 1
+                return
+
+        if self.full() and self.overflow != OVERFLOW_BLOCK:
+            self.dropped += 1
+
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                return
+
+            self.get_nowait()
+            self.task_done()
+
+        super().put_nowait(item)
+
+    async def put(self, item):
+        """Put an item on the queue. Only waits for room with the block policy."""
+        if self.overflow == OVERFLOW_BLOCK:
+            await super().put(item)
+        else:
+            self.put_nowait(item)
@@ -0,0 +1,156 @@
+"""
+Change sets of consecutive telegrams, for consumers that only store the
+values that changed.
+
+    differ = TelegramDiffer()
+    for telegram in serial_reader.read_as_object():
+        changes = differ.diff(telegram)
+        if changes:
+            store(changes.timestamp, dict(changes))
+
+Identical lines of consecutive telegrams are parsed into the same objects by
+TelegramParser (see LINE_CACHE_SIZE), so unchanged values are mostly
+recognized by identity, without comparing the values themselves.
+"""
+
+from datetime import datetime, timezone
+import json
+
+from dsmr_parser.objects import DSMRObject
+
+
+def _equal(dsmr_object, previous):
+    if dsmr_object is previous:
+        return True
+
+    if type(dsmr_object) is not type(previous):
+        return False
+
+    # MaxDemandParser (BELGIUM_MAXIMUM_DEMAND_13_MONTHS) returns a list
+    if isinstance(dsmr_object, list):
+        return len(dsmr_object) == len(previous) and all(map(_equal, dsmr_object, previous))
+
+    if isinstance(dsmr_object, DSMRObject):
+        return dsmr_object.obis_id_code == previous.obis_id_code and dsmr_object.values == previous.values
+
+    return dsmr_object == previous
+
+
+def _to_json_value(value):
+    if isinstance(value, list):
+        return [_to_json_value(item) for item in value]
+    return json.loads(value.to_json()) if hasattr(value, 'to_json') else value
+
+
+class TelegramChanges(object):
+    """
+    The values of a telegram that changed since the previous telegram of the
+    same source. Iterating gives (obis_name, value) pairs like a Telegram,
+    M-Bus values are kept per channel in mbus_devices.
+    """
+
+    def __init__(self, timestamp, changed, removed, mbus_devices):
+        """
+        :param timestamp: the P1_MESSAGE_TIMESTAMP of the telegram, if any
+        :param dict changed: the changed values by obis_name
+        :param list removed: the obis_names no longer in the telegram
+        :param dict mbus_devices: the changed values by obis_name, by channel
+        """
+        self.timestamp = timestamp
+        self.changed = changed
+        self.removed = removed
+        self.mbus_devices = mbus_devices
+
+    def __bool__(self):
+        return bool(self.changed or self.removed or self.mbus_devices)
+
+    def __len__(self):
+        return len(self.changed) + sum(len(changed) for changed in self.mbus_devices.values())
+
+    def __iter__(self):
+        return iter(self.changed.items())
+
+    def __str__(self):
+        output = "changes at {}\n".format(self.timestamp)
+        for obis_name, value in self:
+            output += "{}: \t {}\n".format(obis_name, str(value))
+        for channel_id, changed in sorted(self.mbus_devices.items()):
+            for obis_name, value in changed.items():
+                output += "MBUS DEVICE (channel {}) {}: \t {}\n".format(channel_id, obis_name, str(value))
+        for obis_name in self.removed:
+            output += "{}: \t removed\n".format(obis_name)
+        return output
+
+    def to_json(self):
+        timestamp = self.timestamp
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.astimezone(timezone.utc).isoformat()
+
+        json_data = {obis_name: _to_json_value(value) for obis_name, value in self}
+        json_data['TIMESTAMP'] = timestamp
+        if self.mbus_devices:
+            json_data['MBUS_DEVICES'] = [
+                dict({obis_name: _to_json_value(value) for obis_name, value in changed.items()},
+                     CHANNEL_ID=channel_id)
+                for channel_id, changed in sorted(self.mbus_devices.items())
+            ]
+        if self.removed:
+            json_data['REMOVED'] = self.removed
+
+        return json.dumps(json_data)
+
+
+class TelegramDiffer(object):
+    """
+    Compares every telegram with the previous telegram of the same source.
+    The first telegram of a source is returned as changed completely.
+    """
+
+    # Always part of the change set as timestamp, instead of as a change.
+    TIMESTAMP_NAME = 'P1_MESSAGE_TIMESTAMP'
+
+    def __init__(self):
+        # the values of the previous telegram by obis_name, by source
+        self._previous = {}
+
+    def diff(self, telegram, source_id=None):
+        """
+        :param Telegram telegram:
+        :param source_id: the meter or connection the telegram came from
+        :rtype: TelegramChanges
+        """
+        values = {}
+        mbus_values = {}
+
+        for obis_name, value in telegram:
+            if obis_name == 'MBUS_DEVICES':
+                for mbus_device in value:
+                    mbus_values[mbus_device.channel_id] = dict(mbus_device)
+            else:
+                values[obis_name] = value
+
+        timestamp = values.pop(self.TIMESTAMP_NAME, None)
+        previous_values, previous_mbus_values = self._previous.get(source_id, ({}, {}))
+        self._previous[source_id] = (values, mbus_values)
+
+        changed = self._changed(values, previous_values)
+        removed = [obis_name for obis_name in previous_values if obis_name not in values]
+
+        mbus_devices = {}
+        for channel_id, channel_values in mbus_values.items():
+            channel_changed = self._changed(channel_values, previous_mbus_values.get(channel_id, {}))
+            if channel_changed:
+                mbus_devices[channel_id] = channel_changed
+
+        return TelegramChanges(getattr(timestamp, 'value', timestamp), changed, removed, mbus_devices)
+
+    @staticmethod
+    def _changed(values, previous_values):
+        return {
+            obis_name: value for obis_name, value in values.items()
+            if obis_name not in previous_values or not _equal(value, previous_values[obis_name])
+        }
+
+    def reset(self, source_id=None):
+        """Forget the previous telegram of a source, the next one is returned as changed completely."""
+        self._previous.pop(source_id, None)
@@ -0,0 +1,161 @@
+"""
+Aggregated reporting of parse errors, so a meter that keeps sending a line
+the parser does not understand does not flood the log with a traceback per
+line per telegram.
+
+Errors are counted by source, OBIS reference and error type. The first error
+of every kind is passed with its full detail to the sink, after that the
+detail is sampled once per sample_interval, and every interval a summary with
+the counts is logged. The summary is logged from a timer thread when no more
+errors are reported, so the errors of the last interval are not left out:
+
+    aggregator = ErrorAggregator(interval=300)
+    parser = TelegramParser(telegram_specifications.V5, error_reporter=aggregator)
+    ...
+    print(aggregator.totals())
+
+Parsers and clients report to the module level aggregator by default.
+"""
+
+from collections import Counter
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def log_error(error, obis_reference, source, count):
+    """
+    The default sink, logging the error with its traceback.
+
+    :param Exception error: the sampled error
+    :param str obis_reference: OBIS code of the line that failed to parse, like 0-0:1.0.0, None for the whole
+        telegram
+    :param source: the connection the telegram came from, if known
+    :param int count: how often this kind of error occurred so far
+    """
+    logger.warning('%s (%s) on %s, %d times so far: %s', type(error).__name__, obis_reference or 'telegram',
+                   source or 'unknown source', count, error, exc_info=error)
+
+
+class ErrorAggregator(object):
+    """
+    Counts errors and rate-limits their logging. It can be shared by parsers
+    running in different threads.
+    """
+
+    def __init__(self, interval=60.0, sample_interval=None, sink=log_error):
+        """
+        :param float interval: seconds between the summaries, None to only
+            summarize on flush()
+        :param float sample_interval: minimum seconds between the errors of
+            one kind passed to the sink, the summary interval by default
+        :param sink: called as sink(error, obis_reference, source, count)
+            with the sampled errors, None to only count them
+        """
+        self.interval = interval
+        self.sample_interval = interval if sample_interval is None else sample_interval
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        self._window = Counter()
+        self._sampled = {}
+        self._window_start = time.monotonic()
+        # logs the summary of the window when no more errors are reported
+        self._timer = None
+
+    def report(self, error, obis_reference=None, source=None):
+        """
+        :param Exception error:
+        :param str obis_reference: OBIS code of the line that failed to parse, if any
+        :param source: the connection the telegram came from, if known
+        """
+        key = (source, obis_reference, type(error).__name__)
+        now = time.monotonic()
+
+        with self._lock:
+            self._totals[key] += 1
+            self._window[key] += 1
+            count = self._totals[key]
+
+            last_sampled = self._sampled.get(key)
+            sample = last_sampled is None or self.sample_interval is None or \
+                now - last_sampled >= self.sample_interval
+            if sample:
+                self._sampled[key] = now
+
+            summary = self._take_window(now) if self.interval is not None and \
+                now - self._window_start >= self.interval else None
+            self._schedule_summary(now)
+
+        if sample and self.sink is not None:
+            self.sink(error, obis_reference, source, count)
+
+        if summary:
+            self._log_summary(*summary)
+
+    def _schedule_summary(self, now):
+        """Start the timer for the summary of the current window, with the lock held."""
+        if self.interval is None or self._timer is not None or not self._window:
+            return
+
+        self._timer = threading.Timer(self._window_start + self.interval - now, self._scheduled_summary)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _scheduled_summary(self):
+        now = time.monotonic()
+
+        with self._lock:
+            self._timer = None
+            if now - self._window_start < self.interval:
+                # The window was summarized by report() in the meantime.
+                self._schedule_summary(now)
+                return
+
+            summary = self._take_window(now)
+
+        if summary[0]:
+            self._log_summary(*summary)
+
+    def _take_window(self, now):
+        window, seconds = self._window, now - self._window_start
+        self._window = Counter()
+        self._window_start = now
+        return window, seconds
+
+    @staticmethod
+    def _log_summary(window, seconds):
+        for (source, obis_reference, error_type), count in sorted(window.items(), key=lambda item: -item[1]):
+            logger.warning('%d %s errors (%s) on %s in the last %.0f seconds', count, error_type,
+                           obis_reference or 'telegram', source or 'unknown source', seconds)
+
+    def flush(self):
+        """Log the summary of the errors since the last summary now."""
+        with self._lock:
+            summary = self._take_window(time.monotonic())
+
+        if summary[0]:
+            self._log_summary(*summary)
+
+    def totals(self):
+        """
+        :return: the number of errors by (source, obis_reference, error type)
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._totals)
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._window.clear()
+            self._sampled.clear()
+            self._window_start = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+aggregator = ErrorAggregator()
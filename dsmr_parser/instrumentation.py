@@ -0,0 +1,137 @@
+"""
+Timing of the stages of TelegramParser.parse(), to find out where parse time
+goes in production without attaching a profiler.
+
+Any callable accepting (stage, seconds, value_name) can be passed as
+instrumentation to TelegramParser. InstrumentationCollector aggregates the
+timings into histograms:
+
+    collector = InstrumentationCollector()
+    parser = TelegramParser(telegram_specifications.V5, instrumentation=collector)
+    ...
+    print(collector.report())
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+import threading
+
+# Decrypting general_global_cipher telegrams.
+STAGE_DECRYPT = 'decrypt'
+# Validating the CRC checksum.
+STAGE_CHECKSUM = 'checksum'
+# Finding the lines of an object, reported with its value_name.
+STAGE_MATCH = 'match'
+# Parsing the values of a line, reported with the object's value_name.
+STAGE_COERCE = 'coerce'
+# Adding the parsed object to the telegram, reported with its value_name.
+STAGE_ADD = 'add'
+# The complete parse() call.
+STAGE_TOTAL = 'total'
+
+STAGES = (STAGE_DECRYPT, STAGE_CHECKSUM, STAGE_MATCH, STAGE_COERCE, STAGE_ADD, STAGE_TOTAL)
+
+# Upper bounds in seconds of the histogram buckets, from 1 microsecond to 1 second.
+DEFAULT_BUCKETS = (
+    0.000001, 0.0000025, 0.000005,
+    0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0,
+)
+
+
+class Histogram(object):
+    """Distribution of durations over fixed buckets."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        :param tuple buckets: sorted upper bounds of the buckets in seconds, longer
+            durations are counted in an extra overflow bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """
+        :param float percentile: 0 to 100
+        :return: upper bound of the bucket the percentile falls in, the
+            maximum for the overflow bucket
+        :rtype: float
+        """
+        if not self.count:
+            return None
+
+        rank = percentile / 100 * self.count
+        cumulative = 0
+
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+class InstrumentationCollector(object):
+    """
+    Aggregates parse timings in a histogram per stage, and the coercion
+    times in a histogram per object (value_name) as well. It can be shared
+    by parsers running in different threads.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._lock = threading.Lock()
+        self.stages = defaultdict(lambda: Histogram(buckets))
+        self.objects = defaultdict(lambda: Histogram(buckets))
+
+    def __call__(self, stage, seconds, value_name=None):
+        with self._lock:
+            self.stages[stage].observe(seconds)
+            if stage == STAGE_COERCE and value_name is not None:
+                self.objects[value_name].observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.objects.clear()
+
+    def report(self):
+        """
+        :return: the histograms per stage and per object, as dicts
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'stages': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+                'objects': {name: histogram.to_dict() for name, histogram in self.objects.items()},
+            }
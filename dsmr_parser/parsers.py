@@ -1,69 +1,195 @@
 import logging
 import re
+import uuid
+from collections import OrderedDict
 from binascii import unhexlify
 
 from ctypes import c_ushort
 from decimal import Decimal
+from time import perf_counter
 
 from dlms_cosem.connection import XDlmsApduFactory
+from dlms_cosem.exceptions import DecryptionError
 from dlms_cosem.protocol.xdlms import GeneralGlobalCipher
 
+from dsmr_parser import error_reporting
+from dsmr_parser.cipher import TelegramCipher
 from dsmr_parser.objects import MBusObject, MBusObjectPeak, CosemObject, ProfileGenericObject, Telegram
 from dsmr_parser.exceptions import ParseError, InvalidChecksumError
+from dsmr_parser.instrumentation import STAGE_DECRYPT, STAGE_CHECKSUM, STAGE_MATCH, STAGE_COERCE, STAGE_ADD, \
+    STAGE_TOTAL
 from dsmr_parser.value_types import timestamp
 
 logger = logging.getLogger(__name__)
 
 
+CHECKSUM = re.compile(r'![0-9A-Z]{1,4}')
+
+
+class ParseCache(object):
+    """
+    The telegram layouts and parsed lines a TelegramParser remembers between
+    telegrams (see TelegramParser._match() and TelegramParser._parse_line()).
+    The parser keeps one for all telegrams it parses, a connection passes
+    its own to parse() so the telegrams of other meters do not evict those
+    of its meter.
+
+    The cache is pickled without its contents. A process that unpickles it,
+    like a worker of a process pool, keeps the contents for the connection
+    in _worker_caches instead.
+    """
+
+    def __init__(self, key=None):
+        """
+        :param str key: identifies the connection, unique by default
+        """
+        self.key = key if key is not None else uuid.uuid4().hex
+        self._unpickled = False
+        self._clear()
+
+    def _clear(self):
+        self.parser_token = None
+        self.layouts = {}
+        self.lines = {}
+
+    def bind(self, parser):
+        """
+        :return: the layout and line caches for a parser, emptied when the
+            cache was used with another parser before
+        :rtype: tuple
+        """
+        if self._unpickled:
+            return _worker_cache(self.key).bind(parser)
+
+        if self.parser_token != parser._token:
+            self._clear()
+            self.parser_token = parser._token
+        return self.layouts, self.lines
+
+    def __getstate__(self):
+        return {'key': self.key}
+
+    def __setstate__(self, state):
+        self.key = state['key']
+        self._unpickled = True
+        self._clear()
+
+
+# The caches of the connections whose telegrams this process parsed for
+# another one (see ParseCache), least recently used first.
+_worker_caches = OrderedDict()
+WORKER_CACHE_SIZE = 1024
+
+
+def _worker_cache(key):
+    cache = _worker_caches.get(key)
+
+    if cache is None:
+        cache = _worker_caches[key] = ParseCache(key)
+        if len(_worker_caches) > WORKER_CACHE_SIZE:
+            _worker_caches.popitem(last=False)
+    else:
+        _worker_caches.move_to_end(key)
+
+    return cache
+
+
+def _obis_code(object, line):
+    """The OBIS code of a line, like 0-0:1.0.0, to report errors by."""
+    if isinstance(line, str) and '(' in line:
+        return line.partition('(')[0].strip()
+    return object["value_name"]
+
+
+def _record_stage(record, stage, start, value_name=None):
+    """Record the time since start, returning the start of the next stage."""
+    record(stage, perf_counter() - start, value_name)
+    return perf_counter()
+
+
 class TelegramParser(object):
     crc16_tab = []
 
-    def __init__(self, telegram_specification, apply_checksum_validation=True):
+    # Number of key pairs passed to parse() for which the cipher is kept.
+    CIPHER_CACHE_SIZE = 1024
+
+    # Number of telegram layouts for which the matched lines are kept, see _match().
+    LAYOUT_CACHE_SIZE = 64
+
+    # Number of parsed lines kept to reuse for identical lines, see _parse_line().
+    LINE_CACHE_SIZE = 1024
+
+    def __init__(self, telegram_specification, apply_checksum_validation=True,
+                 encryption_key=None, authentication_key=None, key_store=None, instrumentation=None,
+                 error_reporter=None):
         """
         :param telegram_specification: determines how the telegram is parsed
         :param apply_checksum_validation: validate checksum if applicable for
             telegram DSMR version (v4 and up).
+        :param str encryption_key: key to decrypt general_global_cipher telegrams with
+        :param str authentication_key: key to authenticate general_global_cipher telegrams with
+        :param KeyStore key_store: keys per meter, looked up by the system title of the telegram
+        :param instrumentation: called as instrumentation(stage, seconds, value_name) with the
+            time spent in each stage of parsing, see dsmr_parser.instrumentation
+        :param ErrorAggregator error_reporter: counts the lines and telegrams that fail to
+            parse, the module level aggregator of dsmr_parser.error_reporting by default
         :type telegram_specification: dict
         """
         self.apply_checksum_validation = apply_checksum_validation
         self.telegram_specification = telegram_specification
+        self.key_store = key_store
+        self.instrumentation = instrumentation
+        # None reports to the module level aggregator, which keeps the parser picklable for process pools.
+        self.error_reporter = error_reporter
+        self._cipher = TelegramCipher(encryption_key or "", authentication_key or "") \
+            if encryption_key or authentication_key else None
+        # identifies the parser to the ParseCache, in other processes as well
+        self._token = uuid.uuid4().hex
+        self._ciphers = {}
+        self._layouts = {}
+        self._lines = {}
         # Regexes are compiled once to improve performance
         self.telegram_specification_regexes = {
             object["obis_reference"]: re.compile(object["obis_reference"], re.DOTALL | re.MULTILINE)
             for object in self.telegram_specification['objects']
         }
 
-    def parse(self, telegram_data, encryption_key="", authentication_key="", throw_ex=False):  # noqa: C901
+    def __getstate__(self):
+        # The parser is pickled with every telegram parsed on a process pool, without its caches. Pass a
+        # ParseCache to parse() to keep them in the worker processes.
+        state = self.__dict__.copy()
+        state.update(_ciphers={}, _layouts={}, _lines={})
+        return state
+
+    def parse(self, telegram_data, encryption_key="", authentication_key="", throw_ex=False,  # noqa: C901
+              source=None, cache=None):
         """
         Parse telegram from string to dict.
         The telegram str type makes python 2.x integration easier.
 
         :param str telegram_data: full telegram from start ('/') to checksum
             ('!ABCD') including line endings in between the telegram's lines
-        :param str encryption_key: encryption key
+        :param str encryption_key: encryption key, overrides the keys given to
+            the parser
         :param str authentication_key: authentication key
+        :param source: the meter or connection the telegram came from, to
+            report the lines that fail to parse by
+        :param ParseCache cache: the cache of the meter the telegram came
+            from, the cache of the parser by default
         :rtype: Telegram
         :raises ParseError:
         :raises InvalidChecksumError:
         """
 
+        record = self.instrumentation
+        if record is not None:
+            parse_start = start = perf_counter()
+
         if "general_global_cipher" in self.telegram_specification:
             if self.telegram_specification["general_global_cipher"]:
-                enc_key = unhexlify(encryption_key)
-                auth_key = unhexlify(authentication_key)
-                telegram_data = unhexlify(telegram_data)
-                apdu = XDlmsApduFactory.apdu_from_bytes(apdu_bytes=telegram_data)
-                if apdu.security_control.security_suite != 0:
-                    logger.warning("Untested security suite")
-                if apdu.security_control.authenticated and not apdu.security_control.encrypted:
-                    logger.warning("Untested authentication only")
-                if not apdu.security_control.authenticated and not apdu.security_control.encrypted:
-                    logger.warning("Untested not encrypted or authenticated")
-                if apdu.security_control.compressed:
-                    logger.warning("Untested compression")
-                if apdu.security_control.broadcast_key:
-                    logger.warning("Untested broadcast key")
-                telegram_data = apdu.to_plain_apdu(enc_key, auth_key).decode("ascii")
+                telegram_data = self._decrypt(telegram_data, encryption_key, authentication_key)
+                if record is not None:
+                    start = _record_stage(record, STAGE_DECRYPT, start)
             else:
                 try:
                     if unhexlify(telegram_data[0:2])[0] == GeneralGlobalCipher.TAG:
@@ -80,38 +206,201 @@ class TelegramParser(object):
                 pass
 
         if self.apply_checksum_validation and self.telegram_specification['checksum_support']:
-            self.validate_checksum(telegram_data)
+            # Merged specifications also accept telegrams of meters without checksum.
+            if not self.telegram_specification.get('checksum_optional') or CHECKSUM.search(telegram_data):
+                self.validate_checksum(telegram_data)
+                if record is not None:
+                    start = _record_stage(record, STAGE_CHECKSUM, start)
 
+        layouts, lines = (self._layouts, self._lines) if cache is None else cache.bind(self)
         telegram = Telegram()
 
-        for object in self.telegram_specification['objects']:
-            pattern = self.telegram_specification_regexes[object["obis_reference"]]
-            matches = pattern.findall(telegram_data)
+        for object, matches in self._match(telegram_data, layouts):
+            if record is not None:
+                start = _record_stage(record, STAGE_MATCH, start, object["value_name"])
 
             # Some signatures are optional and may not be present,
             # so only parse lines that match
             for match in matches:
                 try:
-                    dsmr_object = object["value_parser"].parse(match)
-                except ParseError:
-                    logger.error(
-                        "ignore line with signature {}, because parsing failed.".format(object["obis_reference"]),
-                        exc_info=True
-                    )
+                    dsmr_object = self._parse_line(object, match, lines)
+                except ParseError as e:
+                    # The line is ignored, reported without formatting a traceback for every line.
+                    self._report_error(e, _obis_code(object, match), source)
                     if throw_ex:
                         raise
                 except Exception as err:
                     logger.error("Unexpected {}: {}".format(type(err), err))
                     raise
                 else:
+                    if record is not None:
+                        start = _record_stage(record, STAGE_COERCE, start, object["value_name"])
                     telegram.add(
                         obis_reference=object["obis_reference"],
                         dsmr_object=dsmr_object,
                         obis_name=object["value_name"]
                     )
+                    if record is not None:
+                        start = _record_stage(record, STAGE_ADD, start, object["value_name"])
+
+        if record is not None:
+            record(STAGE_TOTAL, perf_counter() - parse_start, None)
 
         return telegram
 
+    def _parse_line(self, object, line, lines):
+        """
+        Parse the line of an object, reusing the object parsed from an
+        identical line before. Most lines, like the equipment identifier, the
+        meter readings between increments and the logs, are the same in
+        consecutive telegrams. The parsed objects are therefore shared between
+        telegrams and should not be modified.
+
+        :rtype: DSMRObject
+        :raises ParseError:
+        """
+        key = (object["obis_reference"], line)
+        dsmr_object = lines.get(key)
+
+        if dsmr_object is None:
+            dsmr_object = object["value_parser"].parse(line)
+            if self.LINE_CACHE_SIZE:
+                if len(lines) >= self.LINE_CACHE_SIZE:
+                    lines.clear()
+                lines[key] = dsmr_object
+
+        return dsmr_object
+
+    def _match(self, telegram_data, layouts):
+        """
+        Find the lines of every object of the specification.
+
+        A meter sends the same lines in the same order with every telegram,
+        only the values change. So the lines matched by each object are
+        remembered per layout: the OBIS part of every line (before the first
+        '('). Telegrams with a known layout are split into lines and handed
+        out without running the regexes. This relies on the obis_reference
+        patterns matching on the OBIS part of the lines only, as all patterns
+        in obis_references do.
+
+        :return: (object, matched lines) pairs in the order of the specification
+        :rtype: generator
+        """
+        if self.LAYOUT_CACHE_SIZE:
+            lines = telegram_data.split('\n')
+            # The checksum differs for every telegram, the line endings are part of the layout.
+            layout = tuple('!' if line[:1] == '!' else line.partition('(')[0] + line[-1:] for line in lines)
+
+            try:
+                plan = layouts[layout]
+            except KeyError:
+                if len(layouts) >= self.LAYOUT_CACHE_SIZE:
+                    layouts.clear()
+                plan = layouts[layout] = self._plan_layout(telegram_data, lines)
+
+            if plan is not None:
+                for object, spans in plan:
+                    yield object, ['\n'.join(lines[start:end]) + '\n' for start, end in spans]
+                return
+
+        for object in self.telegram_specification['objects']:
+            yield object, self.telegram_specification_regexes[object["obis_reference"]].findall(telegram_data)
+
+    def _plan_layout(self, telegram_data, lines):
+        """
+        :return: (object, (start line, end line) of every match) pairs, None
+            when the matches can not be expressed in whole lines
+        :rtype: tuple
+        """
+        line_numbers = {}
+        offset = 0
+        for line_number, line in enumerate(lines):
+            line_numbers[offset] = line_number
+            offset += len(line) + 1
+
+        plan = []
+        for object in self.telegram_specification['objects']:
+            pattern = self.telegram_specification_regexes[object["obis_reference"]]
+            if pattern.groups:
+                # findall() returns the groups instead of the lines
+                return None
+
+            spans = []
+            for match in pattern.finditer(telegram_data):
+                start, end = line_numbers.get(match.start()), line_numbers.get(match.end())
+                if start is None or end is None or end == start:
+                    return None
+                spans.append((start, end))
+
+            plan.append((object, tuple(spans)))
+
+        return tuple(plan)
+
+    def parse_all(self, telegrams, encryption_key="", authentication_key="", throw_ex=False, source=None):
+        """
+        Parse a run of telegrams, for example a batch of encrypted frames of
+        one meter. Telegrams that can not be parsed or decrypted are reported
+        to the error_reporter and skipped, unless throw_ex is set.
+
+        :param telegrams: iterable of telegram strings
+        :rtype: generator
+        """
+        for telegram_data in telegrams:
+            try:
+                yield self.parse(telegram_data, encryption_key, authentication_key, throw_ex, source)
+            except (ParseError, DecryptionError) as e:
+                if throw_ex:
+                    raise
+                self._report_error(e, source=source)
+
+    def _report_error(self, error, obis_reference=None, source=None):
+        error_reporter = self.error_reporter if self.error_reporter is not None else error_reporting.aggregator
+        error_reporter.report(error, obis_reference, source)
+
+    def _get_cipher(self, apdu, encryption_key, authentication_key):
+        if encryption_key or authentication_key:
+            keys = (encryption_key, authentication_key)
+            if keys not in self._ciphers:
+                if len(self._ciphers) >= self.CIPHER_CACHE_SIZE:
+                    self._ciphers.clear()
+                self._ciphers[keys] = TelegramCipher(encryption_key, authentication_key)
+            return self._ciphers[keys]
+
+        if self.key_store is not None:
+            try:
+                return self.key_store.get_cipher(apdu.system_title)
+            except KeyError:
+                raise ParseError("No keys for system title {}".format(apdu.system_title.hex()))
+
+        if self._cipher is None:
+            # Fails on validating the (missing) keys
+            self._cipher = TelegramCipher("", "")
+
+        return self._cipher
+
+    def _decrypt(self, telegram_data, encryption_key, authentication_key):
+        """
+        :param str telegram_data: hex encoded general_global_cipher frame
+        :rtype: str
+        """
+        apdu = XDlmsApduFactory.apdu_from_bytes(apdu_bytes=unhexlify(telegram_data))
+        if apdu.security_control.security_suite != 0:
+            logger.warning("Untested security suite")
+        if apdu.security_control.authenticated and not apdu.security_control.encrypted:
+            logger.warning("Untested authentication only")
+        if not apdu.security_control.authenticated and not apdu.security_control.encrypted:
+            logger.warning("Untested not encrypted or authenticated")
+        if apdu.security_control.compressed:
+            logger.warning("Untested compression")
+        if apdu.security_control.broadcast_key:
+            logger.warning("Untested broadcast key")
+
+        cipher = self._get_cipher(apdu, encryption_key, authentication_key)
+        try:
+            return cipher.decrypt(apdu).decode("ascii")
+        except NotImplementedError as e:
+            raise ParseError("Unsupported general_global_cipher frame: {}".format(e))
+
     @staticmethod
     def validate_checksum(telegram):
         """
@@ -272,7 +561,11 @@ class MaxDemandParser(DSMRObjectParser):
 
         objects = []
 
-        count = int(values[0])
+        try:
+            count = int(values[0])
+        except (IndexError, ValueError):
+            raise ParseError("Invalid '%s' line for '%s'", line, self)
+
         for i in range(1, count + 1):
             timestamp_month = ValueParser(timestamp).parse(values[i * 3 + 0])
             timestamp_occurred = ValueParser(timestamp).parse(values[i * 3 + 1])
@@ -362,10 +655,11 @@ class ProfileGenericParser(DSMRObjectParser):
             else:
                 bufferValueParsers = self.parsers_for_unidentified
         # add the parsers for the encountered value type z times
+        value_formats = list(self.value_formats)
         for _ in range(buffer_length):
-            self.value_formats.extend(bufferValueParsers)
+            value_formats.extend(bufferValueParsers)
 
-        return [self.value_formats[i].parse(value) for i, value in enumerate(values)]
+        return [value_formats[i].parse(value) for i, value in enumerate(values)]
 
     def parse(self, line):
         return ProfileGenericObject(
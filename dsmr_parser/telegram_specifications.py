@@ -1,6 +1,9 @@
 from decimal import Decimal
 from copy import deepcopy
 
+import itertools
+import re
+
 from dsmr_parser import obis_references as obis
 from dsmr_parser.parsers import CosemParser, ValueParser, MBusParser, ProfileGenericParser, MaxDemandParser
 from dsmr_parser.value_types import timestamp
@@ -1368,3 +1371,180 @@ EON_HUNGARY = {
         }
     ]
 }
+
+
+CONFLICT_FIRST = 'first'
+CONFLICT_LAST = 'last'
+CONFLICT_ERROR = 'error'
+
+
+def _parser_signature(value):
+    """Structure of a value parser, to compare parsers that are different instances."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_parser_signature(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((key, _parser_signature(item)) for key, item in value.items()))
+
+    if hasattr(value, '__dict__') and not callable(value):
+        return type(value), _parser_signature(vars(value))
+
+    return value
+
+
+# A literal character, an escaped one, \d or a character class in the OBIS
+# code of an obis_reference pattern.
+_OBIS_TOKEN = re.compile(r'\\d|\\(.)|\[([^\]]+)\]|([^\\\[.+*?^$(){}|])')
+
+
+def _obis_codes(obis_reference):
+    """
+    The OBIS codes matched by an obis_reference pattern, like 0-0:96.1.1 to
+    9-9:96.1.1 for obis.EQUIPMENT_IDENTIFIER, or None when the pattern can not
+    be expanded.
+    """
+    if not obis_reference.startswith('^') or '.+?' not in obis_reference:
+        return None
+
+    code = obis_reference[1:obis_reference.index('.+?')]
+    choices = []
+    position = 0
+
+    while position < len(code):
+        match = _OBIS_TOKEN.match(code, position)
+        if match is None:
+            return None
+
+        escaped, character_class, literal = match.groups()
+        if match.group(0) == r'\d':
+            choices.append('0123456789')
+        elif escaped is not None:
+            choices.append(escaped)
+        elif character_class is not None:
+            choices.append(re.sub(r'(.)-(.)', lambda r: ''.join(map(chr, range(ord(r.group(1)), ord(r.group(2)) + 1))),
+                                  character_class))
+        else:
+            choices.append(literal)
+        position = match.end()
+
+    return {''.join(characters) for characters in itertools.product(*choices)}
+
+
+def _overlaps(object, other):
+    """Whether the obis_reference patterns of two objects can match the same line."""
+    if object['obis_reference'] == other['obis_reference']:
+        return True
+
+    codes, other_codes = object['_obis_codes'], other['_obis_codes']
+
+    if codes is not None and other_codes is not None:
+        return not codes.isdisjoint(other_codes)
+
+    # Fall back to matching sample lines when one of the patterns could not be expanded.
+    for samples, pattern in ((codes, other['obis_reference']), (other_codes, object['obis_reference'])):
+        if samples is not None and \
+                any(re.match(pattern, code + '(0)\r\n(0)\r\n', re.DOTALL | re.MULTILINE) for code in samples):
+            return True
+
+    return False
+
+
+def _same_definition(object, other):
+    return object['value_name'] == other['value_name'] and \
+        _parser_signature(object['value_parser']) == _parser_signature(other['value_parser'])
+
+
+def _without(object, others):
+    """
+    :return: the object narrowed to the OBIS codes the other objects do not
+        match, or None when they match all of them
+    :rtype: dict
+    """
+    codes = object['_obis_codes']
+
+    if codes is None or any(other['_obis_codes'] is None for other in others):
+        # Patterns that can not be expanded can not be narrowed either.
+        return None if others else object
+
+    remaining = codes.difference(*(other['_obis_codes'] for other in others))
+
+    if not remaining:
+        return None
+    if remaining == codes:
+        return object
+
+    obis_reference = object['obis_reference']
+    pattern = '^(?:{}){}'.format('|'.join(re.escape(code) for code in sorted(remaining)),
+                                 obis_reference[obis_reference.index('.+?'):])
+    return dict(object, obis_reference=pattern, _obis_codes=remaining)
+
+
+def merge_specifications(*specifications, on_conflict=CONFLICT_FIRST):
+    """
+    Merge telegram specifications into a superset specification, so telegrams
+    of a fleet of different meters can be parsed by a single TelegramParser.
+
+    Objects of different specifications whose patterns match the same OBIS
+    codes (like obis.EQUIPMENT_IDENTIFIER and obis.BELGIUM_EQUIPMENT_IDENTIFIER,
+    which both match 0-0:96.1.1) and that are parsed differently (with another
+    value parser or value name) are a conflict. It is resolved by taking the
+    definitions of the first or last specification the OBIS code appears in,
+    or raises a ValueError with CONFLICT_ERROR. An object that only partly
+    overlaps the objects kept is narrowed to the OBIS codes they do not match
+    (its obis_reference is then a pattern of those codes), so every line of
+    every specification is still parsed. The telegrams of the meter whose
+    specification is merged first parse as with that specification alone,
+    except for lines it does not define but the others do.
+
+    When any of the specifications supports checksums they are validated for
+    telegrams that have one, telegrams of meters without checksum support
+    are accepted as well.
+
+    :param dict specifications: telegram specifications, encrypted ones are not supported
+    :param str on_conflict: CONFLICT_FIRST, CONFLICT_LAST or CONFLICT_ERROR
+    :rtype: dict
+    """
+    if on_conflict not in (CONFLICT_FIRST, CONFLICT_LAST, CONFLICT_ERROR):
+        raise ValueError("Unknown conflict resolution: {}".format(on_conflict))
+
+    objects = []
+
+    for index, specification in enumerate(specifications):
+        if specification.get('general_global_cipher'):
+            raise ValueError("Encrypted telegram specifications can not be merged")
+
+        for object in specification['objects']:
+            object = dict(object, _obis_codes=_obis_codes(object['obis_reference']), _specification=index)
+            # Objects of the same specification may overlap (like the M-Bus and
+            # equipment identifiers), only compare with the previous specifications.
+            overlapping = [existing for existing in objects
+                           if existing['_specification'] < index and _overlaps(object, existing)]
+            # Codes already parsed the same way are no conflict, even when other objects match them too.
+            unmatched = _without(object, [existing for existing in overlapping if _same_definition(object, existing)])
+            conflicting = [existing for existing in overlapping
+                           if unmatched is not None and not _same_definition(object, existing) and
+                           _overlaps(unmatched, existing)]
+
+            if conflicting and on_conflict == CONFLICT_ERROR:
+                raise ValueError("{} ({}) is parsed differently by the specifications, as {}".format(
+                    object['value_name'], object['obis_reference'],
+                    ', '.join(existing['value_name'] for existing in conflicting)))
+
+            if on_conflict == CONFLICT_LAST:
+                narrowed = (_without(existing, [object]) if any(existing is o for o in overlapping) else existing
+                            for existing in objects)
+                objects = [existing for existing in narrowed if existing is not None]
+            else:
+                object = _without(object, overlapping)
+
+            if object is not None:
+                objects.append(object)
+
+    checksum_support = [specification['checksum_support'] for specification in specifications]
+
+    return {
+        'checksum_support': any(checksum_support),
+        'checksum_optional': not all(checksum_support),
+        'objects': [{key: value for key, value in object.items() if key not in ('_obis_codes', '_specification')}
+                    for object in objects]
+    }
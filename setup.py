@@ -12,9 +12,11 @@ setup(
     install_requires=[
         'pyserial>=3,<4',
         'pyserial-asyncio-fast>=0.11',
-        'Tailer==0.4.1',
         'dlms_cosem==21.3.2'
     ],
+    extras_require={
+        'zstd': ['zstandard'],
+    },
     entry_points={
         'console_scripts': ['dsmr_console=dsmr_parser.__main__:console']
     },
@@ -0,0 +1,308 @@
+"""
+Performance benchmarks of the parsing hot path and the client framing.
+
+Results are written as JSON, so runs of different commits can be compared:
+
+    python -m test.benchmark --output before.json
+    git checkout feature-branch
+    python -m test.benchmark --output after.json --compare before.json
+
+With --compare the exit status is 1 when a benchmark got slower than the
+threshold (10% by default).
+
+Benchmarks ending in /cold run with a parser without layout and line caches,
+the others parse the same telegram over and over, and mostly measure cache hits.
+"""
+
+from binascii import unhexlify
+import argparse
+import asyncio
+import json
+import platform
+import re
+import socket
+import subprocess
+import sys
+import time
+
+from dlms_cosem.protocol.xdlms import GeneralGlobalCipher
+from dlms_cosem.security import SecurityControlField, encrypt
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.cipher import TelegramCipher
+from dsmr_parser.clients.protocol import DSMRProtocol
+from dsmr_parser.clients.telegram_buffer import TelegramBuffer
+from dsmr_parser.parsers import TelegramParser
+from test import example_telegrams
+
+ENCRYPTION_KEY = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+AUTHENTICATION_KEY = "BBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBB"
+
+# (specification name, example telegram) pairs parsed per specification.
+PARSE_CASES = (
+    ('V2_2', 'TELEGRAM_V2_2'),
+    ('V3', 'TELEGRAM_V3'),
+    ('V4', 'TELEGRAM_V4_2'),
+    ('V5', 'TELEGRAM_V5'),
+    ('V5', 'TELEGRAM_V5_TWO_MBUS'),
+    ('BELGIUM_FLUVIUS', 'TELEGRAM_FLUVIUS_V171'),
+    ('Q3D', 'TELEGRAM_ESY5Q3DB1024_V304'),
+    ('ISKRA_IE', 'TELEGRAM_ISKRA_IE'),
+    ('EON_HUNGARY', 'TELEGRAM_V5_EON_HU'),
+)
+
+BUFFER_CHUNK_SIZES = (1, 64, 1024, 64 * 1024)
+
+# Telegrams in the stream used for the framing and protocol benchmarks.
+STREAM_TELEGRAMS = 200
+
+
+def cold_parser(telegram_specification):
+    """
+    :return: a parser without layout and line caches, so every parse takes the
+        path of a telegram that was not seen before
+    :rtype: TelegramParser
+    """
+    parser = TelegramParser(telegram_specification)
+    parser.LAYOUT_CACHE_SIZE = parser.LINE_CACHE_SIZE = 0
+    return parser
+
+
+def encrypt_telegram(telegram):
+    """:return: a hex encoded general_global_cipher frame, as sent by SAGEMCOM_T210_D_R meters"""
+    security_control = SecurityControlField(security_suite=0, authenticated=True, encrypted=True)
+    system_title = b"SYSTEMID"
+    invocation_counter = 0x10000001
+
+    encrypted = encrypt(
+        security_control=security_control,
+        key=unhexlify(ENCRYPTION_KEY),
+        auth_key=unhexlify(AUTHENTICATION_KEY),
+        system_title=system_title,
+        invocation_counter=invocation_counter,
+        plain_text=telegram.encode("ascii"),
+    )
+
+    frame = bytearray([GeneralGlobalCipher.TAG, len(system_title)])
+    frame.extend(system_title)
+    frame.append(0x82)
+    frame.extend((len(encrypted) + 5).to_bytes(2, "big"))
+    frame.extend(security_control.to_bytes())
+    frame.extend(invocation_counter.to_bytes(4, "big"))
+    frame.extend(encrypted)
+
+    return frame.hex()
+
+
+def _parse_benchmarks():
+    for specification_name, telegram_name in PARSE_CASES:
+        parser = TelegramParser(getattr(telegram_specifications, specification_name))
+        telegram = getattr(example_telegrams, telegram_name)
+        yield 'parse/{}/{}'.format(specification_name, telegram_name), 1, lambda p=parser, t=telegram: p.parse(t)
+
+        parser = cold_parser(getattr(telegram_specifications, specification_name))
+        yield 'parse/{}/{}/cold'.format(specification_name, telegram_name), 1, \
+            lambda p=parser, t=telegram: p.parse(t)
+
+
+def _checksum_benchmarks():
+    telegram = example_telegrams.TELEGRAM_V5
+    yield 'checksum/validate', 1, lambda: TelegramParser.validate_checksum(telegram)
+    yield 'checksum/crc16', 1, lambda: TelegramParser.crc16(telegram[:telegram.index('!') + 1])
+
+
+def _buffer_benchmarks():
+    stream = example_telegrams.TELEGRAM_V5 * STREAM_TELEGRAMS
+
+    for chunk_size in BUFFER_CHUNK_SIZES:
+        chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+        def frame(chunks=chunks):
+            telegram_buffer = TelegramBuffer()
+            for chunk in chunks:
+                telegram_buffer.append(chunk)
+                for _ in telegram_buffer.get_all():
+                    pass
+
+        yield 'buffer/chunk_{}'.format(chunk_size), STREAM_TELEGRAMS, frame
+
+
+def _decryption_benchmarks():
+    frame = encrypt_telegram(example_telegrams.TELEGRAM_SAGEMCOM_T210_D_R)
+    apdu = GeneralGlobalCipher.from_bytes(unhexlify(frame))
+    cipher = TelegramCipher(ENCRYPTION_KEY, AUTHENTICATION_KEY)
+    parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R)
+    cold = cold_parser(telegram_specifications.SAGEMCOM_T210_D_R)
+
+    yield 'decrypt/cipher', 1, lambda: cipher.decrypt(apdu)
+    yield 'decrypt/parse', 1, lambda: parser.parse(frame, ENCRYPTION_KEY, AUTHENTICATION_KEY)
+    yield 'decrypt/parse/cold', 1, lambda: cold.parse(frame, ENCRYPTION_KEY, AUTHENTICATION_KEY)
+
+
+def _json_benchmarks():
+    telegram = TelegramParser(telegram_specifications.V5).parse(example_telegrams.TELEGRAM_V5)
+    yield 'to_json/V5', 1, telegram.to_json
+
+
+def _protocol_benchmarks():
+    data = (example_telegrams.TELEGRAM_V5 * STREAM_TELEGRAMS).encode('ascii')
+
+    async def receive(telegram_parser):
+        loop = asyncio.get_running_loop()
+        received = asyncio.Event()
+        count = 0
+
+        def telegram_callback(telegram):
+            nonlocal count
+            count += 1
+            if count == STREAM_TELEGRAMS:
+                received.set()
+
+        meter, reader = socket.socketpair()
+        with meter:
+            transport, _ = await loop.connect_accepted_socket(
+                lambda: DSMRProtocol(loop, telegram_parser, telegram_callback=telegram_callback), reader)
+            meter.setblocking(False)
+            await loop.sock_sendall(meter, data)
+            await received.wait()
+            transport.close()
+
+    telegram_parser = TelegramParser(telegram_specifications.V5)
+    yield 'protocol/socketpair', STREAM_TELEGRAMS, lambda p=telegram_parser: asyncio.run(receive(p))
+
+    telegram_parser = cold_parser(telegram_specifications.V5)
+    yield 'protocol/socketpair/cold', STREAM_TELEGRAMS, lambda p=telegram_parser: asyncio.run(receive(p))
+
+
+BENCHMARKS = (
+    _parse_benchmarks,
+    _checksum_benchmarks,
+    _buffer_benchmarks,
+    _decryption_benchmarks,
+    _json_benchmarks,
+    _protocol_benchmarks,
+)
+
+
+def measure(function, min_time=0.2, repeat=5):
+    """
+    :return: the best time of a single call in seconds, out of repeat runs of
+        at least min_time seconds each
+    :rtype: float
+    """
+    # Calibrate the number of calls per run.
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or calls >= 1 << 20:
+            break
+        calls *= 10
+
+    calls = max(1, int(calls * min_time / max(elapsed, 1e-9)))
+    best = elapsed / calls if calls == 1 else None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def _commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern=None, min_time=0.2, repeat=5):
+    """
+    Run the benchmarks whose name matches the regular expression pattern.
+
+    :return: the results, with the seconds per telegram of every benchmark
+    :rtype: dict
+    """
+    results = {}
+
+    for benchmarks in BENCHMARKS:
+        for name, telegrams, function in benchmarks():
+            if pattern and not re.search(pattern, name):
+                continue
+
+            seconds = measure(function, min_time, repeat) / telegrams
+            results[name] = {
+                'seconds_per_telegram': seconds,
+                'telegrams_per_second': 1 / seconds,
+            }
+
+    return {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    :return: (name, relative change) of benchmarks in both results, a
+        positive change is slower, and the names of the regressions
+    :rtype: tuple
+    """
+    changes = []
+    regressions = []
+
+    for name, result in sorted(current['results'].items()):
+        if name not in baseline['results']:
+            continue
+
+        before = baseline['results'][name]['seconds_per_telegram']
+        change = result['seconds_per_telegram'] / before - 1
+        changes.append((name, change))
+
+        if change > threshold:
+            regressions.append(name)
+
+    return changes, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dsmr_parser.')
+    parser.add_argument('--filter', help='only run benchmarks matching this regular expression')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as regression (default 0.1)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per measurement (default 0.2)')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements per benchmark (default 5)')
+    args = parser.parse_args(argv)
+
+    current = run(args.filter, args.min_time, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if not args.compare:
+        for name, result in sorted(current['results'].items()):
+            print('{:<50} {:>12.1f} telegrams/s'.format(name, result['telegrams_per_second']))
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    changes, regressions = compare(baseline, current, args.threshold)
+    for name, change in changes:
+        print('{:<50} {:>+8.1%}{}'.format(name, change, '  REGRESSION' if name in regressions else ''))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
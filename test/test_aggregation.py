@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import json
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.aggregation import COUNTER, GAUGE, WindowAggregator
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V2_2, TELEGRAM_V5
+
+
+class WindowAggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False)
+        self.aggregator = WindowAggregator(window=60)
+
+    def _telegram(self, minute, second, usage, tariff_1):
+        """The V5 telegram at 19:<minute>:<second> local time (18:<minute> UTC) with the given values."""
+        return self.parser.parse(
+            TELEGRAM_V5
+            .replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(1701021{:03d}{:02d}W)'.format(900 + minute, second))
+            .replace('1-0:1.7.0(00.244*kW)', '1-0:1.7.0({}*kW)'.format(usage))
+            .replace('1-0:1.8.1(000004.426*kWh)', '1-0:1.8.1({}*kWh)'.format(tariff_1))
+        )
+
+    def test_window(self):
+        self.assertEqual(self.aggregator.add(self._telegram(20, 0, '00.200', '000004.000')), [])
+        self.assertEqual(self.aggregator.add(self._telegram(20, 30, '00.600', '000004.250')), [])
+        self.assertEqual(self.aggregator.add(self._telegram(20, 59, '00.400', '000004.500')), [])
+
+        window, = self.aggregator.add(self._telegram(21, 0, '01.000', '000005.000'))
+
+        self.assertEqual(window.start, datetime(2017, 1, 2, 18, 20, tzinfo=timezone.utc))
+        self.assertEqual(window.end, datetime(2017, 1, 2, 18, 21, tzinfo=timezone.utc))
+        self.assertEqual(window.count, 3)
+
+        usage = window.fields['CURRENT_ELECTRICITY_USAGE']
+        self.assertEqual((usage.min, usage.max, usage.mean, usage.last),
+                         (Decimal('0.200'), Decimal('0.600'), Decimal('0.400'), Decimal('0.400')))
+        self.assertEqual(usage.unit, 'kW')
+
+        tariff_1 = window.fields['ELECTRICITY_USED_TARIFF_1']
+        self.assertEqual((tariff_1.first, tariff_1.last, tariff_1.delta),
+                         (Decimal('4.000'), Decimal('4.500'), Decimal('0.500')))
+
+    def test_counter_delta_from_previous_window(self):
+        self.aggregator.add(self._telegram(20, 50, '00.200', '000004.000'))
+        self.aggregator.add(self._telegram(21, 10, '00.200', '000004.300'))
+        self.aggregator.add(self._telegram(21, 50, '00.200', '000004.400'))
+
+        window = self.aggregator.flush()
+
+        # Includes the increment between the last telegram of the previous window and the first of this one.
+        self.assertEqual(window.fields['ELECTRICITY_USED_TARIFF_1'].delta, Decimal('0.400'))
+        self.assertIsNone(self.aggregator.flush())
+
+    def test_late_telegrams_skipped(self):
+        self.aggregator.add(self._telegram(21, 0, '00.200', '000004.000'))
+        self.aggregator.add(self._telegram(20, 59, '09.000', '000004.000'))
+
+        window = self.aggregator.flush()
+
+        self.assertEqual(self.aggregator.late_telegrams, 1)
+        self.assertEqual(window.count, 1)
+        self.assertEqual(window.fields['CURRENT_ELECTRICITY_USAGE'].max, Decimal('0.200'))
+
+    def test_sources(self):
+        self.aggregator.add(self._telegram(20, 0, '00.200', '000004.000'), 'meter-1')
+        self.aggregator.add(self._telegram(20, 0, '00.600', '000004.000'), 'meter-2')
+
+        closed = self.aggregator.add(self._telegram(21, 0, '00.200', '000004.000'), 'meter-1')
+
+        self.assertEqual([window.source_id for window in closed], ['meter-1'])
+        self.assertEqual(self.aggregator.flush('meter-2').fields['CURRENT_ELECTRICITY_USAGE'].max, Decimal('0.600'))
+
+    def test_quarter_hours_and_fields(self):
+        aggregator = WindowAggregator(window=900, fields={
+            'CURRENT_ELECTRICITY_USAGE': GAUGE,
+            'ELECTRICITY_DELIVERED_TARIFF_1': COUNTER,
+        })
+
+        aggregator.add(self._telegram(20, 0, '00.200', '000004.000'))
+        window = aggregator.flush()
+
+        self.assertEqual(window.start, datetime(2017, 1, 2, 18, 15, tzinfo=timezone.utc))
+        self.assertEqual(sorted(window.fields), ['CURRENT_ELECTRICITY_USAGE', 'ELECTRICITY_DELIVERED_TARIFF_1'])
+
+    def test_without_timestamp(self):
+        telegram = TelegramParser(telegram_specifications.V2_2).parse(TELEGRAM_V2_2)
+        timestamp = datetime(2024, 5, 1, 12, 0, 30, tzinfo=timezone.utc)
+
+        self.aggregator.add(telegram, timestamp=timestamp)
+        window = self.aggregator.flush()
+
+        self.assertEqual(window.start, datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc))
+        self.assertEqual(window.fields['CURRENT_ELECTRICITY_USAGE'].last, Decimal('1.01'))
+
+    def test_invalid_timestamp(self):
+        telegram = self.parser.parse(TELEGRAM_V5.replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(000000000000W)'))
+        self.assertIsNone(telegram.P1_MESSAGE_TIMESTAMP.value)
+
+        self.aggregator.add(telegram)
+        window = self.aggregator.flush()
+
+        # Placed by the time it was added instead.
+        self.assertLessEqual(window.start, datetime.now(timezone.utc))
+        self.assertGreater(window.end, datetime.now(timezone.utc) - timedelta(seconds=60))
+
+    def test_to_json(self):
+        self.aggregator.add(self._telegram(20, 0, '00.200', '000004.000'))
+        data = json.loads(self.aggregator.flush().to_json())
+
+        self.assertEqual(data['start'], '2017-01-02T18:20:00+00:00')
+        self.assertEqual(data['fields']['CURRENT_ELECTRICITY_USAGE'],
+                         {'min': 0.2, 'max': 0.2, 'mean': 0.2, 'last': 0.2, 'unit': 'kW'})
+        self.assertEqual(data['fields']['ELECTRICITY_USED_TARIFF_1'],
+                         {'first': 4.0, 'last': 4.0, 'delta': 0.0, 'unit': 'kWh'})
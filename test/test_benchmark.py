@@ -0,0 +1,32 @@
+import unittest
+
+from dsmr_parser import telegram_specifications
+from test import benchmark
+from test.example_telegrams import TELEGRAM_V5
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_run(self):
+        results = benchmark.run('to_json|decrypt/cipher', min_time=0.001, repeat=1)
+
+        self.assertEqual(sorted(results['results']), ['decrypt/cipher', 'to_json/V5'])
+        self.assertGreater(results['results']['to_json/V5']['telegrams_per_second'], 0)
+
+    def test_compare(self):
+        baseline = {'results': {'a': {'seconds_per_telegram': 1.0}, 'b': {'seconds_per_telegram': 1.0}}}
+        current = {'results': {'a': {'seconds_per_telegram': 1.05}, 'b': {'seconds_per_telegram': 1.5},
+                               'c': {'seconds_per_telegram': 1.0}}}
+
+        changes, regressions = benchmark.compare(baseline, current, threshold=0.1)
+
+        self.assertEqual([name for name, _ in changes], ['a', 'b'])
+        self.assertEqual(regressions, ['b'])
+
+    def test_cold_parser(self):
+        parser = benchmark.cold_parser(telegram_specifications.V5)
+        parser.parse(TELEGRAM_V5)
+        parser.parse(TELEGRAM_V5)
+
+        self.assertEqual(parser._layouts, {})
+        self.assertEqual(parser._lines, {})
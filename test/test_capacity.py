@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.capacity import CapacityTariffTracker
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_FLUVIUS_V171
+
+
+class CapacityTariffTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = TelegramParser(telegram_specifications.BELGIUM_FLUVIUS, apply_checksum_validation=False)
+        self.tracker = CapacityTariffTracker()
+
+    def _telegram(self, time='135409', average='02.351', power='00.000'):
+        return self.parser.parse(
+            TELEGRAM_FLUVIUS_V171
+            .replace('0-0:1.0.0(200512135409S)', '0-0:1.0.0(200512{}S)'.format(time))
+            .replace('1-0:1.4.0(02.351*kW)', '1-0:1.4.0({}*kW)'.format(average))
+            .replace('1-0:1.7.0(00.000*kW)', '1-0:1.7.0({}*kW)'.format(power))
+        )
+
+    def test_state(self):
+        self.assertIsNone(self.tracker.update(self._telegram(power='03.000')))
+
+        self.assertEqual(self.tracker.quarter_start, datetime(2020, 5, 12, 11, 45, tzinfo=timezone.utc))
+        self.assertEqual(self.tracker.current_average, Decimal('2.351'))
+        self.assertEqual(self.tracker.month_peak, Decimal('2.589'))
+        self.assertEqual(self.tracker.month_peak_time, datetime(2020, 5, 9, 11, 45, 58, tzinfo=timezone.utc))
+
+        # 549 of 900 seconds passed
+        projected = (Decimal('2.351') * 549 + Decimal('3.000') * 351) / 900
+        self.assertEqual(self.tracker.projected_average, projected)
+        self.assertEqual(self.tracker.projected_month_peak, projected)
+
+    def test_projection_below_month_peak(self):
+        self.tracker.update(self._telegram(average='01.000', power='01.000'))
+
+        self.assertEqual(self.tracker.projected_average, Decimal('1.000'))
+        self.assertEqual(self.tracker.projected_month_peak, Decimal('2.589'))
+
+    def test_completed_quarter(self):
+        self.tracker.update(self._telegram(time='135409', average='02.351'))
+        self.tracker.update(self._telegram(time='135959', average='02.400'))
+
+        completed = self.tracker.update(self._telegram(time='140001', average='00.100'))
+
+        self.assertEqual(completed, (datetime(2020, 5, 12, 11, 45, tzinfo=timezone.utc), Decimal('2.400')))
+        self.assertEqual(self.tracker.last_quarter, completed)
+        self.assertEqual(self.tracker.quarter_start, datetime(2020, 5, 12, 12, 0, tzinfo=timezone.utc))
+
+    def test_rolling_average(self):
+        self.tracker.update(self._telegram())
+
+        self.assertEqual([peak.value for peak in self.tracker.history],
+                         [Decimal('3.695'), Decimal('5.980'), Decimal('4.318')])
+        self.assertEqual(self.tracker.rolling_average,
+                         (Decimal('3.695') + Decimal('5.980') + Decimal('4.318') + Decimal('2.589')) / 4)
+
+    def test_minimum_peak(self):
+        self.tracker.update(self.parser.parse(TELEGRAM_FLUVIUS_V171.replace(
+            '1-0:1.6.0(200509134558S)(02.589*kW)', '1-0:1.6.0(200509134558S)(01.000*kW)')))
+
+        self.assertEqual(self.tracker.rolling_average,
+                         (Decimal('3.695') + Decimal('5.980') + Decimal('4.318') + Decimal('2.5')) / 4)
+
+    def test_history_updated_when_changed(self):
+        with patch.object(CapacityTariffTracker, '_update_history', autospec=True,
+                          side_effect=CapacityTariffTracker._update_history) as update_history:
+            self.tracker.update(self._telegram(time='135409'))
+            self.tracker.update(self._telegram(time='135410'))
+            self.assertEqual(update_history.call_count, 1)
+
+            self.tracker.update(self.parser.parse(TELEGRAM_FLUVIUS_V171.replace('(03.695*kW)', '(03.700*kW)')))
+            self.assertEqual(update_history.call_count, 2)
+
+        self.assertEqual(self.tracker.history[0].value, Decimal('3.700'))
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import Mock
+
+import json
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.differ import TelegramDiffer
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V5, TELEGRAM_V5_TWO_MBUS
+
+
+class TelegramDifferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False)
+        self.differ = TelegramDiffer()
+
+    def _next_telegram(self, telegram=TELEGRAM_V5):
+        return telegram.replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(170102192003W)')
+
+    def test_first_telegram_changed_completely(self):
+        telegram = self.parser.parse(TELEGRAM_V5)
+        changes = self.differ.diff(telegram)
+
+        self.assertEqual(changes.timestamp, datetime(2017, 1, 2, 18, 20, 2, tzinfo=timezone.utc))
+        self.assertEqual(dict(changes)['EQUIPMENT_IDENTIFIER'], telegram.EQUIPMENT_IDENTIFIER)
+        self.assertNotIn('P1_MESSAGE_TIMESTAMP', dict(changes))
+        self.assertEqual(list(changes.mbus_devices), [1, 2])
+
+    def test_changed_values(self):
+        self.differ.diff(self.parser.parse(TELEGRAM_V5))
+        changes = self.differ.diff(self.parser.parse(
+            self._next_telegram().replace('1-0:1.7.0(00.244*kW)', '1-0:1.7.0(01.500*kW)')))
+
+        self.assertTrue(changes)
+        self.assertEqual(changes.timestamp, datetime(2017, 1, 2, 18, 20, 3, tzinfo=timezone.utc))
+        self.assertEqual([obis_name for obis_name, _ in changes], ['CURRENT_ELECTRICITY_USAGE'])
+        self.assertEqual(changes.changed['CURRENT_ELECTRICITY_USAGE'].value, Decimal('1.500'))
+        self.assertEqual(changes.mbus_devices, {})
+
+    def test_unchanged(self):
+        self.differ.diff(self.parser.parse(TELEGRAM_V5))
+        changes = self.differ.diff(self.parser.parse(self._next_telegram()))
+
+        self.assertFalse(changes)
+        self.assertEqual(len(changes), 0)
+
+    def test_unchanged_without_line_cache(self):
+        self.parser.LINE_CACHE_SIZE = 0
+
+        self.differ.diff(self.parser.parse(TELEGRAM_V5))
+
+        self.assertFalse(self.differ.diff(self.parser.parse(self._next_telegram())))
+
+    def test_mbus_and_removed_values(self):
+        self.differ.diff(self.parser.parse(TELEGRAM_V5_TWO_MBUS))
+        changes = self.differ.diff(self.parser.parse(
+            TELEGRAM_V5_TWO_MBUS
+            .replace('0-2:24.2.1(200426223001S)(00246.138*m3)', '0-2:24.2.1(200426224001S)(00246.200*m3)')
+            .replace('1-0:21.7.0(00.056*kW)\r\n', '')))
+
+        self.assertEqual(list(changes.mbus_devices), [2])
+        self.assertEqual(changes.mbus_devices[2]['MBUS_METER_READING'].value, Decimal('246.200'))
+        self.assertEqual(changes.removed, ['INSTANTANEOUS_ACTIVE_POWER_L1_POSITIVE'])
+
+        data = json.loads(changes.to_json())
+        self.assertEqual(data['MBUS_DEVICES'][0]['CHANNEL_ID'], 2)
+        self.assertEqual(data['REMOVED'], ['INSTANTANEOUS_ACTIVE_POWER_L1_POSITIVE'])
+
+    def test_per_source(self):
+        self.differ.diff(self.parser.parse(TELEGRAM_V5), 'meter-1')
+
+        self.assertTrue(self.differ.diff(self.parser.parse(self._next_telegram()), 'meter-2'))
+        self.assertFalse(self.differ.diff(self.parser.parse(self._next_telegram()), 'meter-1'))
+
+        self.differ.reset('meter-1')
+        self.assertTrue(self.differ.diff(self.parser.parse(self._next_telegram()), 'meter-1'))
+
+    def test_to_json(self):
+        self.differ.diff(self.parser.parse(TELEGRAM_V5))
+        changes = self.differ.diff(self.parser.parse(
+            self._next_telegram().replace('1-0:1.7.0(00.244*kW)', '1-0:1.7.0(01.500*kW)')))
+
+        self.assertEqual(json.loads(changes.to_json()), {
+            'TIMESTAMP': '2017-01-02T18:20:03+00:00',
+            'CURRENT_ELECTRICITY_USAGE': {'value': 1.5, 'unit': 'kW'},
+        })
+
+    def test_protocol(self):
+        new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock(), differ=self.differ)
+        protocol = new_protocol()
+        protocol.telegram_parser = self.parser
+
+        protocol.data_received(TELEGRAM_V5.encode('ascii'))
+        protocol.data_received(self._next_telegram().encode('ascii'))
+        protocol.data_received(self._next_telegram().replace('00.244', '01.500').encode('ascii'))
+
+        changes = [call[0][0] for call in protocol.telegram_callback.call_args_list]
+        self.assertEqual(len(changes), 2)
+        self.assertEqual(list(changes[1].changed), ['CURRENT_ELECTRICITY_USAGE'])
@@ -0,0 +1,167 @@
+from unittest.mock import Mock, patch
+
+import unittest
+
+from dsmr_parser import obis_references as obis
+from dsmr_parser import telegram_specifications
+from dsmr_parser.clients import SerialReader, SERIAL_SETTINGS_V5
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.error_reporting import ErrorAggregator
+from dsmr_parser.exceptions import InvalidChecksumError, ParseError
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V5
+
+
+class ErrorAggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sink = Mock()
+        self.aggregator = ErrorAggregator(interval=60, sink=self.sink)
+
+    @patch('dsmr_parser.error_reporting.time.monotonic')
+    def test_sampling(self, monotonic):
+        monotonic.return_value = 0
+        aggregator = ErrorAggregator(interval=60, sample_interval=10, sink=self.sink)
+        errors = [ParseError(str(i)) for i in range(4)]
+
+        for error in errors[:3]:
+            aggregator.report(error, obis.P1_MESSAGE_TIMESTAMP, 'meter')
+        monotonic.return_value = 10
+        aggregator.report(errors[3], obis.P1_MESSAGE_TIMESTAMP, 'meter')
+
+        self.assertEqual(self.sink.call_args_list, [
+            ((errors[0], obis.P1_MESSAGE_TIMESTAMP, 'meter', 1),),
+            ((errors[3], obis.P1_MESSAGE_TIMESTAMP, 'meter', 4),),
+        ])
+
+    def test_sampled_per_kind(self):
+        self.aggregator.report(ParseError('a'), obis.P1_MESSAGE_TIMESTAMP)
+        self.aggregator.report(ParseError('b'), obis.CURRENT_ELECTRICITY_USAGE)
+        self.aggregator.report(InvalidChecksumError('c'), None, 'meter')
+        self.aggregator.report(ParseError('d'), obis.CURRENT_ELECTRICITY_USAGE)
+
+        self.assertEqual(self.sink.call_count, 3)
+        self.assertEqual(self.aggregator.totals(), {
+            (None, obis.P1_MESSAGE_TIMESTAMP, 'ParseError'): 1,
+            (None, obis.CURRENT_ELECTRICITY_USAGE, 'ParseError'): 2,
+            ('meter', None, 'InvalidChecksumError'): 1,
+        })
+
+    @patch('dsmr_parser.error_reporting.time.monotonic')
+    def test_summary(self, monotonic):
+        monotonic.return_value = 0
+        aggregator = ErrorAggregator(interval=60, sink=None)
+
+        with self.assertLogs('dsmr_parser.error_reporting') as logs:
+            for _ in range(5):
+                aggregator.report(ParseError('invalid'), '0-0:1.0.0', 'meter')
+            monotonic.return_value = 60
+            aggregator.report(ParseError('invalid'), '0-0:1.0.0', 'meter')
+
+            # The next window starts empty.
+            aggregator.report(ParseError('invalid'), '0-0:1.0.0', 'meter')
+            aggregator.flush()
+
+        self.assertEqual(logs.output, [
+            'WARNING:dsmr_parser.error_reporting:6 ParseError errors (0-0:1.0.0) on meter in the last 60 seconds',
+            'WARNING:dsmr_parser.error_reporting:1 ParseError errors (0-0:1.0.0) on meter in the last 0 seconds',
+        ])
+
+    def test_summary_without_more_errors(self):
+        aggregator = ErrorAggregator(interval=0.01, sink=None)
+
+        with self.assertLogs('dsmr_parser.error_reporting') as logs:
+            aggregator.report(ParseError('invalid'), '0-0:1.0.0', 'meter')
+            aggregator.report(ParseError('invalid'), '0-0:1.0.0', 'meter')
+
+            # The summary of the last window is logged by the timer.
+            timer = aggregator._timer
+            while timer is not None:
+                timer.join()
+                timer = aggregator._timer
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('2 ParseError errors (0-0:1.0.0) on meter in the last', logs.output[0])
+
+    def test_default_sink_logs_traceback(self):
+        aggregator = ErrorAggregator()
+
+        try:
+            raise ParseError('invalid')
+        except ParseError as e:
+            error = e
+
+        with self.assertLogs('dsmr_parser.error_reporting') as logs:
+            aggregator.report(error, '0-0:1.0.0', 'meter')
+
+        self.assertIn('ParseError (0-0:1.0.0) on meter, 1 times so far: invalid', logs.output[0])
+        self.assertIn('Traceback', logs.output[0])
+
+    def test_reset(self):
+        self.aggregator.report(ParseError('invalid'))
+        self.aggregator.reset()
+        self.aggregator.report(ParseError('invalid'))
+
+        self.assertEqual(self.aggregator.totals(), {(None, None, 'ParseError'): 1})
+        self.assertEqual(self.sink.call_count, 2)
+
+
+class ErrorReportingTest(unittest.TestCase):
+
+    def test_parser_reports_failed_lines(self):
+        aggregator = ErrorAggregator(sink=None)
+        parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False,
+                                error_reporter=aggregator)
+        telegram = TELEGRAM_V5.replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(170102192002W)(1)')
+
+        for _ in range(2):
+            parser.parse(telegram)
+        parser.parse(telegram, source='meter')
+
+        self.assertEqual(aggregator.totals(), {
+            (None, '0-0:1.0.0', 'ParseError'): 2,
+            ('meter', '0-0:1.0.0', 'ParseError'): 1,
+        })
+
+    def test_protocol_reports_failed_lines_by_source(self):
+        aggregator = ErrorAggregator(sink=None)
+        new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock(), source_id='meter')
+        protocol = new_protocol()
+        protocol.telegram_parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False,
+                                                  error_reporter=aggregator)
+
+        protocol.data_received(
+            TELEGRAM_V5.replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(170102192002W)(1)').encode('ascii'))
+
+        self.assertEqual(aggregator.totals(), {('meter', '0-0:1.0.0', 'ParseError'): 1})
+
+    def test_parse_all_reports_skipped_telegrams(self):
+        aggregator = ErrorAggregator(sink=None)
+        parser = TelegramParser(telegram_specifications.V5, error_reporter=aggregator)
+        telegram = TELEGRAM_V5.replace('!6EEE', '!0000')
+
+        self.assertEqual(len(list(parser.parse_all([telegram, TELEGRAM_V5], source='meter'))), 1)
+        self.assertEqual(aggregator.totals(), {('meter', None, 'InvalidChecksumError'): 1})
+
+    def test_protocol_reports_failed_telegrams(self):
+        aggregator = ErrorAggregator(sink=None)
+        new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock(), source_id='meter',
+                                               error_reporter=aggregator)
+        protocol = new_protocol()
+
+        protocol.data_received(TELEGRAM_V5.replace('!6EEE', '!0000').encode('ascii'))
+
+        protocol.telegram_callback.assert_not_called()
+        self.assertEqual(aggregator.totals(), {('meter', None, 'InvalidChecksumError'): 1})
+
+    @patch('serial.Serial')
+    def test_serial_reader_reports_failed_telegrams(self, serial_mock):
+        aggregator = ErrorAggregator(sink=None)
+        serial_handle = serial_mock.return_value.__enter__.return_value
+        serial_handle.read.return_value = (TELEGRAM_V5.replace('!6EEE', '!0000') + TELEGRAM_V5).encode('ascii')
+
+        reader = SerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V5), telegram_specifications.V5,
+                              error_reporter=aggregator)
+        next(reader.read_as_object())
+
+        self.assertEqual(aggregator.totals(), {('/dev/ttyUSB0', None, 'InvalidChecksumError'): 1})
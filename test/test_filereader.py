@@ -1,9 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import gzip
+import io
+import lzma
+import os
 import unittest
 import tempfile
 
-from dsmr_parser.clients.filereader import FileReader
-from dsmr_parser.telegram_specifications import V5
-from test.example_telegrams import TELEGRAM_V5
+from dsmr_parser.clients import filereader
+from dsmr_parser.clients.filereader import DirectoryReader, FileInputReader, FileReader
+from dsmr_parser.telegram_specifications import BELGIUM_FLUVIUS, V5
+from test.example_telegrams import TELEGRAM_FLUVIUS_V171, TELEGRAM_V5
 
 
 class FileReaderTest(unittest.TestCase):
@@ -19,3 +26,127 @@ class FileReaderTest(unittest.TestCase):
                 telegrams.append(telegram)
 
             self.assertEqual(len(telegrams), 1)
+
+    def _read_compressed(self, suffix, open_compressed):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'readings.txt' + suffix)
+            with open_compressed(path, "wb") as f:
+                f.write((TELEGRAM_V5 * 3).encode('ascii'))
+
+            reader = FileReader(file=path, telegram_specification=V5)
+            # Use tiny blocks so telegrams are split over block boundaries.
+            reader.BLOCK_SIZE = 100
+
+            return list(reader.read_as_object())
+
+    def test_read_as_object_gzip(self):
+        telegrams = self._read_compressed('.gz', gzip.open)
+
+        self.assertEqual(len(telegrams), 3)
+        self.assertEqual(telegrams[2].P1_MESSAGE_HEADER.value, '50')
+
+    def test_read_as_object_xz(self):
+        telegrams = self._read_compressed('.xz', lzma.open)
+
+        self.assertEqual(len(telegrams), 3)
+
+    @unittest.skipIf(filereader.zstandard is None, 'zstandard is not installed')
+    def test_read_as_object_zstd(self):
+        def open_zstd(path, mode):
+            return filereader.zstandard.ZstdCompressor().stream_writer(open(path, mode), closefd=True)
+
+        telegrams = self._read_compressed('.zst', open_zstd)
+
+        self.assertEqual(len(telegrams), 3)
+
+
+class DirectoryReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+        os.makedirs(os.path.join(self.directory, 'meter_a'))
+        os.makedirs(os.path.join(self.directory, 'meter_b'))
+        with open(os.path.join(self.directory, 'meter_a', 'day_1.txt'), 'w') as f:
+            f.write(TELEGRAM_V5 * 2)
+        with gzip.open(os.path.join(self.directory, 'meter_a', 'day_2.txt.gz'), 'wb') as f:
+            f.write(TELEGRAM_V5.encode('ascii'))
+        with open(os.path.join(self.directory, 'meter_b', 'fluvius_day_1.txt'), 'w') as f:
+            f.write(TELEGRAM_FLUVIUS_V171)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    @staticmethod
+    def _select_specification(path):
+        if path.name.startswith('fluvius'):
+            return BELGIUM_FLUVIUS
+
+    def test_read_as_object_ordered(self):
+        reader = DirectoryReader(directory=self.directory, telegram_specification=V5,
+                                 specification_selector=self._select_specification,
+                                 max_in_flight=1, ordered=True)
+
+        results = list(reader.read_as_object())
+
+        self.assertEqual(
+            [os.path.relpath(source, self.directory) for source, _ in results],
+            [os.path.join('meter_a', 'day_1.txt'), os.path.join('meter_a', 'day_1.txt'),
+             os.path.join('meter_a', 'day_2.txt.gz'), os.path.join('meter_b', 'fluvius_day_1.txt')]
+        )
+        self.assertEqual(results[3][1].BELGIUM_VERSION_INFORMATION.value, '50217')
+
+    def test_read_as_object_as_completed(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            reader = DirectoryReader(directory=self.directory, telegram_specification=V5,
+                                     pattern='meter_a/*', executor=executor)
+
+            results = list(reader.read_as_object())
+
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(telegram.P1_MESSAGE_HEADER.value == '50' for _, telegram in results))
+
+    def test_memory_bounded_by_batches(self):
+        with open(os.path.join(self.directory, 'meter_a', 'day_1.txt'), 'w') as f:
+            f.write(TELEGRAM_V5 * 5)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            submitted = []
+            submit = executor.submit
+            executor.submit = lambda *args: submitted.append(args[2]) or submit(*args)
+
+            reader = DirectoryReader(directory=self.directory, telegram_specification=V5, pattern='meter_a/*.txt',
+                                     executor=executor, max_in_flight=1, batch_size=2)
+            results = reader.read_as_object()
+            next(results)
+
+            # A large file is not read at once.
+            self.assertEqual([len(batch) for batch in submitted], [2])
+            self.assertEqual(len(list(results)), 4)
+            self.assertEqual([len(batch) for batch in submitted], [2, 2, 1])
+
+
+class FileInputReaderTest(unittest.TestCase):
+
+    def test_read_as_object_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            plain = os.path.join(directory, 'readings.txt')
+            compressed = os.path.join(directory, 'readings.txt.gz')
+            with open(plain, 'w') as f:
+                f.write(TELEGRAM_V5)
+            with gzip.open(compressed, 'wb') as f:
+                f.write((TELEGRAM_V5 * 2).encode('ascii'))
+
+            reader = FileInputReader(telegram_specification=V5, files=[plain, compressed])
+
+            # Reading ends once the inputs are exhausted.
+            self.assertEqual(len(list(reader.read_as_object())), 3)
+
+    def test_read_as_object_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO((TELEGRAM_V5 * 2).encode('ascii')))
+
+        with mock.patch('sys.stdin', stdin), mock.patch('sys.argv', ['syphon_smartmeter_readings_stdin.py']):
+            telegrams = list(FileInputReader(telegram_specification=V5).read_as_object())
+
+        self.assertEqual(len(telegrams), 2)
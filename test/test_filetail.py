@@ -0,0 +1,201 @@
+from unittest import mock
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from dsmr_parser.clients import filetail
+from dsmr_parser.clients.filereader import FileTailReader
+from dsmr_parser.clients.filetail import FileTail
+from dsmr_parser.clients.protocol import create_file_dsmr_reader
+from dsmr_parser.telegram_specifications import V5
+from test.example_telegrams import TELEGRAM_V5
+
+
+class FileTailTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self._directory.name, 'readings.txt')
+        self._write(b'existing\n')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _write(self, data, mode='ab'):
+        with open(self.file, mode) as f:
+            f.write(data)
+
+    def test_starts_at_end(self):
+        tail = FileTail(self.file)
+
+        self.assertEqual(tail.read_available(), b'')
+        self._write(b'line 1\nline 2\n')
+        self.assertEqual(tail.read_available(), b'line 1\nline 2\n')
+        self.assertEqual(tail.read_available(), b'')
+        tail.close()
+
+    def test_start_position(self):
+        tail = FileTail(self.file, position=0)
+
+        self.assertEqual(tail.read_available(), b'existing\n')
+        tail.close()
+
+    def test_truncation(self):
+        tail = FileTail(self.file)
+        tail.read_available()
+
+        self._write(b'new\n', mode='wb')
+
+        self.assertEqual(tail.read_available(), b'new\n')
+        tail.close()
+
+    def test_rotation(self):
+        tail = FileTail(self.file)
+        tail.read_available()
+
+        self._write(b'last line before rotation\n')
+        os.rename(self.file, self.file + '.1')
+        self._write(b'first line after rotation\n')
+
+        self.assertEqual(tail.read_available(), b'last line before rotation\nfirst line after rotation\n')
+        tail.close()
+
+    def _follow_one_chunk(self, tail):
+        follow = tail.follow()
+        timer = threading.Timer(0.1, self._write, (b'appended\n',))
+        timer.start()
+        try:
+            return next(follow)
+        finally:
+            timer.join()
+            follow.close()
+
+    def test_follow(self):
+        self.assertEqual(self._follow_one_chunk(FileTail(self.file, poll_interval=5)), b'appended\n')
+
+    def test_follow_polling_fallback(self):
+        with mock.patch.object(filetail, '_create_inotify', return_value=None):
+            self.assertEqual(self._follow_one_chunk(FileTail(self.file, poll_interval=0.05)), b'appended\n')
+
+    def test_follow_async(self):
+        async def follow_two_files():
+            other_file = os.path.join(self._directory.name, 'other.txt')
+            with open(other_file, 'wb'):
+                pass
+
+            followers = [FileTail(self.file, poll_interval=5).follow_async(),
+                         FileTail(other_file, poll_interval=5).follow_async()]
+            reads = [asyncio.ensure_future(follower.__anext__()) for follower in followers]
+            await asyncio.sleep(0.05)
+
+            self._write(b'appended\n')
+            with open(other_file, 'ab') as f:
+                f.write(b'other\n')
+
+            results = await asyncio.wait_for(asyncio.gather(*reads), 2)
+            for follower in followers:
+                await follower.aclose()
+            return results
+
+        self.assertEqual(asyncio.run(follow_two_files()), [b'appended\n', b'other\n'])
+
+
+class FileTailReaderTest(unittest.TestCase):
+
+    def test_read_as_object(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, 'readings.txt')
+            with open(file, 'w'):
+                pass
+
+            def write_telegram():
+                with open(file, 'a') as f:
+                    f.write(TELEGRAM_V5)
+
+            timer = threading.Timer(0.1, write_telegram)
+            timer.start()
+            telegrams = FileTailReader(file, V5, poll_interval=5).read_as_object()
+            try:
+                telegram = next(telegrams)
+            finally:
+                timer.join()
+                telegrams.close()
+
+        self.assertEqual(telegram.P1_MESSAGE_HEADER.value, '50')
+
+
+class FileConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.telegrams = []
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _read(self, file, write=None, **kwargs):
+        async def read():
+            loop = asyncio.get_running_loop()
+            transport, protocol = await create_file_dsmr_reader(file, '5', self.telegrams.append, loop=loop,
+                                                                **kwargs)
+            if write:
+                write()
+            await asyncio.wait_for(protocol.wait_closed(), 2)
+
+        asyncio.run(read())
+
+    def test_regular_file(self):
+        file = os.path.join(self._directory.name, 'readings.txt')
+        with open(file, 'w') as f:
+            f.write(TELEGRAM_V5 * 2)
+
+        self._read(file, follow=False)
+
+        self.assertEqual(len(self.telegrams), 2)
+
+    def test_followed_file(self):
+        file = os.path.join(self._directory.name, 'readings.txt')
+        with open(file, 'w') as f:
+            f.write(TELEGRAM_V5)
+
+        async def read():
+            loop = asyncio.get_running_loop()
+            transport, protocol = await create_file_dsmr_reader(file, '5', self.telegrams.append, loop=loop)
+            await asyncio.sleep(0.05)
+            with open(file, 'a') as f:
+                f.write(TELEGRAM_V5)
+            while not self.telegrams:
+                await asyncio.sleep(0.01)
+            transport.close()
+            await asyncio.wait_for(protocol.wait_closed(), 2)
+
+        asyncio.run(asyncio.wait_for(read(), 5))
+
+        # Following starts at the end of the file, like tail does.
+        self.assertEqual(len(self.telegrams), 1)
+
+    def test_fifo(self):
+        fifo = os.path.join(self._directory.name, 'readings.fifo')
+        os.mkfifo(fifo)
+
+        def write():
+            # The reading end is open by now, so opening the writing end does not block.
+            fd = os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+            os.write(fd, TELEGRAM_V5.encode('ascii'))
+            os.close(fd)
+
+        self._read(fifo, write)
+
+        self.assertEqual(len(self.telegrams), 1)
+
+    def test_pipe(self):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, TELEGRAM_V5.encode('ascii'))
+        os.close(write_fd)
+
+        with os.fdopen(read_fd, 'rb') as pipe:
+            self._read(pipe)
+
+        self.assertEqual(len(self.telegrams), 1)
@@ -0,0 +1,138 @@
+import asyncio
+import collections
+import resource
+import time
+import unittest
+
+from dsmr_parser.clients.hub import DSMRHub
+from test.example_telegrams import TELEGRAM_V5
+
+
+class _StandInMeters(object):
+    """ Local TCP server acting as any number of meters, sending a telegram on every connection each interval. """
+
+    def __init__(self, interval=0.5, close_after=None):
+        self.interval = interval
+        self.close_after = close_after
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        sent = 0
+        try:
+            while self.close_after is None or sent < self.close_after:
+                writer.write(TELEGRAM_V5.encode('ascii'))
+                sent += 1
+                await asyncio.sleep(self.interval)
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, '127.0.0.1', 0, backlog=2048)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class DSMRHubTest(unittest.TestCase):
+
+    def test_queue_tagged_with_source(self):
+        async def run():
+            meters = _StandInMeters()
+            port = await meters.start()
+
+            hub = DSMRHub()
+            hub.add_tcp_source('meter-1', '127.0.0.1', port, '5')
+            hub.add_tcp_source('meter-2', '127.0.0.1', port, '5')
+
+            async with hub:
+                received = [await asyncio.wait_for(hub.queue.get(), 2) for _ in range(2)]
+
+            await meters.stop()
+
+            # Sources of the same version share the parser
+            protocols = [hub._sources[source_id].protocol for source_id in hub.sources]
+            self.assertIs(protocols[0].telegram_parser, protocols[1].telegram_parser)
+            return received
+
+        received = asyncio.run(run())
+
+        self.assertEqual(sorted(source_id for source_id, _ in received), ['meter-1', 'meter-2'])
+        self.assertEqual(received[0][1].P1_MESSAGE_HEADER.value, '50')
+
+    def test_reconnect(self):
+        async def run():
+            meters = _StandInMeters(interval=0.01, close_after=1)
+            port = await meters.start()
+            telegrams = []
+
+            hub = DSMRHub(telegram_callback=lambda source_id, telegram: telegrams.append(source_id),
+                          min_backoff=0.01, max_backoff=0.01)
+            hub.add_tcp_source('meter', '127.0.0.1', port, '5')
+
+            async with hub:
+                while len(telegrams) < 3:
+                    await asyncio.sleep(0.01)
+
+            await meters.stop()
+            return meters.connections
+
+        self.assertGreaterEqual(asyncio.run(asyncio.wait_for(run(), 5)), 3)
+
+    def test_backoff_on_connection_failure(self):
+        async def run():
+            hub = DSMRHub(min_backoff=0.01, max_backoff=0.04, connect_timeout=1)
+            # Nothing listens on port 1
+            hub.add_tcp_source('meter', '127.0.0.1', 1, '5')
+
+            async with hub:
+                await asyncio.sleep(0.2)
+                self.assertFalse(hub.is_connected('meter'))
+
+        asyncio.run(run())
+
+
+class DSMRHubLoadTest(unittest.TestCase):
+    """ A single process should sustain more than a thousand meter connections. """
+
+    CONNECTIONS = 1000
+
+    def setUp(self):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        # Both ends of every connection live in this process.
+        needed = 2 * self.CONNECTIONS + 100
+        if hard != resource.RLIM_INFINITY and hard < needed:
+            self.skipTest('open file limit too low for the load test')
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, needed), hard))
+        self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft, hard))
+
+    def test_many_connections(self):
+        async def run():
+            meters = _StandInMeters(interval=1)
+            port = await meters.start()
+
+            telegrams = collections.Counter()
+            hub = DSMRHub(telegram_callback=lambda source_id, telegram: telegrams.update((source_id,)),
+                          connect_timeout=30)
+            for i in range(self.CONNECTIONS):
+                hub.add_tcp_source('meter-{}'.format(i), '127.0.0.1', port, '5')
+
+            start = time.monotonic()
+            async with hub:
+                # Every meter sends a telegram each second, keep up with at least two rounds.
+                while (len(telegrams) < self.CONNECTIONS or min(telegrams.values()) < 2) \
+                        and time.monotonic() - start < 20:
+                    await asyncio.sleep(0.1)
+                connected = sum(hub.is_connected(source_id) for source_id in hub.sources)
+
+            await meters.stop()
+            return telegrams, connected
+
+        telegrams, connected = asyncio.run(run())
+
+        self.assertEqual(len(telegrams), self.CONNECTIONS)
+        self.assertGreaterEqual(min(telegrams.values()), 2)
+        self.assertEqual(connected, self.CONNECTIONS)
@@ -0,0 +1,61 @@
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.instrumentation import Histogram, InstrumentationCollector, STAGE_CHECKSUM, STAGE_COERCE, \
+    STAGE_MATCH, STAGE_TOTAL
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V5
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = Histogram(buckets=(0.001, 0.01))
+
+        for seconds in (0.0005, 0.002, 0.003, 0.5):
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.counts, [1, 2, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 0.5055)
+        self.assertEqual(histogram.min, 0.0005)
+        self.assertEqual(histogram.max, 0.5)
+        self.assertEqual(histogram.percentile(50), 0.01)
+        self.assertEqual(histogram.percentile(100), 0.5)
+
+    def test_empty(self):
+        histogram = Histogram()
+
+        self.assertIsNone(histogram.mean)
+        self.assertIsNone(histogram.percentile(50))
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def test_callback(self):
+        calls = []
+        parser = TelegramParser(telegram_specifications.V5, instrumentation=lambda *args: calls.append(args))
+
+        parser.parse(TELEGRAM_V5)
+
+        stages = [stage for stage, _, _ in calls]
+        self.assertEqual(stages[0], STAGE_CHECKSUM)
+        self.assertEqual(stages[-1], STAGE_TOTAL)
+        self.assertEqual(stages.count(STAGE_MATCH), len(telegram_specifications.V5['objects']))
+        self.assertIn((STAGE_COERCE, 'CURRENT_ELECTRICITY_USAGE'), [(stage, name) for stage, _, name in calls])
+        self.assertTrue(all(seconds >= 0 for _, seconds, _ in calls))
+
+    def test_collector(self):
+        collector = InstrumentationCollector()
+        parser = TelegramParser(telegram_specifications.V5, instrumentation=collector)
+
+        for _ in range(3):
+            parser.parse(TELEGRAM_V5)
+
+        report = collector.report()
+        self.assertEqual(report['stages'][STAGE_TOTAL]['count'], 3)
+        self.assertEqual(report['stages'][STAGE_CHECKSUM]['count'], 3)
+        self.assertEqual(report['objects']['CURRENT_ELECTRICITY_USAGE']['count'], 3)
+
+        collector.reset()
+        self.assertEqual(collector.report(), {'stages': {}, 'objects': {}})
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import unittest
+
+from dsmr_parser import obis_references as obis
+from dsmr_parser import telegram_specifications
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V2_2, TELEGRAM_V5
+
+
+class UncachedTelegramParser(TelegramParser):
+    LAYOUT_CACHE_SIZE = 0
+
+
+class LayoutCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False)
+
+    def test_same_layout(self):
+        self.parser.parse(TELEGRAM_V5)
+        telegram = self.parser.parse(TELEGRAM_V5.replace('1-0:1.7.0(00.244*kW)', '1-0:1.7.0(01.500*kW)'))
+
+        self.assertEqual(len(self.parser._layouts), 1)
+        self.assertEqual(telegram[obis.CURRENT_ELECTRICITY_USAGE].value, Decimal('1.500'))
+
+    def test_equal_to_uncached(self):
+        uncached_parser = UncachedTelegramParser(telegram_specifications.V5, apply_checksum_validation=False)
+
+        for _ in range(2):
+            self.assertEqual(str(self.parser.parse(TELEGRAM_V5)), str(uncached_parser.parse(TELEGRAM_V5)))
+
+    def test_changed_layout(self):
+        self.parser.parse(TELEGRAM_V5)
+        telegram = self.parser.parse(TELEGRAM_V5.replace('1-0:1.7.0(00.244*kW)\r\n', ''))
+
+        self.assertEqual(len(self.parser._layouts), 2)
+        self.assertFalse(hasattr(telegram, 'CURRENT_ELECTRICITY_USAGE'))
+        self.assertEqual(telegram[obis.CURRENT_ELECTRICITY_DELIVERY].value, Decimal('0'))
+
+    def test_multiple_line_objects(self):
+        parser = TelegramParser(telegram_specifications.V2_2)
+
+        parser.parse(TELEGRAM_V2_2)
+        telegram = parser.parse(TELEGRAM_V2_2.replace('(00001.001)', '(00002.002)'))
+
+        self.assertEqual(telegram[obis.GAS_METER_READING].value, Decimal('2.002'))
+
+    def test_pattern_with_groups_not_cached(self):
+        specification = dict(telegram_specifications.V5)
+        specification['objects'] = [dict(object) for object in specification['objects']]
+        specification['objects'][0]['obis_reference'] = r'^\d-\d:(0\.2\.8).+?\r\n'
+        parser = TelegramParser(specification, apply_checksum_validation=False)
+
+        for _ in range(2):
+            parser.parse(TELEGRAM_V5)
+
+        self.assertEqual(list(parser._layouts.values()), [None])
+        self.assertEqual(parser.parse(TELEGRAM_V5)[obis.CURRENT_ELECTRICITY_USAGE].value, Decimal('0.244'))
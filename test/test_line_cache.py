@@ -0,0 +1,133 @@
+from decimal import Decimal
+
+from collections import OrderedDict
+from unittest.mock import Mock, patch
+
+import copy
+import pickle
+import unittest
+
+from dsmr_parser import obis_references as obis
+from dsmr_parser import parsers
+from dsmr_parser import telegram_specifications
+from dsmr_parser.error_reporting import ErrorAggregator
+from dsmr_parser.exceptions import ParseError
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.parsers import ParseCache, TelegramParser
+from test.example_telegrams import TELEGRAM_V5
+
+
+class LineCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = TelegramParser(telegram_specifications.V5, apply_checksum_validation=False,
+                                     error_reporter=ErrorAggregator(sink=None))
+
+    def test_identical_lines_reused(self):
+        first = self.parser.parse(TELEGRAM_V5)
+        second = self.parser.parse(TELEGRAM_V5.replace('1-0:1.7.0(00.244*kW)', '1-0:1.7.0(01.500*kW)'))
+
+        self.assertIs(first.EQUIPMENT_IDENTIFIER, second.EQUIPMENT_IDENTIFIER)
+        self.assertIs(first.POWER_EVENT_FAILURE_LOG, second.POWER_EVENT_FAILURE_LOG)
+        self.assertIsNot(first.CURRENT_ELECTRICITY_USAGE, second.CURRENT_ELECTRICITY_USAGE)
+        self.assertEqual(second.CURRENT_ELECTRICITY_USAGE.value, Decimal('1.500'))
+
+    def test_mbus_lines_reused(self):
+        first = self.parser.parse(TELEGRAM_V5)
+        second = self.parser.parse(TELEGRAM_V5)
+
+        self.assertIs(first.MBUS_DEVICES[0].MBUS_METER_READING, second.MBUS_DEVICES[0].MBUS_METER_READING)
+        self.assertEqual(second[obis.MBUS_METER_READING].value, Decimal('0.107'))
+
+    def test_invalid_lines_not_cached(self):
+        telegram = TELEGRAM_V5.replace('0-0:1.0.0(170102192002W)', '0-0:1.0.0(170102192002W)(1)')
+
+        for _ in range(2):
+            with self.assertRaises(ParseError):
+                self.parser.parse(telegram, throw_ex=True)
+
+    def test_bounded(self):
+        self.parser.LINE_CACHE_SIZE = 10
+
+        for value in range(20):
+            self.parser.parse(TELEGRAM_V5.replace('00.244', '{:05.3f}'.format(value)))
+            self.assertLessEqual(len(self.parser._lines), 10)
+
+    def test_disabled(self):
+        self.parser.LINE_CACHE_SIZE = 0
+
+        first = self.parser.parse(TELEGRAM_V5)
+        second = self.parser.parse(TELEGRAM_V5)
+
+        self.assertIsNot(first.EQUIPMENT_IDENTIFIER, second.EQUIPMENT_IDENTIFIER)
+
+    def test_not_pickled(self):
+        parser = TelegramParser(telegram_specifications.V5)
+        parser.parse(TELEGRAM_V5)
+
+        parser = pickle.loads(pickle.dumps(parser))
+
+        self.assertEqual((parser._lines, parser._layouts), ({}, {}))
+        self.assertEqual(parser.parse(TELEGRAM_V5).CURRENT_ELECTRICITY_USAGE.value, Decimal('0.244'))
+
+    def test_copies_are_independent(self):
+        parser = TelegramParser(telegram_specifications.V5)
+
+        self.assertIsNot(copy.deepcopy(parser), copy.deepcopy(parser))
+        self.assertIsNot(copy.copy(parser), parser)
+
+    def test_cache_kept_by_worker(self):
+        # A process pool pickles the parser and cache with every telegram.
+        cache = ParseCache()
+        parser = TelegramParser(telegram_specifications.V5)
+
+        first = pickle.loads(pickle.dumps(parser)).parse(TELEGRAM_V5, cache=pickle.loads(pickle.dumps(cache)))
+        second = pickle.loads(pickle.dumps(parser)).parse(TELEGRAM_V5, cache=pickle.loads(pickle.dumps(cache)))
+
+        self.assertIs(first.EQUIPMENT_IDENTIFIER, second.EQUIPMENT_IDENTIFIER)
+        self.assertEqual(cache.lines, {})
+
+    @patch('dsmr_parser.parsers.WORKER_CACHE_SIZE', 2)
+    @patch('dsmr_parser.parsers._worker_caches', OrderedDict())
+    def test_worker_caches_evicted_least_recently_used(self):
+        caches = [pickle.loads(pickle.dumps(ParseCache(key))) for key in ('a', 'b', 'c')]
+
+        for cache in (caches[0], caches[1], caches[0], caches[2]):
+            self.parser.parse(TELEGRAM_V5, cache=cache)
+
+        self.assertEqual(list(parsers._worker_caches), ['a', 'c'])
+
+    def test_cache_per_connection(self):
+        caches = ParseCache(), ParseCache()
+
+        first = self.parser.parse(TELEGRAM_V5, cache=caches[0])
+        second = self.parser.parse(TELEGRAM_V5, cache=caches[0])
+        other = self.parser.parse(TELEGRAM_V5, cache=caches[1])
+
+        self.assertIs(first.EQUIPMENT_IDENTIFIER, second.EQUIPMENT_IDENTIFIER)
+        self.assertIsNot(first.EQUIPMENT_IDENTIFIER, other.EQUIPMENT_IDENTIFIER)
+        self.assertEqual((self.parser._lines, self.parser._layouts), ({}, {}))
+        self.assertEqual(len(caches[0].layouts), 1)
+
+    def test_cache_used_with_other_parser(self):
+        cache = ParseCache()
+        self.parser.parse(TELEGRAM_V5, cache=cache)
+
+        parser = TelegramParser(telegram_specifications.LUXEMBOURG_SMARTY, apply_checksum_validation=False)
+        telegram = parser.parse(TELEGRAM_V5, cache=cache)
+
+        self.assertEqual(cache.parser_token, parser._token)
+        self.assertEqual(telegram.CURRENT_ELECTRICITY_USAGE.value, Decimal('0.244'))
+
+    def test_protocols_keep_own_cache(self):
+        protocols = []
+        for _ in range(2):
+            new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock())
+            protocol = new_protocol()
+            protocol.data_received(TELEGRAM_V5.encode('ascii'))
+            protocols.append(protocol)
+
+        # The parser is shared, the caches are not.
+        self.assertIs(protocols[0].telegram_parser, protocols[1].telegram_parser)
+        self.assertIsNot(protocols[0].parse_cache.lines, protocols[1].parse_cache.lines)
+        self.assertTrue(protocols[0].parse_cache.lines)
@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+import json
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.error_reporting import ErrorAggregator
+from dsmr_parser.exceptions import InvalidChecksumError
+from dsmr_parser.parsers import TelegramParser
+from dsmr_parser.telegram_specifications import merge_specifications, CONFLICT_ERROR, CONFLICT_FIRST, \
+    CONFLICT_LAST
+from test.example_telegrams import TELEGRAM_V2_2, TELEGRAM_V4_2, TELEGRAM_V5, TELEGRAM_V5_TWO_MBUS, \
+    TELEGRAM_FLUVIUS_V171, TELEGRAM_FLUVIUS_V171_ALT, TELEGRAM_V5_EON_HU
+
+FLEET = (
+    telegram_specifications.V2_2,
+    telegram_specifications.V4,
+    telegram_specifications.V5,
+    telegram_specifications.BELGIUM_FLUVIUS,
+    telegram_specifications.LUXEMBOURG_SMARTY,
+    telegram_specifications.EON_HUNGARY,
+)
+
+
+MEMBER_TELEGRAMS = (
+    (TELEGRAM_V2_2, telegram_specifications.V2_2),
+    (TELEGRAM_V4_2, telegram_specifications.V4),
+    (TELEGRAM_V5, telegram_specifications.V5),
+    (TELEGRAM_V5_TWO_MBUS, telegram_specifications.V5),
+    (TELEGRAM_FLUVIUS_V171, telegram_specifications.BELGIUM_FLUVIUS),
+    (TELEGRAM_FLUVIUS_V171_ALT, telegram_specifications.BELGIUM_FLUVIUS),
+    (TELEGRAM_V5_EON_HU, telegram_specifications.EON_HUNGARY),
+)
+
+
+def _matched_lines(specification, telegram_data):
+    """The first lines of all matches of the objects of a specification."""
+    parser = TelegramParser(specification)
+    return {match.split('\r\n')[0] for _, matches in parser._match(telegram_data, {}) for match in matches}
+
+
+class MergeSpecificationsTest(unittest.TestCase):
+
+    def test_parse_fleet(self):
+        for telegram_data, specification in ((TELEGRAM_V2_2, telegram_specifications.V2_2),
+                                             (TELEGRAM_V4_2, telegram_specifications.V4),
+                                             (TELEGRAM_V5, telegram_specifications.V5),
+                                             (TELEGRAM_FLUVIUS_V171, telegram_specifications.BELGIUM_FLUVIUS),
+                                             (TELEGRAM_V5_EON_HU, telegram_specifications.EON_HUNGARY)):
+            # The specification of the meter wins the conflicts when it is merged first.
+            others = [other for other in FLEET if other is not specification]
+            parser = TelegramParser(merge_specifications(specification, *others),
+                                    error_reporter=ErrorAggregator(sink=None))
+
+            telegram = parser.parse(telegram_data)
+            expected = TelegramParser(specification).parse(telegram_data)
+
+            self.assertEqual(json.loads(telegram.to_json()), json.loads(expected.to_json()))
+
+    def test_all_lines_parsed(self):
+        for on_conflict in (CONFLICT_FIRST, CONFLICT_LAST):
+            specification = merge_specifications(*FLEET, on_conflict=on_conflict)
+
+            for telegram_data, member in MEMBER_TELEGRAMS:
+                self.assertLessEqual(_matched_lines(member, telegram_data),
+                                     _matched_lines(specification, telegram_data))
+
+        # Partly overlapping objects are narrowed, V4 matches 0-1:24.2.1 and Fluvius 0-1:24.2.3 as well.
+        specification = merge_specifications(telegram_specifications.V4, telegram_specifications.BELGIUM_FLUVIUS)
+        telegram = TelegramParser(specification).parse(TELEGRAM_FLUVIUS_V171)
+        self.assertEqual(telegram.MBUS_DEVICES[0].MBUS_METER_READING.value, Decimal('112.384'))
+
+    def test_conflict_first(self):
+        specification = merge_specifications(*FLEET)
+        telegram = TelegramParser(specification).parse(TELEGRAM_FLUVIUS_V171)
+
+        # V4 names 0-0:96.1.1 EQUIPMENT_IDENTIFIER, Fluvius names it BELGIUM_EQUIPMENT_IDENTIFIER.
+        self.assertEqual(telegram.EQUIPMENT_IDENTIFIER.value, '3853414731323334353637383930')
+        self.assertFalse(hasattr(telegram, 'BELGIUM_EQUIPMENT_IDENTIFIER'))
+
+    def test_conflict_last(self):
+        specification = merge_specifications(*FLEET, on_conflict=CONFLICT_LAST)
+        telegram = TelegramParser(specification).parse(TELEGRAM_V5_EON_HU)
+
+        self.assertEqual(telegram.EQUIPMENT_SERIAL_NUMBER.value, '383930303832323030303032313630')
+        self.assertFalse(hasattr(telegram, 'EQUIPMENT_IDENTIFIER_GAS'))
+        self.assertFalse(hasattr(telegram, 'LUXEMBOURG_EQUIPMENT_IDENTIFIER'))
+
+    def test_conflict_error(self):
+        # Identical definitions are not a conflict.
+        merge_specifications(telegram_specifications.V5, telegram_specifications.LUXEMBOURG_SMARTY,
+                             on_conflict=CONFLICT_ERROR)
+
+        with self.assertRaises(ValueError):
+            merge_specifications(telegram_specifications.V2_2, telegram_specifications.V4,
+                                 on_conflict=CONFLICT_ERROR)
+
+        # Different patterns matching the same lines, r'^\d-\d:96\.1\.1' and r'^\d-0:96\.1\.1'.
+        with self.assertRaises(ValueError):
+            merge_specifications(telegram_specifications.V5, telegram_specifications.BELGIUM_FLUVIUS,
+                                 on_conflict=CONFLICT_ERROR)
+
+    def test_checksum(self):
+        specification = merge_specifications(telegram_specifications.V2_2, telegram_specifications.V5)
+
+        self.assertTrue(specification['checksum_support'])
+
+        with self.assertRaises(InvalidChecksumError):
+            TelegramParser(specification).parse(TELEGRAM_V5.replace('!6EEE', '!6EEF'))
+
+    def test_encrypted(self):
+        with self.assertRaises(ValueError):
+            merge_specifications(telegram_specifications.V5, telegram_specifications.SAGEMCOM_T210_D_R)
@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.clients.metrics import MetricsServer, render_metrics
+from dsmr_parser.clients.stats import ConnectionStats, StatsRegistry
+from dsmr_parser.instrumentation import InstrumentationCollector
+from dsmr_parser.parsers import TelegramParser
+from test.example_telegrams import TELEGRAM_V5
+
+
+class RenderMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = StatsRegistry()
+        self.stats = ConnectionStats('meter "1"', registry=self.registry, buckets=(0.001, 0.01))
+        self.stats.bytes_received = 1234
+        self.stats.parsed(0.0005)
+        self.stats.parsed(0.005)
+
+    def test_counters(self):
+        lines = render_metrics(self.registry).splitlines()
+
+        self.assertIn('# TYPE dsmr_bytes_received_total counter', lines)
+        self.assertIn('dsmr_bytes_received_total{connection="meter \\"1\\""} 1234', lines)
+        self.assertIn('dsmr_telegrams_parsed_total{connection="meter \\"1\\""} 2', lines)
+
+    def test_histograms(self):
+        lines = render_metrics(self.registry).splitlines()
+
+        self.assertIn('# TYPE dsmr_parse_latency_seconds histogram', lines)
+        self.assertIn('dsmr_parse_latency_seconds_bucket{connection="meter \\"1\\"",le="0.001"} 1', lines)
+        self.assertIn('dsmr_parse_latency_seconds_bucket{connection="meter \\"1\\"",le="0.01"} 2', lines)
+        self.assertIn('dsmr_parse_latency_seconds_bucket{connection="meter \\"1\\"",le="+Inf"} 2', lines)
+        self.assertIn('dsmr_parse_latency_seconds_count{connection="meter \\"1\\""} 2', lines)
+
+    def test_unique_connection_labels(self):
+        # Kept, the registry only keeps weak references.
+        self.connections = [ConnectionStats(registry=self.registry), ConnectionStats(registry=self.registry),
+                            ConnectionStats(('1.2.3.4', 2001), registry=self.registry)]
+
+        lines = [line for line in render_metrics(self.registry).splitlines()
+                 if line.startswith('dsmr_bytes_received_total')]
+
+        self.assertEqual(sorted(lines), [
+            'dsmr_bytes_received_total{connection="1.2.3.4:2001"} 0',
+            'dsmr_bytes_received_total{connection="meter \\"1\\""} 1234',
+            'dsmr_bytes_received_total{connection="unnamed"} 0',
+            'dsmr_bytes_received_total{connection="unnamed#2"} 0',
+        ])
+
+    def test_instrumentation(self):
+        collector = InstrumentationCollector()
+        TelegramParser(telegram_specifications.V5, instrumentation=collector).parse(TELEGRAM_V5)
+
+        lines = render_metrics(self.registry, collector).splitlines()
+
+        self.assertIn('dsmr_parse_stage_seconds_count{stage="total"} 1', lines)
+        self.assertIn('dsmr_parse_stage_seconds_bucket{stage="total",le="+Inf"} 1', lines)
+
+
+class MetricsServerTest(unittest.TestCase):
+
+    def _get(self, path):
+        registry = StatsRegistry()
+        # The registry only keeps a weak reference.
+        stats = ConnectionStats('meter', registry=registry)
+        stats.bytes_received = 10
+
+        async def get():
+            async with MetricsServer(0, host='127.0.0.1', registry=registry) as server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+                writer.write('GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n'.format(path).encode('ascii'))
+                response = await asyncio.wait_for(reader.read(), 2)
+                writer.close()
+                return response.decode('utf-8')
+
+        return asyncio.run(get())
+
+    def test_metrics(self):
+        response = self._get('/metrics')
+
+        self.assertTrue(response.startswith('HTTP/1.1 200 OK\r\n'))
+        self.assertIn('Content-Type: text/plain; version=0.0.4', response)
+        self.assertIn('dsmr_bytes_received_total{connection="meter"} 10\n', response)
+
+    def test_not_found(self):
+        self.assertTrue(self._get('/').startswith('HTTP/1.1 404 Not Found\r\n'))
@@ -1,5 +1,6 @@
 from binascii import unhexlify
 from copy import deepcopy
+from unittest import mock
 
 import unittest
 
@@ -8,6 +9,7 @@ from dlms_cosem.protocol.xdlms import GeneralGlobalCipher
 from dlms_cosem.security import SecurityControlField, encrypt
 
 from dsmr_parser import telegram_specifications
+from dsmr_parser.cipher import KeyStore, TelegramCipher
 from dsmr_parser.exceptions import ParseError
 from dsmr_parser.parsers import TelegramParser
 from test.example_telegrams import TELEGRAM_SAGEMCOM_T210_D_R
@@ -61,6 +63,64 @@ class TelegramParserEncryptedTest(unittest.TestCase):
                               self.DUMMY_AUTHENTICATION_KEY)
         self.assertEqual(len(result), 18)
 
+    def test_keys_at_construction(self):
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R,
+                                encryption_key=self.DUMMY_ENCRYPTION_KEY,
+                                authentication_key=self.DUMMY_AUTHENTICATION_KEY)
+
+        self.assertEqual(len(parser.parse(self.__generate_encrypted().hex())), 18)
+
+    def test_key_store(self):
+        key_store = KeyStore()
+        key_store.add("SYSTEMID".encode("ascii").hex(), self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY)
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R, key_store=key_store)
+
+        self.assertEqual(len(parser.parse(self.__generate_encrypted().hex())), 18)
+
+        key_store.remove(b"SYSTEMID")
+        with self.assertRaises(ParseError):
+            parser.parse(self.__generate_encrypted().hex())
+
+    def test_cipher_cached(self):
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R)
+        frame = self.__generate_encrypted().hex()
+
+        with mock.patch('dsmr_parser.parsers.TelegramCipher', wraps=TelegramCipher) as cipher:
+            for _ in range(3):
+                parser.parse(frame, self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY)
+
+        self.assertEqual(cipher.call_count, 1)
+
+    def test_parse_all(self):
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R)
+
+        damaged = self.__generate_encrypted()
+        damaged[150] = 0x00
+        frames = [self.__generate_encrypted().hex(), damaged.hex(), self.__generate_encrypted().hex()]
+
+        telegrams = list(parser.parse_all(frames, self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY))
+
+        self.assertEqual(len(telegrams), 2)
+
+        with self.assertRaises(DecryptionError):
+            list(parser.parse_all(frames, self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY, throw_ex=True))
+
+    def test_parse_all_not_encrypted_or_authenticated(self):
+        parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R)
+
+        # dlms_cosem can not generate such frames, clear the flags in the security control byte instead.
+        plain = self.__generate_encrypted()
+        plain[13] = SecurityControlField(security_suite=0, authenticated=False, encrypted=False).to_bytes()[0]
+        plain = plain.hex()
+        frames = [self.__generate_encrypted().hex(), plain, self.__generate_encrypted().hex()]
+
+        telegrams = list(parser.parse_all(frames, self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY))
+
+        self.assertEqual(len(telegrams), 2)
+
+        with self.assertRaises(ParseError):
+            parser.parse(plain, self.DUMMY_ENCRYPTION_KEY, self.DUMMY_AUTHENTICATION_KEY)
+
     def test_damaged_frame(self):
         # If the frame is damaged decrypting fails (crc is technically not needed)
         parser = TelegramParser(telegram_specifications.SAGEMCOM_T210_D_R)
@@ -1,9 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
+import asyncio
+import time
+
 import unittest
 
 from dsmr_parser import obis_references as obis
+from dlms_cosem.exceptions import DecryptionError
+
 from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.error_reporting import ErrorAggregator
+from dsmr_parser.exceptions import ParseError
 from dsmr_parser.objects import Telegram
 
 TELEGRAM_V2_2 = (
@@ -71,3 +79,116 @@ class ProtocolTest(unittest.TestCase):
         mock_transport.close.assert_called_once()
 
         self.protocol.connection_lost(None)
+
+
+class ProtocolAsyncIteratorTest(unittest.TestCase):
+
+    def test_async_for(self):
+        async def receive():
+            new_protocol, _ = create_dsmr_protocol('2.2', telegram_callback=None)
+            protocol = new_protocol()
+            protocol.connection_made(Mock())
+
+            protocol.data_received((TELEGRAM_V2_2 * 2).encode('ascii'))
+            asyncio.get_running_loop().call_soon(protocol.data_received, TELEGRAM_V2_2.encode('ascii'))
+            asyncio.get_running_loop().call_soon(protocol.connection_lost, None)
+
+            # Iteration ends after the connection is closed and the queued telegrams are consumed.
+            return [telegram async for telegram in protocol]
+
+        telegrams = asyncio.run(asyncio.wait_for(receive(), 2))
+
+        self.assertEqual(len(telegrams), 3)
+        assert isinstance(telegrams[0], Telegram)
+
+    def test_async_for_requires_queue(self):
+        self.protocol = create_dsmr_protocol('2.2', telegram_callback=Mock())[0]()
+
+        with self.assertRaises(TypeError):
+            self.protocol.__aiter__()
+
+
+class ProtocolParseExecutorTest(unittest.TestCase):
+
+    def test_ordered_delivery(self):
+        values = []
+
+        def parse(telegram, **kwargs):
+            # Later telegrams finish parsing first.
+            time.sleep(0.05 if '00001.001' in telegram else 0)
+            return telegram
+
+        async def receive():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                new_protocol, _ = create_dsmr_protocol('2.2', telegram_callback=values.append,
+                                                       loop=asyncio.get_running_loop(), parse_executor=executor)
+                protocol = new_protocol()
+                protocol.telegram_parser = Mock(parse=parse)
+                protocol.connection_made(Mock())
+
+                second_telegram = TELEGRAM_V2_2.replace('00001.001', '00002.002')
+                protocol.data_received((TELEGRAM_V2_2 + second_telegram).encode('ascii'))
+                protocol.connection_lost(None)
+
+                # Closing waits for the telegrams still being parsed.
+                self.assertFalse(values)
+                await asyncio.wait_for(protocol.wait_closed(), 2)
+                return protocol
+
+        protocol = asyncio.run(receive())
+
+        self.assertEqual(len(values), 2)
+        self.assertIn('00001.001', values[0])
+        self.assertIn('00002.002', values[1])
+        self.assertEqual(protocol.stats.telegrams_parsed, 2)
+        self.assertGreater(protocol.stats.parse_latency.sum, 0.05)
+        self.assertGreater(protocol.stats.loop_time, 0)
+
+    def test_parse_error(self):
+        async def receive():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                new_protocol, _ = create_dsmr_protocol('2.2', telegram_callback=Mock(),
+                                                       loop=asyncio.get_running_loop(), parse_executor=executor)
+                protocol = new_protocol()
+                protocol.telegram_parser = Mock(parse=Mock(side_effect=ParseError('invalid')))
+                protocol.connection_made(Mock())
+                protocol.data_received(TELEGRAM_V2_2.encode('ascii'))
+                protocol.connection_lost(None)
+                await asyncio.wait_for(protocol.wait_closed(), 2)
+                return protocol
+
+        protocol = asyncio.run(receive())
+
+        protocol.telegram_callback.assert_not_called()
+        self.assertEqual(protocol.stats.parse_failures, 1)
+
+    def test_unexpected_error_in_flight_when_connection_lost(self):
+        values = []
+
+        def parse(telegram, **kwargs):
+            time.sleep(0.05)
+            if '00001.001' in telegram:
+                raise DecryptionError('invalid')
+            return telegram
+
+        async def receive():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                new_protocol, _ = create_dsmr_protocol('2.2', telegram_callback=values.append,
+                                                       loop=asyncio.get_running_loop(), parse_executor=executor,
+                                                       source_id='meter', error_reporter=ErrorAggregator(sink=None))
+                protocol = new_protocol()
+                protocol.telegram_parser = Mock(parse=parse)
+                protocol.connection_made(Mock())
+
+                second_telegram = TELEGRAM_V2_2.replace('00001.001', '00002.002')
+                protocol.data_received((TELEGRAM_V2_2 + second_telegram).encode('ascii'))
+                protocol.connection_lost(None)
+                await asyncio.wait_for(protocol.wait_closed(), 2)
+                return protocol
+
+        protocol = asyncio.run(receive())
+
+        self.assertEqual(len(values), 1)
+        self.assertIn('00002.002', values[0])
+        self.assertEqual(protocol.stats.parse_failures, 1)
+        self.assertEqual(protocol.error_reporter.totals(), {('meter', None, 'DecryptionError'): 1})
@@ -0,0 +1,80 @@
+import unittest
+
+from dsmr_parser import telegram_specifications
+from dsmr_parser.clients import registry
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.clients.registry import detect_dsmr_version, get_dsmr_version_settings, get_telegram_parser
+from dsmr_parser.clients.settings import SERIAL_SETTINGS_V4
+from test import example_telegrams
+from test.example_telegrams import TELEGRAM_FLUVIUS_V171
+
+TELEGRAM_SWEDEN = (
+    '/ELL5\\253833635_A\r\n'
+    '\r\n'
+    '0-0:1.0.0(210217184019W)\r\n'
+    '1-0:1.8.0(00006678.394*kWh)\r\n'
+    '1-0:2.8.0(00000000.000*kWh)\r\n'
+    '1-0:1.7.0(0000.000*kW)\r\n'
+    '1-0:2.7.0(0000.000*kW)\r\n'
+    '!7945\r\n'
+)
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_settings(self):
+        specification, serial_settings = get_dsmr_version_settings('4+')
+
+        self.assertIs(specification, telegram_specifications.V5)
+        self.assertEqual(serial_settings, SERIAL_SETTINGS_V4)
+
+        # Callers may add the port to the settings.
+        serial_settings['url'] = '/dev/ttyUSB0'
+        self.assertNotIn('url', SERIAL_SETTINGS_V4)
+
+    def test_unknown_version(self):
+        with self.assertRaises(NotImplementedError):
+            get_dsmr_version_settings('6')
+
+    def test_parser_is_shared(self):
+        self.assertIs(get_telegram_parser('5'), get_telegram_parser('5'))
+
+    def test_register(self):
+        self.addCleanup(registry._DSMR_VERSIONS.pop, 'custom')
+        registry.register_dsmr_version('custom', telegram_specifications.V3, SERIAL_SETTINGS_V4)
+
+        self.assertIn('custom', registry.dsmr_versions())
+        self.assertIs(get_telegram_parser('custom').telegram_specification, telegram_specifications.V3)
+
+    def test_detect(self):
+        for telegram, dsmr_version in ((example_telegrams.TELEGRAM_V2_2, '2.2'),
+                                       (example_telegrams.TELEGRAM_V3, '2.2'),
+                                       (example_telegrams.TELEGRAM_V4_2, '4'),
+                                       (example_telegrams.TELEGRAM_V5, '5'),
+                                       (example_telegrams.TELEGRAM_V5_TWO_MBUS, '5'),
+                                       (example_telegrams.TELEGRAM_UNPADDED_CRC, '5'),
+                                       # Unencrypted, parsed with the V5 objects.
+                                       (example_telegrams.TELEGRAM_SAGEMCOM_T210_D_R, '5'),
+                                       (example_telegrams.TELEGRAM_FLUVIUS_V171, '5B'),
+                                       (example_telegrams.TELEGRAM_FLUVIUS_V171_ALT, '5B'),
+                                       (example_telegrams.TELEGRAM_ESY5Q3DB1024_V304, 'Q3D'),
+                                       (example_telegrams.TELEGRAM_ESY5Q3DA1004_V304, 'Q3D'),
+                                       (example_telegrams.TELEGRAM_ISKRA_IE, 'ISKRA_IE'),
+                                       (example_telegrams.TELEGRAM_V5_EON_HU, '5EONHU'),
+                                       (TELEGRAM_SWEDEN, '5S')):
+            self.assertEqual(detect_dsmr_version(telegram), dsmr_version)
+
+        # Every example telegram is covered.
+        self.assertEqual(len([name for name in dir(example_telegrams) if name.startswith('TELEGRAM_')]), 13)
+
+    def test_auto_detecting_protocol(self):
+        telegrams = []
+        new_protocol, serial_settings = create_dsmr_protocol('auto', telegrams.append)
+        protocol = new_protocol()
+
+        self.assertIsNone(serial_settings)
+
+        protocol.data_received(TELEGRAM_FLUVIUS_V171.encode('ascii'))
+
+        self.assertIs(protocol.telegram_parser, get_telegram_parser('5B'))
+        self.assertEqual(telegrams[0].BELGIUM_VERSION_INFORMATION.value, '50217')
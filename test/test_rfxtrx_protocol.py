@@ -1,8 +1,10 @@
+from unittest import mock
 from unittest.mock import Mock
 
 import unittest
 
 from dsmr_parser import obis_references as obis
+from dsmr_parser.clients.protocol import DSMRProtocol
 from dsmr_parser.clients.rfxtrx_protocol import create_rfxtrx_dsmr_protocol, PACKETTYPE_DSMR, SUBTYPE_P1
 from dsmr_parser.objects import Telegram
 
@@ -75,3 +77,21 @@ class RFXtrxProtocolTest(unittest.TestCase):
 
         assert float(telegram[obis.GAS_METER_READING].value) == 1.001
         assert telegram[obis.GAS_METER_READING].unit == 'm3'
+
+    def test_skipped_packets(self):
+        data = encode_telegram_as_RF_packets(TELEGRAM_V2_2)
+        self.protocol.data_received(data)
+
+        self.assertEqual(self.protocol.skipped_packets, {(0x01, 0x02): TELEGRAM_V2_2.count('\n') + 1})
+        self.assertEqual(self.protocol.remaining_data, b'')
+
+    def test_payloads_passed_per_chunk(self):
+        data = encode_telegram_as_RF_packets(TELEGRAM_V2_2)
+
+        with mock.patch.object(DSMRProtocol, '_handle_data') as data_received:
+            self.protocol.data_received(data[:-2])
+            self.protocol.data_received(data[-2:])
+
+        self.assertEqual(data_received.call_count, 1)
+        self.assertEqual(data_received.call_args[0][0], (TELEGRAM_V2_2 + '\n').encode('ascii'))
+        self.assertEqual(self.protocol.remaining_data, b'')
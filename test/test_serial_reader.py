@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import asyncio
+import unittest
+
+import serial_asyncio_fast
+
+from dsmr_parser.clients import SerialReader, AsyncSerialReader, SERIAL_SETTINGS_V2_2, SERIAL_SETTINGS_V5
+from dsmr_parser.telegram_specifications import V5
+from test.example_telegrams import TELEGRAM_V5
+
+
+class SerialReaderTest(unittest.TestCase):
+
+    def test_chunk_size(self):
+        self.assertEqual(SerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V5), V5).chunk_size, 11520)
+        self.assertEqual(SerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V2_2), V5).chunk_size, 960)
+
+    @mock.patch('serial.Serial')
+    def test_read_as_object(self, serial_mock):
+        data = (TELEGRAM_V5 * 2).encode('ascii')
+        serial_handle = serial_mock.return_value.__enter__.return_value
+        serial_handle.read.side_effect = [data[:500], b'', data[500:]]
+
+        reader = SerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V5), V5)
+        telegrams = reader.read_as_object()
+
+        self.assertEqual(next(telegrams).P1_MESSAGE_HEADER.value, '50')
+        self.assertEqual(next(telegrams).P1_MESSAGE_HEADER.value, '50')
+
+        # A read ends when the line goes quiet after a burst instead of waiting for a full chunk.
+        serial_handle.read.assert_called_with(11520)
+        self.assertEqual(serial_mock.call_args.kwargs['inter_byte_timeout'], SerialReader.INTER_BYTE_TIMEOUT)
+
+
+class AsyncSerialReaderTest(unittest.TestCase):
+
+    def test_read_as_object(self):
+        async def read():
+            stream_reader = asyncio.StreamReader()
+            stream_reader.feed_data((TELEGRAM_V5 * 2).encode('ascii'))
+            stream_reader.feed_eof()
+
+            async def open_serial_connection(**kwargs):
+                return stream_reader, None
+
+            queue = asyncio.Queue()
+            reader = AsyncSerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V5), V5)
+            with mock.patch.object(serial_asyncio_fast, 'open_serial_connection', open_serial_connection):
+                # Returns once the connection is closed.
+                await reader.read_as_object(queue)
+
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        telegrams = asyncio.run(read())
+
+        self.assertEqual([telegram.P1_MESSAGE_HEADER.value for telegram in telegrams], ['50', '50'])
+
+    def test_async_for_with_parse_executor(self):
+        async def read():
+            stream_reader = asyncio.StreamReader()
+            stream_reader.feed_data((TELEGRAM_V5 * 3 + TELEGRAM_V5.replace('!6EEE', '!6EEF')).encode('ascii'))
+            stream_reader.feed_eof()
+
+            async def open_serial_connection(**kwargs):
+                return stream_reader, None
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                reader = AsyncSerialReader('/dev/ttyUSB0', dict(SERIAL_SETTINGS_V5), V5, parse_executor=executor)
+                with mock.patch.object(serial_asyncio_fast, 'open_serial_connection', open_serial_connection):
+                    return reader, [telegram async for telegram in reader]
+
+        reader, telegrams = asyncio.run(read())
+
+        self.assertEqual([telegram.P1_MESSAGE_HEADER.value for telegram in telegrams], ['50', '50', '50'])
+
+        # Parsed in the executor, counted on the event loop.
+        self.assertEqual(reader.stats.telegrams_parsed, 3)
+        self.assertEqual(reader.stats.parse_latency.count, 3)
+        self.assertEqual(reader.stats.checksum_failures, 1)
@@ -0,0 +1,59 @@
+import socket
+import threading
+import unittest
+
+from dsmr_parser.clients.socket_ import SocketReader
+from dsmr_parser.telegram_specifications import V5
+from test.example_telegrams import TELEGRAM_V5
+
+
+class SocketReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.port = self.server.getsockname()[1]
+
+    def tearDown(self):
+        self.server.close()
+
+    def _serve(self, *connections):
+        """ Accept a connection for each given list of chunks, send the chunks and close it. """
+        def serve():
+            for chunks in connections:
+                connection, _ = self.server.accept()
+                with connection:
+                    for chunk in chunks:
+                        connection.sendall(chunk)
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        return thread
+
+    def test_read(self):
+        data = b'\xff\xfegarbage' + (TELEGRAM_V5 * 2).encode('ascii')
+        thread = self._serve([data[:100], data[100:]])
+
+        reader = SocketReader('127.0.0.1', self.port, V5, buffer_size=512, timeout=5)
+        telegrams = list(reader.read())
+        thread.join()
+
+        # Reading stops when the connection is closed by the remote.
+        self.assertEqual(len(telegrams), 2)
+        self.assertEqual(telegrams[0].P1_MESSAGE_HEADER.value, '50')
+        self.assertEqual(reader.stats.bytes_received, len(data))
+        self.assertEqual(reader.stats.bytes_discarded, len(b'\xff\xfegarbage'))
+        self.assertEqual(reader.stats.telegrams_parsed, 2)
+
+    def test_read_as_object_reconnects(self):
+        data = TELEGRAM_V5.encode('ascii')
+        thread = self._serve([data], [data])
+
+        reader = SocketReader('127.0.0.1', self.port, V5, timeout=5, reconnect_interval=0)
+        telegrams = reader.read_as_object()
+        try:
+            received = [next(telegrams), next(telegrams)]
+        finally:
+            telegrams.close()
+        thread.join()
+
+        self.assertEqual([telegram.P1_MESSAGE_HEADER.value for telegram in received], ['50', '50'])
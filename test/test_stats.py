@@ -0,0 +1,100 @@
+from unittest.mock import Mock
+import asyncio
+import gc
+import unittest
+
+from dsmr_parser.clients.hub import DSMRHub
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.clients.stats import ConnectionStats, StatsRegistry
+from dsmr_parser.clients.telegram_buffer import TelegramBuffer
+from dsmr_parser.exceptions import InvalidChecksumError, ParseError
+from test.example_telegrams import TELEGRAM_V5
+
+
+class ConnectionStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = StatsRegistry()
+        self.stats = ConnectionStats('meter', registry=self.registry)
+
+    def test_frame(self):
+        telegrams = list(self.stats.frame('noise' + TELEGRAM_V5 * 2, TelegramBuffer()))
+
+        self.assertEqual(len(telegrams), 2)
+        self.assertEqual(self.stats.telegrams_framed, 2)
+        self.assertEqual(self.stats.bytes_discarded, len('noise'))
+
+    def test_parse(self):
+        telegram_parser = Mock()
+        telegram_parser.parse.side_effect = [Mock(), InvalidChecksumError('crc'), ParseError('invalid')]
+
+        self.stats.parse(telegram_parser, TELEGRAM_V5)
+        for _ in range(2):
+            with self.assertRaises(ParseError):
+                self.stats.parse(telegram_parser, TELEGRAM_V5)
+
+        self.assertEqual(self.stats.telegrams_parsed, 1)
+        self.assertEqual(self.stats.checksum_failures, 1)
+        self.assertEqual(self.stats.parse_failures, 1)
+        self.assertEqual(self.stats.parse_latency.count, 1)
+        self.assertGreater(self.stats.telegrams_per_second, 0)
+
+    def test_registry(self):
+        other = ConnectionStats('other', registry=self.registry)
+        other.bytes_received = 10
+
+        collected = self.registry.collect()
+        self.assertEqual(sorted(collected), ['meter', 'other'])
+        self.assertEqual(collected['other']['bytes_received'], 10)
+
+        # Stats of closed connections are not kept alive by the registry.
+        del other
+        gc.collect()
+        self.assertEqual(list(self.registry), [self.stats])
+
+
+class ProtocolStatsTest(unittest.TestCase):
+
+    def test_data_received(self):
+        new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock())
+        protocol = new_protocol()
+        protocol.connection_made(Mock(**{'get_extra_info.return_value': ('127.0.0.1', 2001)}))
+
+        data = ('noise' + TELEGRAM_V5 + TELEGRAM_V5.replace('!6EEE', '!6EEF')).encode('ascii')
+        protocol.data_received(data)
+
+        stats = protocol.stats
+        self.assertEqual(stats.name, '127.0.0.1:2001')
+        self.assertEqual(stats.bytes_received, len(data))
+        self.assertEqual(stats.bytes_discarded, len('noise'))
+        self.assertEqual(stats.telegrams_framed, 2)
+        self.assertEqual(stats.telegrams_parsed, 1)
+        self.assertEqual(stats.checksum_failures, 1)
+        self.assertEqual(stats.callback_latency.count, 1)
+
+    def test_connection_names(self):
+        names = []
+        for extra_info in ({'peername': ('::1', 2001, 0, 0)},
+                           {'serial': Mock(port='/dev/ttyUSB0')},
+                           {'filename': '/var/log/p1.log'},
+                           {},
+                           {}):
+            new_protocol, _ = create_dsmr_protocol('5', telegram_callback=Mock())
+            protocol = new_protocol()
+            protocol.connection_made(Mock(**{'get_extra_info.side_effect': extra_info.get}))
+            names.append(protocol.stats.name)
+
+        self.assertEqual(names[:3], ['[::1]:2001', '/dev/ttyUSB0', '/var/log/p1.log'])
+        # Connections without a name are numbered.
+        self.assertTrue(names[3].startswith('connection-'))
+        self.assertNotEqual(names[3], names[4])
+
+    def test_hub_source_stats(self):
+        hub = DSMRHub(loop=asyncio.new_event_loop())
+        self.addCleanup(hub.loop.close)
+        hub.add_tcp_source('meter-1', '127.0.0.1', 2001, '5')
+
+        protocol = hub._create_protocol_factory('meter-1', '5', hub.get_stats('meter-1'))()
+
+        self.assertIs(protocol.stats, hub.get_stats('meter-1'))
+        self.assertEqual(protocol.stats.name, 'meter-1')
@@ -103,3 +103,12 @@ class TelegramBufferTest(unittest.TestCase):
 
         self.assertEqual(telegram, TELEGRAM_V4_2)
         self.assertEqual(self.telegram_buffer._buffer, '')
+
+    def test_discarded(self):
+        self.telegram_buffer.append('garbage' + TELEGRAM_V2_2[:10])
+        self.assertEqual(list(self.telegram_buffer.get_all()), [])
+
+        self.telegram_buffer.append(TELEGRAM_V2_2[10:] + '\r\n' + TELEGRAM_V4_2)
+        self.assertEqual(list(self.telegram_buffer.get_all()), [TELEGRAM_V2_2, TELEGRAM_V4_2])
+
+        self.assertEqual(self.telegram_buffer.discarded, len('garbage') + len('\r\n'))
@@ -0,0 +1,119 @@
+from operator import itemgetter
+from unittest.mock import Mock
+import asyncio
+import unittest
+
+from dsmr_parser.clients.protocol import create_dsmr_protocol
+from dsmr_parser.clients.telegram_queue import TelegramQueue, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, \
+    OVERFLOW_DROP_NEWEST, OVERFLOW_COALESCE
+from test.example_telegrams import TELEGRAM_V5
+
+
+class TelegramQueueTest(unittest.TestCase):
+
+    def _fill(self, overflow, items, **kwargs):
+        async def fill():
+            queue = TelegramQueue(maxsize=2, overflow=overflow, **kwargs)
+            for item in items:
+                await queue.put(item)
+            return queue, [queue.get_nowait() for _ in range(queue.qsize())]
+
+        return asyncio.run(fill())
+
+    def test_drop_oldest(self):
+        queue, items = self._fill(OVERFLOW_DROP_OLDEST, [1, 2, 3, 4])
+
+        self.assertEqual(items, [3, 4])
+        self.assertEqual(queue.dropped, 2)
+
+    def test_drop_newest(self):
+        queue, items = self._fill(OVERFLOW_DROP_NEWEST, [1, 2, 3, 4])
+
+        self.assertEqual(items, [1, 2])
+        self.assertEqual(queue.dropped, 2)
+
+    def test_coalesce(self):
+        queue, items = self._fill(OVERFLOW_COALESCE, [('a', 1), ('b', 1), ('a', 2), ('c', 1)], key=itemgetter(0))
+
+        # 'a' is replaced in place, 'c' makes room by dropping the oldest.
+        self.assertEqual(items, [('b', 1), ('c', 1)])
+        self.assertEqual(queue.coalesced, 1)
+        self.assertEqual(queue.dropped, 1)
+
+    def test_coalesce_not_full(self):
+        queue, items = self._fill(OVERFLOW_COALESCE, [('a', 1), ('a', 2)], key=itemgetter(0))
+
+        # Telegrams are only replaced to make room.
+        self.assertEqual(items, [('a', 1), ('a', 2)])
+        self.assertEqual(queue.coalesced, 0)
+        self.assertEqual(queue.dropped, 0)
+
+        queue, items = self._fill(OVERFLOW_COALESCE, [('a', 1), ('a', 2), ('b', 1), ('a', 3)], key=itemgetter(0))
+
+        # Once full the newest queued telegram of the meter is replaced.
+        self.assertEqual(items, [('a', 3), ('b', 1)])
+        self.assertEqual(queue.coalesced, 1)
+        self.assertEqual(queue.dropped, 1)
+
+    def test_block(self):
+        async def fill():
+            queue = TelegramQueue(maxsize=1, overflow=OVERFLOW_BLOCK)
+            queue.put_nowait(1)
+            with self.assertRaises(asyncio.QueueFull):
+                queue.put_nowait(2)
+
+            put = asyncio.ensure_future(queue.put(2))
+            await asyncio.sleep(0)
+            self.assertFalse(put.done())
+            self.assertEqual(await queue.get(), 1)
+            await put
+            return queue.dropped
+
+        self.assertEqual(asyncio.run(fill()), 0)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            TelegramQueue(overflow='unknown')
+
+
+class ProtocolBackpressureTest(unittest.TestCase):
+
+    def test_pause_reading_while_queue_full(self):
+        async def receive():
+            queue = TelegramQueue(maxsize=1)
+            new_protocol, _ = create_dsmr_protocol('5', telegram_callback=None, telegram_queue=queue,
+                                                   source_id='meter')
+            protocol = new_protocol()
+            transport = Mock()
+            transport.is_closing.return_value = False
+            protocol.connection_made(transport)
+
+            protocol.data_received((TELEGRAM_V5 * 3).encode('ascii'))
+            transport.pause_reading.assert_called_once()
+            transport.resume_reading.assert_not_called()
+
+            received = [await queue.get() for _ in range(3)]
+            await asyncio.sleep(0)
+            transport.resume_reading.assert_called_once()
+            return received
+
+        received = asyncio.run(receive())
+
+        self.assertEqual([source_id for source_id, _ in received], ['meter'] * 3)
+
+    def test_drop_on_overflow(self):
+        async def receive():
+            queue = TelegramQueue(maxsize=1, overflow=OVERFLOW_DROP_OLDEST)
+            new_protocol, _ = create_dsmr_protocol('5', telegram_callback=None, telegram_queue=queue)
+            protocol = new_protocol()
+            protocol.connection_made(Mock())
+
+            protocol.data_received((TELEGRAM_V5 * 3).encode('ascii'))
+
+            protocol.transport.pause_reading.assert_not_called()
+            return queue
+
+        queue = asyncio.run(receive())
+
+        self.assertEqual(queue.qsize(), 1)
+        self.assertEqual(queue.dropped, 2)